@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Application Info Benchmark
+
+Compares AppInfoService snapshots against rebuilding the info dict (and
+serializing it) on every call, as a polled health/info endpoint would.
+
+Usage:
+    python scripts/benchmarks/bench_app_info.py [--number 500000]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+
+
+def rebuild_info(config: "main.AppConfig") -> dict:
+    """Build the info dict the way get_app_info did before snapshots."""
+    return {
+        "name": config.app_name,
+        "version": config.app_version,
+        "environment": config.environment,
+        "python_version": sys.version,
+        "platform": sys.platform,
+        "debug_mode": config.debug,
+    }
+
+
+def main_benchmark() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=500_000, help="Calls")
+    args = parser.parse_args()
+
+    config = main.get_default_config()
+    service = main.AppInfoService(config)
+    _, _, etag = service.get_app_info_response()
+
+    cases = [
+        ("rebuild dict", lambda: rebuild_info(config)),
+        ("snapshot get_app_info", service.get_app_info),
+        (
+            "rebuild + json.dumps",
+            lambda: json.dumps(rebuild_info(config)).encode("utf-8"),
+        ),
+        ("snapshot get_app_info_json", service.get_app_info_json),
+        ("response 304 (ETag hit)", lambda: service.get_app_info_response(etag)),
+    ]
+
+    print(f"{'case':<30}{'calls/s':>14}{'ns/call':>10}")
+    for label, func in cases:
+        seconds = min(timeit.repeat(func, number=args.number, repeat=3))
+        print(
+            f"{label:<30}{args.number / seconds:>14,.0f}"
+            f"{seconds / args.number * 1e9:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main_benchmark()
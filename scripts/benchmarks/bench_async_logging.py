@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Async Logging Latency Benchmark
+
+Measures GreetingService.greet latency percentiles with synchronous logging
+and with the queue-based async mode, while every write to app.log is slowed
+down to simulate a congested disk.
+
+Usage:
+    python scripts/benchmarks/bench_async_logging.py [--calls 2000] [--delay-ms 1]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+
+
+class SlowStream:
+    """File stream wrapper that sleeps on every write, like a slow disk."""
+
+    def __init__(self, stream, delay: float):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, data: str) -> int:
+        time.sleep(self.delay)
+        return self.stream.write(data)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def close(self) -> None:
+        self.stream.close()
+
+
+def percentile(samples: list, fraction: float) -> float:
+    """Return the nearest-rank percentile of sorted samples."""
+    index = min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))
+    return samples[index]
+
+
+def reset_root_logger() -> None:
+    """Detach and close every root handler."""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def run_mode(label: str, options: "main.LoggingOptions", args) -> None:
+    """Run greet calls under one logging mode and print latency stats."""
+    reset_root_logger()
+    config = main.get_default_config()
+    with open(os.devnull, "w") as devnull:
+        # The stdout handler binds sys.stdout at setup time
+        sys.stdout = devnull
+        try:
+            main.setup_logging(config, options)
+        finally:
+            sys.stdout = sys.__stdout__
+
+        listener = main._log_listener
+        queue_handler = main._log_queue_handler
+        handlers = listener.handlers if listener else logging.getLogger().handlers
+        for handler in handlers:
+            if isinstance(handler, logging.FileHandler):
+                handler.stream = SlowStream(handler.stream, args.delay_ms / 1000)
+
+        service = main.GreetingService(config)
+        samples = []
+        for _ in range(args.calls):
+            start = time.perf_counter()
+            service.greet("Alice")
+            samples.append((time.perf_counter() - start) * 1e6)
+
+        drain_start = time.perf_counter()
+        main.shutdown_logging()
+        drain = time.perf_counter() - drain_start
+        reset_root_logger()
+
+    dropped = queue_handler.dropped if queue_handler else 0
+    samples.sort()
+    print(
+        f"{label:<22}{statistics.median(samples):>10.1f}"
+        f"{percentile(samples, 0.99):>10.1f}{samples[-1]:>11.1f}"
+        f"{drain:>10.2f}{dropped:>9}"
+    )
+
+
+def main_benchmark() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=2000, help="greet calls")
+    parser.add_argument(
+        "--delay-ms", type=float, default=1.0, help="Simulated latency per write"
+    )
+    args = parser.parse_args()
+
+    # Tiny window so the shared limiter never holds more than a few entries
+    main.rate_limiter = main.RateLimiter(window_ms=1, max_requests=1_000_000)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = os.path.join(tmpdir, "app.log")
+        modes = [
+            ("sync FileHandler", main.LoggingOptions(log_file=log_file)),
+            ("async block", main.LoggingOptions(log_file=log_file, async_mode=True)),
+            (
+                "async drop (q=256)",
+                main.LoggingOptions(
+                    log_file=log_file,
+                    async_mode=True,
+                    queue_size=256,
+                    overflow_policy="drop",
+                ),
+            ),
+        ]
+        print(
+            f"{'mode':<22}{'p50 us':>10}{'p99 us':>10}{'max us':>11}"
+            f"{'drain s':>10}{'dropped':>9}"
+        )
+        for label, options in modes:
+            run_mode(label, options, args)
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Response Cache Benchmark
+
+Times greet() with caching disabled and with the in-process cache tier, and,
+given a Redis-protocol server, single GETs against one pipelined MGET per
+batch of keys.
+
+Usage:
+    python scripts/benchmarks/bench_cache.py [--number 200000] \\
+        [--redis localhost:6379] [--batch 100]
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+from cache import LRUCache, RedisClient, TwoTierCache  # noqa: E402
+
+
+def per_call_ns(func, number: int) -> float:
+    """Best-of-five cost of one call in nanoseconds."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e9
+
+
+def main_benchmark() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=200_000, help="Greetings")
+    parser.add_argument("--redis", help="host:port of a Redis-protocol server")
+    parser.add_argument("--batch", type=int, default=100, help="Keys per MGET")
+    args = parser.parse_args()
+
+    service = main.GreetingService(
+        main.get_default_config(),
+        limiter=main.RateLimiter(window_ms=1, max_requests=1_000_000),
+    )
+    service.logger.disabled = True
+    greet = lambda: service.greet("  Mary-Jane O'Connor  ", "ja")  # noqa: E731
+
+    print(f"{'case':<28}{'ns/op':>12}")
+    print(f"{'greet, cache disabled':<28}{per_call_ns(greet, args.number):>12.0f}")
+    main.response_cache = TwoTierCache()
+    print(f"{'greet, memory hit':<28}{per_call_ns(greet, args.number):>12.0f}")
+    main.response_cache = None
+
+    if args.redis:
+        host, _, port = args.redis.partition(":")
+        cache = TwoTierCache(LRUCache(), RedisClient(host, int(port or 6379)), "bench:")
+        keys = [f"key-{index}" for index in range(args.batch)]
+        cache.set_many({key: key for key in keys})
+        rounds = max(1, args.number // (100 * args.batch))
+
+        def singles():
+            cache.memory.clear()
+            for key in keys:
+                cache.get(key)
+
+        def batched():
+            cache.memory.clear()
+            cache.get_many(keys)
+
+        for label, func in (("redis GET per key", singles), ("redis MGET", batched)):
+            cost = per_call_ns(func, rounds) / args.batch
+            print(f"{label:<28}{cost:>12.0f}")
+        print(cache.stats())
+
+
+if __name__ == "__main__":
+    main_benchmark()
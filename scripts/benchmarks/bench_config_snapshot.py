@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Configuration Snapshot Startup Benchmark
+
+Measures how long load_configuration takes in a fresh interpreter, with and
+without the CONFIG_SNAPSHOT cache. Each sample runs in its own process so the
+dotenv import and regex compilation costs are included, exactly as a short
+CLI run would pay them.
+
+Usage:
+    python scripts/benchmarks/bench_config_snapshot.py [--runs 20]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[2] / "src"
+
+PROBE = """
+import time
+import main
+start = time.perf_counter()
+main.load_configuration()
+print(time.perf_counter() - start)
+"""
+
+ENV_FILE = """APP_NAME="Benchmark App"
+APP_VERSION=1.0.0
+APP_ENV=development
+LOG_LEVEL=INFO
+DEBUG=false
+"""
+
+
+def run_probe(workdir: str, env: dict) -> float:
+    """Run one load_configuration call in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=workdir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def measure(workdir: str, env: dict, runs: int) -> list:
+    """Collect load times (in milliseconds) over several runs."""
+    return [run_probe(workdir, env) * 1000 for _ in range(runs)]
+
+
+def main() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=20, help="Runs per mode")
+    args = parser.parse_args()
+
+    base_env = {
+        key: value
+        for key, value in os.environ.items()
+        if key not in ("CI", "NODE_ENV", "CONFIG_SNAPSHOT")
+    }
+    base_env["PYTHONPATH"] = str(SRC_DIR)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        Path(workdir, ".env").write_text(ENV_FILE)
+        snapshot_env = dict(base_env, CONFIG_SNAPSHOT=str(Path(workdir, "cfg.snap")))
+
+        baseline = measure(workdir, base_env, args.runs)
+        run_probe(workdir, snapshot_env)  # prime the snapshot
+        snapshot = measure(workdir, snapshot_env, args.runs)
+
+    base_median = statistics.median(baseline)
+    snap_median = statistics.median(snapshot)
+    print(f"{'mode':<12}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for label, samples in (("sources", baseline), ("snapshot", snapshot)):
+        print(
+            f"{label:<12}{statistics.median(samples):>12.3f}"
+            f"{min(samples):>10.3f}{max(samples):>10.3f}"
+        )
+    print(
+        f"\nstartup delta: {base_median - snap_median:.3f} ms "
+        f"({base_median / snap_median:.1f}x faster)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Daemon Mode Benchmark
+
+Compares the wall time of one greeting per process, as batch scripts do it:
+the full CLI, the thin client falling back to in-process execution, and the
+thin client forwarding to a running daemon. Also reports the per-request
+cost of a client that keeps its daemon connection open.
+
+Usage:
+    python scripts/benchmarks/bench_daemon.py [--invocations 20]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[2] / "src"
+sys.path.insert(0, str(SRC))
+
+import greet_client  # noqa: E402
+
+
+def time_invocations(command: list, invocations: int) -> float:
+    """Run a command repeatedly; return mean wall time in milliseconds."""
+    start = time.perf_counter()
+    for index in range(invocations):
+        subprocess.run(
+            command + ["--name", f"User {chr(65 + index % 26)}"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    return (time.perf_counter() - start) / invocations * 1e3
+
+
+def wait_for_daemon(path: str, timeout: float = 30.0) -> None:
+    """Block until the daemon at path answers a ping."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with greet_client.DaemonClient(path) as client:
+                client.request({"op": "ping"})
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def main_benchmark() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--invocations", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    python = sys.executable
+    client = [python, str(SRC / "greet_client.py")]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "daemon.sock")
+        env = dict(os.environ, DAEMON_SOCKET=path)
+        os.environ["DAEMON_SOCKET"] = path
+
+        print(f"{'case':<32}{'ms/greeting':>12}")
+        cli = time_invocations([python, str(SRC / "main.py")], args.invocations)
+        print(f"{'CLI (main.py)':<32}{cli:>12.1f}")
+        fallback = time_invocations(client, args.invocations)
+        print(f"{'client, no daemon (fallback)':<32}{fallback:>12.1f}")
+
+        daemon = subprocess.Popen(
+            [python, str(SRC / "main.py"), "daemon", "--socket", path],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_daemon(path)
+            forwarded = time_invocations(client, args.invocations)
+            print(f"{'client, daemon running':<32}{forwarded:>12.1f}")
+
+            with greet_client.DaemonClient(path) as connection:
+                start = time.perf_counter()
+                for index in range(args.requests):
+                    connection.greet(
+                        f"User {chr(65 + index % 26)}", caller=f"10.0.{index >> 6}.1"
+                    )
+                elapsed = time.perf_counter() - start
+            per_request = elapsed / args.requests * 1e3
+            print(f"{'persistent connection':<32}{per_request:>12.3f}")
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Denylist Benchmark
+
+Builds a Bloom-filter denylist over a large set of banned identifiers, saves
+and maps it back, and reports memory, false positive rate and the cost of a
+membership check for denied and for allowed callers, with and without exact
+confirmation.
+
+Usage:
+    python scripts/benchmarks/bench_denylist.py \\
+        [--entries 10000000] [--error-rate 0.001] [--probes 200000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+
+
+def banned(count: int) -> list:
+    """Generate distinct banned identifiers (IPv4 addresses, then API keys)."""
+    ips = min(count, 1 << 24)
+    entries = [
+        f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}"
+        for index in range(ips)
+    ]
+    entries += [f"sk_live_{index:032x}" for index in range(count - ips)]
+    return entries
+
+
+def per_check(denylist: "main.Denylist", probes: list) -> float:
+    """Return the mean nanoseconds per membership check over the probes."""
+    seconds = min(
+        timeit.repeat(
+            lambda: [probe in denylist for probe in probes], number=1, repeat=3
+        )
+    )
+    return seconds / len(probes) * 1e9
+
+
+def main_benchmark() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=10_000_000)
+    parser.add_argument("--error-rate", type=float, default=0.001)
+    parser.add_argument("--probes", type=int, default=200_000)
+    args = parser.parse_args()
+
+    entries = banned(args.entries)
+    denied = entries[:: max(1, len(entries) // args.probes)][: args.probes]
+    allowed = [f"192.0.2.{index}/{index}" for index in range(args.probes)]
+
+    print(f"entries {len(entries):,}, target error rate {args.error_rate}")
+    print(
+        f"{'mode':<8}{'build s':>9}{'load ms':>9}{'MB':>8}{'bits/id':>9}"
+        f"{'FP rate':>10}{'deny ns':>9}{'allow ns':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "denylist.bloom")
+        for exact in (False, True):
+            start = time.perf_counter()
+            built = main.Denylist.build(entries, args.error_rate, exact)
+            build = time.perf_counter() - start
+            built.save(path)
+            del built
+
+            start = time.perf_counter()
+            denylist = main.Denylist.load(path)
+            load = time.perf_counter() - start
+
+            false_positives = sum(probe in denylist for probe in allowed)
+            print(
+                f"{'exact' if exact else 'bloom':<8}{build:>9.1f}{load * 1000:>9.2f}"
+                f"{denylist.nbytes / 1e6:>8.1f}"
+                f"{denylist.nbytes * 8 / len(entries):>9.1f}"
+                f"{false_positives / len(allowed):>10.5f}"
+                f"{per_check(denylist, denied):>9.0f}"
+                f"{per_check(denylist, allowed):>10.0f}"
+            )
+            del denylist
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Greeting Template Benchmark
+
+Compares the per-greeting formatting cost of the original hard-coded
+f-string with the precompiled locale templates used by GreetingService.
+
+Usage:
+    python scripts/benchmarks/bench_greeting_templates.py [--number 1000000]
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+
+
+def main_benchmark() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=1_000_000, help="Greetings")
+    args = parser.parse_args()
+
+    # Tiny window so the shared limiter never holds more than a few entries
+    main.rate_limiter = main.RateLimiter(window_ms=1, max_requests=1_000_000)
+    config = main.get_default_config()
+    service = main.GreetingService(config)
+    name = "Alice"
+
+    cases = [
+        (
+            "f-string (original)",
+            lambda: f"Hello, {name}! Welcome to {config.app_name}",
+        ),
+        ("template en", lambda: service._template(None) % name),
+        ("template ja", lambda: service._template("ja") % name),
+        ("template es-MX (fallback)", lambda: service._template("es-MX") % name),
+        ("greet() en, end to end", lambda: service.greet(name)),
+        ("greet() ja, end to end", lambda: service.greet(name, "ja")),
+    ]
+
+    print(f"{'case':<30}{'ns/greeting':>12}")
+    for label, func in cases:
+        seconds = min(timeit.repeat(func, number=args.number, repeat=5))
+        print(f"{label:<30}{seconds / args.number * 1e9:>12.1f}")
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Heavy Hitter Tracker Benchmark
+
+Streams growing populations of distinct callers, with a handful of attackers
+mixed in, through a HeavyHitterTracker and compares its memory, per-update
+cost and top-K accuracy against exact per-key counting.
+
+Usage:
+    python scripts/benchmarks/bench_heavy_hitters.py \\
+        [--max-keys 1000000] [--attackers 10] [--top 10]
+"""
+
+import argparse
+import collections
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+
+
+def workload(keys: int, attackers: int, seed: int = 3) -> list:
+    """Build a stream where each attacker sends 1% of all requests."""
+    stream = [
+        f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}"
+        for index in range(keys)
+    ]
+    stream += [
+        f"attacker-{rank}"
+        for rank in range(attackers)
+        for _ in range(keys // 100 * (attackers - rank) // attackers + 1)
+    ]
+    random.Random(seed).shuffle(stream)
+    return stream
+
+
+def traced(func, stream: list) -> tuple:
+    """Run func over the stream, returning (result, bytes held, seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    result = func(stream)
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    func(stream)
+    return result, held, time.perf_counter() - start
+
+
+def sketch(stream: list) -> "main.HeavyHitterTracker":
+    """Count the stream with a HeavyHitterTracker."""
+    tracker = main.HeavyHitterTracker()
+    add = tracker.add
+    for key in stream:
+        add(key)
+    return tracker
+
+
+def exact(stream: list) -> collections.Counter:
+    """Count the stream exactly."""
+    counter = collections.Counter()
+    for key in stream:
+        counter[key] += 1
+    return counter
+
+
+def main_benchmark() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-keys", type=int, default=1_000_000)
+    parser.add_argument("--attackers", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    header = ("sketch MB", "exact MB", "sketch ns", "exact ns", "top-K hit")
+    print(f"{'distinct':>10}" + "".join(f"{column:>12}" for column in header))
+    keys = 10_000
+    while keys <= args.max_keys:
+        stream = workload(keys, args.attackers)
+        tracker, sketch_held, sketch_time = traced(sketch, stream)
+        counter, exact_held, exact_time = traced(exact, stream)
+
+        truth = {key for key, _ in counter.most_common(args.top)}
+        found = {key for key, _ in tracker.top_offenders(args.top)}
+        print(
+            f"{keys:>10,}{sketch_held / 1e6:>12.2f}{exact_held / 1e6:>12.2f}"
+            f"{sketch_time / len(stream) * 1e9:>12.0f}"
+            f"{exact_time / len(stream) * 1e9:>12.0f}"
+            f"{len(truth & found) / len(truth):>12.0%}"
+        )
+        keys *= 10
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Log Format Throughput Benchmark
+
+Logs the GreetingService hot-path message through a stream handler with the
+default text format, the JSON formatter, and the JSON formatter with 1-in-N
+sampling, then reports records/sec and bytes written per mode.
+
+Usage:
+    python scripts/benchmarks/bench_log_formats.py [--records 200000]
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+
+
+class CountingStream:
+    """Write-only stream that counts bytes instead of storing them."""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, data: str) -> int:
+        self.bytes += len(data.encode("utf-8"))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+def run_mode(label: str, options: "main.LoggingOptions", records: int) -> None:
+    """Log records through one configuration and print throughput."""
+    config = main.get_default_config()
+    stream = CountingStream()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(main.build_log_formatter(config, options))
+    if options.sample_rate > 1 or options.rate_cap:
+        handler.addFilter(main.SamplingFilter(options.sample_rate, options.rate_cap))
+
+    logger = logging.getLogger(f"bench.{label}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+
+    start = time.perf_counter()
+    for _ in range(records):
+        logger.info("Generated greeting for: %s", "Alice")
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{label:<20}{records / elapsed:>14,.0f}{stream.bytes:>14,}"
+        f"{stream.bytes / records:>10.1f}"
+    )
+
+
+def main_benchmark() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=200_000, help="Records")
+    parser.add_argument("--sample-rate", type=int, default=100, help="1 in N")
+    args = parser.parse_args()
+
+    modes = [
+        ("text", main.LoggingOptions()),
+        ("json", main.LoggingOptions(log_format="json")),
+        (
+            f"json 1/{args.sample_rate}",
+            main.LoggingOptions(log_format="json", sample_rate=args.sample_rate),
+        ),
+    ]
+    print(f"{'mode':<20}{'records/s':>14}{'bytes':>14}{'B/rec':>10}")
+    for label, options in modes:
+        run_mode(label, options, args.records)
+
+
+if __name__ == "__main__":
+    main_benchmark()
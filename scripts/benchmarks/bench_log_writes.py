@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Log Write Syscall Benchmark
+
+Counts the write() system calls needed to log N records with the standard
+FileHandler and with BufferedRotatingFileHandler at several buffer sizes.
+Syscalls are read from /proc/self/io (Linux); elsewhere the counts are
+reported as n/a and only throughput is shown.
+
+Usage:
+    python scripts/benchmarks/bench_log_writes.py [--records 100000]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+
+
+def write_syscalls() -> Optional[int]:
+    """Return the process-wide write syscall count, if the kernel exposes it."""
+    try:
+        with open("/proc/self/io", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("syscw:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def run_mode(label: str, handler: logging.Handler, records: int) -> None:
+    """Log records through handler and print syscall and throughput stats."""
+    handler.setFormatter(logging.Formatter(main.LOG_FORMAT))
+    logger = logging.getLogger(f"bench.{label}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+
+    before = write_syscalls()
+    start = time.perf_counter()
+    for _ in range(records):
+        logger.info("Generated greeting for: %s", "Alice")
+    handler.close()
+    elapsed = time.perf_counter() - start
+    after = write_syscalls()
+
+    if before is None or after is None:
+        syscalls = "n/a"
+    else:
+        syscalls = f"{after - before:,}"
+    print(f"{label:<26}{syscalls:>12}{records / elapsed:>14,.0f}")
+
+
+def main_benchmark() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=100_000, help="Records")
+    args = parser.parse_args()
+
+    print(f"{'handler':<26}{'write()s':>12}{'records/s':>14}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        run_mode(
+            "FileHandler",
+            logging.FileHandler(os.path.join(tmpdir, "plain.log")),
+            args.records,
+        )
+        for size in ("0", "4k", "64k", "1m"):
+            run_mode(
+                f"buffered {size}, rotate 10m",
+                main.BufferedRotatingFileHandler(
+                    os.path.join(tmpdir, f"buffered-{size}.log"),
+                    max_bytes=main.parse_size("10m"),
+                    buffer_size=main.parse_size(size),
+                    flush_interval=60,
+                ),
+                args.records,
+            )
+
+
+if __name__ == "__main__":
+    main_benchmark()
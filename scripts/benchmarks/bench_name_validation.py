@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Name Validation Benchmark
+
+Compares validate_name (single precompiled fast-path check) with the full
+seven-stage validation pipeline for clean and for messy names.
+
+Usage:
+    python scripts/benchmarks/bench_name_validation.py [--number 300000]
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+
+NAMES = {
+    "clean short": "Alice",
+    "clean long": "Mary-Jane O'Connor Smith",
+    "needs strip": "  Alice  ",
+    "html": "<b>Alice</b>",
+}
+
+
+def main_benchmark() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=300_000, help="Calls")
+    args = parser.parse_args()
+
+    print(f"{'name':<16}{'full ns':>10}{'fast ns':>10}{'speedup':>10}")
+    for label, name in NAMES.items():
+        timings = []
+        for validator in (main._validate_name_full, main.validate_name):
+            seconds = min(
+                timeit.repeat(lambda: validator(name), number=args.number, repeat=5)
+            )
+            timings.append(seconds / args.number * 1e9)
+        full, fast = timings
+        print(f"{label:<16}{full:>10.0f}{fast:>10.0f}{full / fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main_benchmark()
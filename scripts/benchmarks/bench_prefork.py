@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Pre-fork Scaling Benchmark
+
+Starts ``main.py serve`` with increasing worker counts and drives GET /greet
+from several keep-alive client processes, reporting throughput and the
+speedup over one worker. Scaling is bounded by the machine's cores, which
+the clients share with the server.
+
+Usage:
+    python scripts/benchmarks/bench_prefork.py \\
+        [--workers 1,2,4] [--clients 8] [--duration 5] [--shared-socket]
+"""
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[2] / "src"
+
+
+def free_port() -> int:
+    """Get a port nothing is listening on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(port: int, timeout: float = 30.0) -> None:
+    """Block until the server answers /healthz."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/healthz")
+            if connection.getresponse().status == 200:
+                connection.close()
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def client(port: int, duration: float, results: "multiprocessing.Queue") -> None:
+    """Send greetings over one keep-alive connection for duration seconds."""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    count = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        connection.request("GET", "/greet?name=Mary-Jane%20O%27Connor&locale=ja")
+        response = connection.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"Unexpected status {response.status}")
+        count += 1
+    connection.close()
+    results.put(count)
+
+
+def measure(workers: int, args: argparse.Namespace) -> float:
+    """Run one server configuration; return requests per second."""
+    port = free_port()
+    command = [sys.executable, str(SRC / "main.py"), "serve", "--port", str(port)]
+    command += ["--workers", str(workers), "--window-ms", "1"]
+    command += ["--max-requests", "1000000000"]
+    if args.shared_socket:
+        command.append("--shared-socket")
+    server = subprocess.Popen(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_server(port)
+        results: multiprocessing.Queue = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=client, args=(port, args.duration, results))
+            for _ in range(args.clients)
+        ]
+        for process in clients:
+            process.start()
+        total = sum(results.get() for _ in clients)
+        for process in clients:
+            process.join()
+        return total / args.duration
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+
+def main_benchmark() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, cores})
+    parser.add_argument(
+        "--workers",
+        default=",".join(map(str, default_workers)),
+        help="Comma-separated worker counts",
+    )
+    parser.add_argument("--clients", type=int, default=max(4, 2 * cores))
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds")
+    parser.add_argument("--shared-socket", action="store_true")
+    args = parser.parse_args()
+
+    mode = "shared socket" if args.shared_socket else "SO_REUSEPORT"
+    print(f"{cores} CPUs, {args.clients} clients, {mode}")
+    print(f"{'workers':<10}{'req/s':>12}{'speedup':>10}")
+    baseline = None
+    for workers in map(int, args.workers.split(",")):
+        rate = measure(workers, args)
+        baseline = baseline or rate
+        print(f"{workers:<10}{rate:>12,.0f}{rate / baseline:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter Key Scaling Benchmark
+
+Feeds RateLimiter.is_allowed with a large population of distinct callers and
+reports the memory held per tracked identifier and the cost of a lookup, for
+short identifiers (IPv4 addresses) and long ones (API keys, which are stored
+as digests).
+
+Usage:
+    python scripts/benchmarks/bench_rate_limiter_keys.py [--keys 1000000]
+"""
+
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+
+
+def ipv4_keys(count: int) -> list:
+    """Generate distinct IPv4-style identifiers."""
+    return [
+        f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}"
+        for index in range(count)
+    ]
+
+
+def api_keys(count: int) -> list:
+    """Generate distinct 72-character API-key-style identifiers."""
+    return [f"sk_live_{index:064x}" for index in range(count)]
+
+
+def measure(label: str, identifiers: list) -> None:
+    """Insert every identifier, then time repeated lookups."""
+    limiter = main.RateLimiter()
+    gc.collect()
+    tracemalloc.start()
+    for identifier in identifiers:
+        limiter.is_allowed(identifier)
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sample = random.Random(7).choices(identifiers, k=min(len(identifiers), 500_000))
+    start = time.perf_counter()
+    for identifier in sample:
+        limiter.is_allowed(identifier)
+    elapsed = time.perf_counter() - start
+
+    raw = sum(sys.getsizeof(identifier) for identifier in identifiers)
+    print(
+        f"{label:<10}{len(limiter.requests):>12,}{held / len(identifiers):>12.0f}"
+        f"{raw / len(identifiers):>12.0f}{elapsed / len(sample) * 1e9:>12.0f}"
+    )
+
+
+def main_benchmark() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--keys", type=int, default=1_000_000, help="Callers")
+    args = parser.parse_args()
+
+    header = ("tracked", "B/key", "raw B/id", "ns/lookup")
+    print(f"{'keys':<10}" + "".join(f"{column:>12}" for column in header))
+    measure("ipv4", ipv4_keys(args.keys))
+    measure("api key", api_keys(args.keys))
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter Snapshot Benchmark
+
+Fills a RateLimiter with a large population of callers, then times writing
+its binary snapshot and restoring it into a fresh limiter, and reports the
+snapshot size per identifier.
+
+Usage:
+    python scripts/benchmarks/bench_rate_limiter_snapshot.py \\
+        [--keys 1000000] [--requests-per-key 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+
+
+def main_benchmark() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--keys", type=int, default=1_000_000, help="Callers")
+    parser.add_argument("--requests-per-key", type=int, default=3)
+    args = parser.parse_args()
+
+    limiter = main.RateLimiter()
+    now = limiter.clock()
+    stamps = [now - 10**9 * offset for offset in range(args.requests_per_key, 0, -1)]
+    for index in range(args.keys):
+        key = f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}"
+        limiter.requests[main.compact_key(key)] = list(stamps)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "limiter.snapshot")
+
+        start = time.perf_counter()
+        written = limiter.snapshot(path)
+        save = time.perf_counter() - start
+        size = os.path.getsize(path)
+
+        restored = main.RateLimiter()
+        start = time.perf_counter()
+        loaded = restored.restore(path)
+        load = time.perf_counter() - start
+
+    print(f"identifiers        {written:,} written, {loaded:,} restored")
+    print(f"timestamps         {written * args.requests_per_key:,}")
+    print(f"snapshot size      {size / 1e6:,.1f} MB ({size / written:,.1f} B/id)")
+    print(f"snapshot time      {save * 1000:,.0f} ms")
+    print(f"restore time       {load * 1000:,.0f} ms")
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Settings Lookup Benchmark
+
+Compares the cost of reading values from the frozen Settings tree built by
+load_settings against plain nested dictionary access on the parsed JSON.
+
+Usage:
+    python scripts/benchmarks/bench_settings_lookup.py [--number 1000000]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+
+
+def main_benchmark() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=1_000_000, help="Lookups")
+    args = parser.parse_args()
+
+    with open(main.DEFAULT_SETTINGS_PATH, encoding="utf-8") as handle:
+        raw = json.load(handle)
+    settings = main.load_settings()
+
+    cases = {
+        "nested dict raw['database']['port']": lambda: raw["database"]["port"],
+        "dotted settings.get('database.port')": lambda: settings.get("database.port"),
+        "dotted settings['database.port']": lambda: settings["database.port"],
+        "attribute settings.database.port": lambda: settings.database.port,
+        "load_settings() (cached)": main.load_settings,
+    }
+
+    print(f"{'lookup':<40}{'ns/op':>10}")
+    for label, func in cases.items():
+        seconds = min(timeit.repeat(func, number=args.number, repeat=5))
+        print(f"{label:<40}{seconds / args.number * 1e9:>10.1f}")
+
+
+if __name__ == "__main__":
+    main_benchmark()
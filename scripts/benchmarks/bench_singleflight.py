@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Singleflight Hot-Key Benchmark
+
+Sends bursts of concurrent greetings for one hot name through threads and
+through asyncio tasks, with and without a SingleFlight, and reports the
+process CPU time, the greetings actually generated, and CPU per greeting.
+Greeting logs go to a real file, as in production.
+
+Usage:
+    python scripts/benchmarks/bench_singleflight.py \\
+        [--bursts 200] [--concurrency 32]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+
+
+def build_service(log_path: str, coalesce: bool) -> "main.GreetingService":
+    """Build a service logging to a file, optionally with a SingleFlight."""
+    service = main.GreetingService(
+        main.get_default_config(),
+        limiter=main.RateLimiter(window_ms=1, max_requests=1_000_000),
+        singleflight=main.SingleFlight() if coalesce else None,
+    )
+    handler = logging.FileHandler(log_path)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    service.logger = logging.getLogger(f"bench.{coalesce}")
+    service.logger.handlers = [handler]
+    service.logger.setLevel(logging.INFO)
+    service.logger.propagate = False
+    return service
+
+
+def thread_bursts(service, bursts: int, concurrency: int) -> int:
+    """Release every thread at once per burst; return greetings served."""
+    barrier = threading.Barrier(concurrency)
+
+    def worker():
+        for _ in range(bursts):
+            barrier.wait()
+            service.greet("Mary-Jane O'Connor", "ja")
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return bursts * concurrency
+
+
+def async_bursts(service, bursts: int, concurrency: int) -> int:
+    """Gather a burst of identical greet_async calls; return greetings served."""
+
+    async def run():
+        for _ in range(bursts):
+            await asyncio.gather(
+                *(
+                    service.greet_async("Mary-Jane O'Connor", "ja")
+                    for _ in range(concurrency)
+                )
+            )
+
+    asyncio.run(run())
+    return bursts * concurrency
+
+
+def main_benchmark() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bursts", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    header = ("cpu ms", "generated", "us/greeting")
+    print(f"{'case':<26}" + "".join(f"{column:>13}" for column in header))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for label, run in (("threads", thread_bursts), ("asyncio", async_bursts)):
+            for coalesce in (False, True):
+                service = build_service(f"{temp_dir}/{label}.log", coalesce)
+                start = time.process_time()
+                served = run(service, args.bursts, args.concurrency)
+                cpu = time.process_time() - start
+                flight = service.singleflight
+                generated = flight.executions if flight else served
+                case = f"{label}, {'singleflight' if coalesce else 'plain'}"
+                print(
+                    f"{case:<26}{cpu * 1e3:>13.0f}{generated:>13,}"
+                    f"{cpu / served * 1e6:>13.1f}"
+                )
+                service.logger.handlers[0].close()
+
+
+if __name__ == "__main__":
+    main_benchmark()
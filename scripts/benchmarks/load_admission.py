@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Admission Control Overload Test
+
+Offers open-loop Poisson traffic at a multiple of the service's capacity
+(2x by default) and compares an unbounded work queue with an
+AdmissionController under its CoDel and max-wait policies. Each request is a
+real greet call plus a simulated downstream wait, so capacity is
+workers / service time. Reports served latency percentiles and shed rate.
+
+Usage:
+    python scripts/benchmarks/load_admission.py \\
+        [--overload 2.0] [--duration 5] [--workers 4] [--service-ms 2]
+"""
+
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+from admission import ADMISSION_POLICIES, AdmissionController  # noqa: E402
+from errors import OverloadedError  # noqa: E402
+
+
+def offer_load(submit, rate: float, duration: float) -> tuple:
+    """Submit requests at Poisson arrivals; return latencies and shed count."""
+    rng = random.Random(7)
+    latencies: list = []
+    futures = []
+    shed = 0
+    start = next_arrival = time.perf_counter()
+    while next_arrival - start < duration:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        submitted = time.perf_counter()
+        try:
+            future = submit()
+        except OverloadedError:
+            shed += 1
+        else:
+            future.add_done_callback(
+                lambda done, submitted=submitted: done.exception()
+                or latencies.append(time.perf_counter() - submitted)
+            )
+            futures.append(future)
+        next_arrival += rng.expovariate(rate)
+    for future in futures:
+        if isinstance(future.exception(), OverloadedError):
+            shed += 1
+    return latencies, shed
+
+
+def main_benchmark() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--overload", type=float, default=2.0)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--service-ms", type=float, default=2.0)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--target-ms", type=float, default=5.0)
+    parser.add_argument("--interval-ms", type=float, default=100.0)
+    parser.add_argument("--max-wait-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    service = main.GreetingService(
+        main.get_default_config(),
+        limiter=main.RateLimiter(window_ms=1, max_requests=1_000_000),
+    )
+    service.logger.disabled = True
+    service_s = args.service_ms / 1000
+
+    def handle(name: str) -> str:
+        greeting = service.greet(name)
+        time.sleep(service_s)
+        return greeting
+
+    capacity = args.workers / service_s
+    rate = capacity * args.overload
+    print(f"capacity {capacity:,.0f}/s, offered {rate:,.0f}/s for {args.duration}s")
+    header = ("served", "shed", "p50 ms", "p99 ms", "max ms")
+    print(f"{'queue':<12}" + "".join(f"{column:>10}" for column in header))
+
+    for mode in ("unbounded",) + ADMISSION_POLICIES:
+        if mode == "unbounded":
+            pool = ThreadPoolExecutor(args.workers)
+            submit = lambda: pool.submit(handle, "Alice")  # noqa: E731
+            close = pool.shutdown
+        else:
+            controller = AdmissionController(
+                handle,
+                workers=args.workers,
+                max_queue=args.max_queue,
+                policy=mode,
+                target_ms=args.target_ms,
+                interval_ms=args.interval_ms,
+                max_wait_ms=args.max_wait_ms,
+            )
+            submit = lambda: controller.submit("Alice")  # noqa: E731
+            close = controller.close
+        latencies, shed = offer_load(submit, rate, args.duration)
+        close()
+        latencies.sort()
+        offered = len(latencies) + shed
+        p50, p99 = (
+            latencies[min(len(latencies) - 1, int(len(latencies) * share))] * 1e3
+            for share in (0.5, 0.99)
+        )
+        print(
+            f"{mode:<12}{len(latencies):>10,}{shed / offered:>10.1%}"
+            f"{p50:>10.1f}{p99:>10.1f}{latencies[-1] * 1e3:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Adaptive Concurrency Simulation
+
+Drives an AdaptiveConcurrencyLimiter with a synthetic service whose latency
+grows once more requests run at once than it has workers, and prints how the
+limit converges, including after the service loses and regains capacity.
+Runs in simulated time, so no real requests are made.
+
+Usage:
+    python scripts/benchmarks/sim_adaptive_concurrency.py \\
+        [--rounds 3000] [--offered 200] [--capacity 32] [--target-p95 50]
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+
+SERVICE_MS = 20.0
+
+
+def latency(rng: random.Random, concurrent: int, capacity: int) -> float:
+    """Latency of one request when `concurrent` share `capacity` workers."""
+    return SERVICE_MS * max(1.0, concurrent / capacity) * rng.lognormvariate(0, 0.25)
+
+
+def run_round(limiter, rng: random.Random, offered: int, capacity: int) -> tuple:
+    """Offer one round of concurrent requests; return (accepted, latencies)."""
+    accepted = sum(limiter.try_acquire() for _ in range(offered))
+    latencies = [latency(rng, accepted, capacity) for _ in range(accepted)]
+    for value in latencies:
+        limiter.release(value)
+    return accepted, latencies
+
+
+def p95(values: list) -> float:
+    """95th percentile of the values."""
+    ordered = sorted(values)
+    return ordered[int(len(ordered) * 0.95)] if ordered else 0.0
+
+
+def main_benchmark() -> None:
+    """Run the simulation and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=3000)
+    parser.add_argument("--offered", type=int, default=200, help="Requests/round")
+    parser.add_argument("--capacity", type=int, default=32, help="Workers")
+    parser.add_argument("--target-p95", type=float, default=50.0, help="ms")
+    parser.add_argument("--static-limit", type=int, default=100)
+    args = parser.parse_args()
+
+    def capacity_at(round_index: int) -> int:
+        # Lose half the workers for the middle third of the run
+        if args.rounds // 3 <= round_index < 2 * args.rounds // 3:
+            return max(1, args.capacity // 2)
+        return args.capacity
+
+    adaptive = main.AdaptiveConcurrencyLimiter(
+        target_p95_ms=args.target_p95, initial_limit=1, sample_size=50
+    )
+    rng = random.Random(5)
+    report_every = max(1, args.rounds // 15)
+    window: list = []
+    admitted = 0
+
+    print(f"{'round':>7}{'workers':>9}{'limit':>7}{'admitted':>10}{'p95 ms':>9}")
+    for index in range(args.rounds):
+        accepted, latencies = run_round(adaptive, rng, args.offered, capacity_at(index))
+        window.extend(latencies)
+        admitted += accepted
+        if (index + 1) % report_every == 0:
+            print(
+                f"{index + 1:>7}{capacity_at(index):>9}{adaptive.limit:>7}"
+                f"{admitted / report_every:>10.1f}{p95(window):>9.1f}"
+            )
+            window, admitted = [], 0
+
+    # The same load against a fixed limit, for comparison
+    static = main.AdaptiveConcurrencyLimiter(
+        initial_limit=args.static_limit,
+        min_limit=args.static_limit,
+        max_limit=args.static_limit,
+    )
+    static_latencies = []
+    for index in range(args.rounds):
+        static_latencies += run_round(static, rng, args.offered, capacity_at(index))[1]
+    print(f"\nadaptive metrics      {adaptive.metrics()}")
+    print(
+        f"static limit {args.static_limit:<8} p95 {p95(static_latencies):.1f} ms "
+        f"(target {args.target_p95:.0f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main_benchmark()
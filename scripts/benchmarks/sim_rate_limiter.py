@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter Virtual-Time Simulator
+
+Replays a day of request arrivals through a RateLimiter driven by a
+VirtualClock, so hours of traffic run in seconds, and prints hourly and
+overall allow/deny statistics. Arrivals are synthetic (a diurnal pattern over
+a large client population with a heavy-tailed request count per client, plus
+a few abusive clients) or read from an NDJSON trace of {"ts", "caller"}
+records, with ts in seconds.
+
+Usage:
+    python scripts/benchmarks/sim_rate_limiter.py \\
+        [--clients 1000000] [--abusers 20] [--window-ms 900000] [--max 100]
+    python scripts/benchmarks/sim_rate_limiter.py --trace requests.ndjson
+"""
+
+import argparse
+import collections
+import json
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+
+DAY_MS = 86_400_000
+HOUR_MS = 3_600_000
+
+
+def synthetic(args: argparse.Namespace) -> tuple:
+    """Generate (callers, events) for one synthetic day."""
+    rng = random.Random(args.seed)
+    callers = [
+        f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}"
+        for index in range(args.clients)
+    ]
+    callers += [f"abuser-{index}" for index in range(args.abusers)]
+    bits = len(callers).bit_length()
+
+    # Traffic peaks mid-afternoon and bottoms out before dawn
+    weights = [1.2 + math.sin((hour - 9) / 24 * 2 * math.pi) for hour in range(24)]
+    per_client = [
+        min(int(rng.paretovariate(args.tail)), 5000) for _ in range(args.clients)
+    ]
+    total = sum(per_client)
+    hours = iter(rng.choices(range(24), weights=weights, k=total))
+    events = []
+    for client, count in enumerate(per_client):
+        for _ in range(count):
+            offset = next(hours) * HOUR_MS + rng.randrange(HOUR_MS)
+            events.append(offset << bits | client)
+
+    # Abusers send one request every abuser_interval seconds all day
+    step = args.abuser_interval * 1000
+    for client in range(args.clients, len(callers)):
+        start = rng.randrange(step)
+        events.extend(offset << bits | client for offset in range(start, DAY_MS, step))
+    events.sort()
+    return callers, events, bits
+
+
+def recorded(path: str) -> tuple:
+    """Load (callers, events) from an NDJSON trace."""
+    index: dict = {}
+    arrivals = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                record = json.loads(line)
+                client = index.setdefault(record["caller"], len(index))
+                arrivals.append((int(record["ts"] * 1000), client))
+    bits = max(1, len(index).bit_length())
+    first = min((ts for ts, _ in arrivals), default=0)
+    events = sorted((ts - first) << bits | client for ts, client in arrivals)
+    return list(index), events, bits
+
+
+def main_benchmark() -> None:
+    """Run the simulation and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trace", help="NDJSON trace to replay instead")
+    parser.add_argument("--clients", type=int, default=1_000_000)
+    parser.add_argument("--abusers", type=int, default=20)
+    parser.add_argument("--abuser-interval", type=int, default=5, help="Seconds")
+    parser.add_argument("--tail", type=float, default=1.6, help="Pareto shape")
+    parser.add_argument("--window-ms", type=int, default=900_000)
+    parser.add_argument("--max", type=int, default=100, help="Requests per window")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    callers, events, bits = recorded(args.trace) if args.trace else synthetic(args)
+    generated = time.perf_counter() - start
+
+    clock = main.VirtualClock()
+    limiter = main.RateLimiter(args.window_ms, args.max, clock=clock)
+    is_allowed = limiter.is_allowed
+    mask = (1 << bits) - 1
+    hourly = collections.defaultdict(lambda: [0, 0, 0])
+    denied_clients = set()
+
+    start = time.perf_counter()
+    for event in events:
+        offset_ms = event >> bits
+        clock.set(offset_ms * main.NS_PER_MS)
+        stats = hourly[offset_ms // HOUR_MS]
+        if is_allowed(callers[event & mask]):
+            stats[0] += 1
+        else:
+            stats[1] += 1
+            denied_clients.add(event & mask)
+        stats[2] = max(stats[2], len(limiter.requests))
+    simulated = time.perf_counter() - start
+
+    print(f"{'hour':>5}{'allowed':>12}{'denied':>10}{'denied %':>10}{'tracked':>10}")
+    for hour in sorted(hourly):
+        allowed, denied, tracked = hourly[hour]
+        share = denied / (allowed + denied) if allowed + denied else 0.0
+        print(f"{hour:>5}{allowed:>12,}{denied:>10,}{share:>10.2%}{tracked:>10,}")
+
+    allowed = sum(stats[0] for stats in hourly.values())
+    denied = sum(stats[1] for stats in hourly.values())
+    span_s = (events[-1] >> bits) / 1000 if events else 0.0
+    print(f"\nclients            {len(callers):,}")
+    print(f"requests           {len(events):,} ({generated:.1f} s to prepare)")
+    print(f"allowed / denied   {allowed:,} / {denied:,}")
+    print(f"clients denied     {len(denied_clients):,}")
+    print(
+        f"simulated          {span_s / 3600:.1f} h in {simulated:.1f} s "
+        f"({span_s / max(simulated, 1e-9):,.0f}x real time, "
+        f"{simulated / max(len(events), 1) * 1e9:,.0f} ns/request)"
+    )
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Concurrency Stress and Scaling Harness
+
+Runs 1 to 64 workers against one shared GreetingService (threads) or one
+service per worker (processes) and records throughput and p50/p99/p999
+latency per worker count. Every run is also checked for correctness: no
+caller may be admitted more than max_requests times by the rate limiter,
+and every successful greeting's log record must reach the log handler
+(or be counted as dropped by the queue handler). Results are printed as a
+scaling table and written as JSON.
+
+Usage:
+    python scripts/benchmarks/stress_concurrency.py \\
+        [--workers 1,2,4,8,16,32,64] [--mode thread|process|both] \\
+        [--requests 20000] [--json stress_results.json]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import main  # noqa: E402
+from histogram import LatencyHistogram  # noqa: E402
+
+CALLERS = [f"10.0.0.{index}" for index in range(64)]
+
+
+class CountingHandler(logging.Handler):
+    """Handler that only counts the records it receives."""
+
+    def __init__(self):
+        super().__init__()
+        self.received = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.received += 1
+
+
+def caller_limit(args: argparse.Namespace, requests: int) -> int:
+    """Per-caller limit that admits the --admit share of shared-caller traffic."""
+    return max(1, int(requests * 7 / 8 / len(CALLERS) * args.admit))
+
+
+def build_service(args: argparse.Namespace, limit: int) -> tuple:
+    """Build a service whose greeting logs go through an async queue."""
+    service = main.GreetingService(
+        main.get_default_config(),
+        limiter=main.RateLimiter(window_ms=3_600_000, max_requests=limit),
+        denylist=main.DenylistGuard(),
+    )
+    counter = CountingHandler()
+    queue_handler = main.BoundedQueueHandler(queue.Queue(args.queue_size), args.policy)
+    listener = main.QueueLogListener(queue_handler.queue, counter)
+    logger = logging.getLogger(f"stress.{id(service)}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(queue_handler)
+    service.logger = logger
+    listener.start()
+    return service, queue_handler, listener, counter
+
+
+def hammer(service, requests: int, offset: int, barrier) -> tuple:
+    """Greet as fast as possible; return latencies, admissions and errors."""
+    latency = LatencyHistogram()
+    admitted: Counter = Counter()
+    successes = 0
+    errors: Counter = Counter()
+    greet = service.greet
+    perf_counter_ns = time.perf_counter_ns
+    callers = CALLERS
+    barrier.wait()
+    for index in range(offset, offset + requests):
+        # Every eighth caller is new, so limiter inserts and sweeps race too
+        caller = f"new-{index}" if index % 8 == 0 else callers[index % len(callers)]
+        start = perf_counter_ns()
+        try:
+            greet("Alice", caller=caller)
+            admitted[caller] += 1
+            successes += 1
+        except Exception as e:  # Any failure other than a rejection is a bug
+            if not isinstance(e, main.RateLimitedError):
+                errors[f"{type(e).__name__}: {e}"] += 1
+        latency.record(perf_counter_ns() - start)
+    return latency, admitted, successes, errors
+
+
+def finish(results: list, queue_handler, listener, counter, limit: int) -> dict:
+    """Merge worker results and check them against the limiter and log."""
+    listener.stop()
+    latency = LatencyHistogram()
+    admitted: Counter = Counter()
+    successes = 0
+    errors: Counter = Counter()
+    for worker_latency, worker_admitted, worker_successes, worker_errors in results:
+        latency.merge(worker_latency)
+        admitted.update(worker_admitted)
+        successes += worker_successes
+        errors.update(worker_errors)
+    return {
+        "latency": latency,
+        "limit": limit,
+        "successes": successes,
+        "errors": dict(errors),
+        "over_admitted": sum(max(0, count - limit) for count in admitted.values()),
+        "logs_lost": successes - counter.received - queue_handler.dropped,
+        "logs_dropped": queue_handler.dropped,
+    }
+
+
+def run_threads(args: argparse.Namespace, workers: int) -> tuple:
+    """Run workers as threads sharing one service."""
+    limit = caller_limit(args, workers * args.requests)
+    service, queue_handler, listener, counter = build_service(args, limit)
+    barrier = threading.Barrier(workers + 1)
+    results: list = []
+    threads = [
+        threading.Thread(
+            target=lambda offset: results.append(
+                hammer(service, args.requests, offset, barrier)
+            ),
+            args=(index * args.requests,),
+        )
+        for index in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return elapsed, finish(results, queue_handler, listener, counter, limit)
+
+
+def process_worker(args: argparse.Namespace, offset: int, barrier, outbox) -> None:
+    """Process target: run one worker against a private service."""
+    limit = caller_limit(args, args.requests)
+    service, queue_handler, listener, counter = build_service(args, limit)
+    result = hammer(service, args.requests, offset, barrier)
+    outbox.put(finish([result], queue_handler, listener, counter, limit))
+
+
+def run_processes(args: argparse.Namespace, workers: int) -> tuple:
+    """Run workers as processes, each with its own service and limiter."""
+    barrier = multiprocessing.Barrier(workers + 1)
+    outbox = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=process_worker, args=(args, index * args.requests, barrier, outbox)
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    barrier.wait()
+    start = time.perf_counter()
+    parts = [outbox.get() for _ in processes]
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+
+    merged = parts[0]
+    for part in parts[1:]:
+        merged["latency"].merge(part["latency"])
+        for key in ("successes", "over_admitted", "logs_lost", "logs_dropped"):
+            merged[key] += part[key]
+        merged["errors"] = dict(Counter(merged["errors"]) + Counter(part["errors"]))
+    return elapsed, merged
+
+
+def main_benchmark() -> None:
+    """Run the harness and write the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", default="1,2,4,8,16,32,64")
+    parser.add_argument("--mode", choices=("thread", "process", "both"), default="both")
+    parser.add_argument("--requests", type=int, default=20_000, help="Per worker")
+    parser.add_argument(
+        "--admit", type=float, default=0.5, help="Share of requests to admit"
+    )
+    parser.add_argument("--queue-size", type=int, default=10_000)
+    parser.add_argument("--policy", choices=main.LOG_QUEUE_POLICIES, default="block")
+    parser.add_argument(
+        "--switch-interval",
+        type=float,
+        default=1e-5,
+        help="sys.setswitchinterval seconds; small values provoke races",
+    )
+    parser.add_argument("--json", default="stress_results.json", help="Output file")
+    args = parser.parse_args()
+    sys.setswitchinterval(args.switch_interval)
+
+    modes = ("thread", "process") if args.mode == "both" else (args.mode,)
+    runners = {"thread": run_threads, "process": run_processes}
+    rows = []
+    print(
+        f"{'mode':<9}{'workers':>8}{'req/s':>12}{'p50 us':>9}{'p99 us':>9}"
+        f"{'p999 us':>9}{'over':>7}{'lost':>7}{'dropped':>9}"
+    )
+    for mode in modes:
+        for workers in map(int, args.workers.split(",")):
+            elapsed, result = runners[mode](args, workers)
+            latency = result.pop("latency")
+            row = {
+                "mode": mode,
+                "workers": workers,
+                "requests": workers * args.requests,
+                "elapsed_s": round(elapsed, 4),
+                "throughput_rps": round(workers * args.requests / elapsed, 1),
+                **{
+                    name: round(latency.percentile(percent) / 1000, 2)
+                    for name, percent in (("p50_us", 50), ("p99_us", 99))
+                },
+                "p999_us": round(latency.percentile(99.9) / 1000, 2),
+                **result,
+            }
+            rows.append(row)
+            print(
+                f"{mode:<9}{workers:>8}{row['throughput_rps']:>12,.0f}"
+                f"{row['p50_us']:>9.1f}{row['p99_us']:>9.1f}{row['p999_us']:>9.1f}"
+                f"{row['over_admitted']:>7}{row['logs_lost']:>7}"
+                f"{row['logs_dropped']:>9}"
+            )
+
+    violations = [
+        row for row in rows if row["over_admitted"] or row["logs_lost"] or row["errors"]
+    ]
+    with open(args.json, "w", encoding="utf-8") as handle:
+        json.dump({"runs": rows, "violations": len(violations)}, handle, indent=2)
+    print(f"\nwrote {args.json}: {len(violations)} run(s) with violations")
+    if violations:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_benchmark()
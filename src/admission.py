@@ -0,0 +1,207 @@
+"""
+Admission control: a bounded work queue that sheds load instead of queueing
+without bound, used by the daemon and by each HTTP worker.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+from errors import OverloadedError
+from histogram import LatencyHistogram
+
+# Queue policies an AdmissionController can shed by
+ADMISSION_POLICIES = ("codel", "max-wait")
+
+OVERLOAD_MESSAGE = "Server overloaded. Please try again later."
+
+
+class AdmissionController:
+    """
+    Bounded work queue with load shedding, in front of a request handler.
+
+    Requests are queued for a fixed pool of worker threads. When the queue
+    is full, submit raises OverloadedError at once. Otherwise each request's
+    queueing delay is checked as a worker picks it up, and requests that
+    waited too long are shed without calling the handler, so shed requests
+    cost no validation or rate limiter work.
+
+    With the "max-wait" policy a request is shed once it has waited longer
+    than max_wait_ms. With "codel" (controlled delay) the queue counts as
+    overloaded while the smallest delay seen in an interval stays above
+    target_ms; requests then get only target_ms of queueing before being
+    shed, and interval_ms otherwise. A brief burst drains normally, while a
+    standing queue is cut back to target_ms.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[..., Any],
+        workers: int = 4,
+        max_queue: int = 64,
+        policy: str = "codel",
+        target_ms: float = 5.0,
+        interval_ms: float = 100.0,
+        max_wait_ms: float = 100.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the controller and start its workers.
+
+        Args:
+            handler: Callable serving one request, e.g. GreetingService.greet
+            workers: Worker threads calling handler
+            max_queue: Requests that may wait for a worker
+            policy: One of ADMISSION_POLICIES
+            target_ms: CoDel target queueing delay
+            interval_ms: CoDel interval, and the longest wait when not
+                overloaded
+            max_wait_ms: Longest wait under the "max-wait" policy
+            clock: Callable returning the current time in seconds
+
+        Raises:
+            ValueError: If a size or delay is not positive or the policy is
+                unknown
+        """
+        if workers < 1 or max_queue < 1:
+            raise ValueError("workers and max_queue must be at least 1")
+        if min(target_ms, interval_ms, max_wait_ms) <= 0:
+            raise ValueError("Delays must be positive")
+        if policy not in ADMISSION_POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(ADMISSION_POLICIES)}")
+        self.handler = handler
+        self.max_queue = max_queue
+        self.policy = policy
+        self.target = target_ms / 1000
+        self.interval = interval_ms / 1000
+        self.max_wait = max_wait_ms / 1000
+        self.clock = clock
+        self.admitted = 0
+        self.completed = 0
+        self.shed_queue_full = 0
+        self.shed_delay = 0
+        self.in_flight = 0
+        self.overloaded = False
+        self.queue_delay = LatencyHistogram()
+        self._min_delay = math.inf
+        self._interval_end = clock() + self.interval
+        self._queue: deque = deque()
+        self._closed = False
+        self._ready = threading.Condition()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"admission-{index}", daemon=True)
+            for index in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, *args: Any, **kwargs: Any) -> Future:
+        """
+        Queue a request for the handler.
+
+        Args:
+            *args: Positional arguments for the handler
+            **kwargs: Keyword arguments for the handler
+
+        Returns:
+            Future resolved with the handler's result, or with
+            OverloadedError if the request is shed while queued
+
+        Raises:
+            OverloadedError: If the queue is full or the controller is closed
+        """
+        future: Future = Future()
+        with self._ready:
+            if self._closed or len(self._queue) >= self.max_queue:
+                self.shed_queue_full += 1
+                raise OverloadedError(OVERLOAD_MESSAGE)
+            self._queue.append((future, args, kwargs, self.clock()))
+            self.admitted += 1
+            self._ready.notify()
+        return future
+
+    def call(self, *args: Any, **kwargs: Any) -> Any:
+        """Submit a request and wait for its result."""
+        return self.submit(*args, **kwargs).result()
+
+    def _should_shed(self, delay: float, now: float) -> bool:
+        """Apply the shedding policy to a request's queueing delay."""
+        if self.policy == "max-wait":
+            return delay > self.max_wait
+        if now >= self._interval_end:
+            self.overloaded = self._min_delay > self.target
+            self._min_delay = math.inf
+            self._interval_end = now + self.interval
+        if delay < self._min_delay:
+            self._min_delay = delay
+        return delay > (self.target if self.overloaded else self.interval)
+
+    def _work(self) -> None:
+        """Worker loop: take requests, shed or serve them."""
+        ready = self._ready
+        while True:
+            with ready:
+                while not self._queue and not self._closed:
+                    ready.wait()
+                if not self._queue:
+                    return
+                future, args, kwargs, enqueued = self._queue.popleft()
+                now = self.clock()
+                delay = now - enqueued
+                self.queue_delay.record(int(delay * 1e9))
+                shed = self._should_shed(delay, now)
+                if shed:
+                    self.shed_delay += 1
+                else:
+                    self.in_flight += 1
+
+            if shed:
+                # A caller may have cancelled the queued future meanwhile
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(OverloadedError(OVERLOAD_MESSAGE))
+                continue
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(self.handler(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with ready:
+                    self.in_flight -= 1
+                    self.completed += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get the controller's current state.
+
+        Returns:
+            dict: Worker and queue sizes, requests in flight, admission and
+            shed counts, and queueing delay percentiles
+        """
+        with self._ready:
+            return {
+                "policy": self.policy,
+                "workers": len(self._workers),
+                "queue_depth": len(self._queue),
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "admitted": self.admitted,
+                "completed": self.completed,
+                "shed_queue_full": self.shed_queue_full,
+                "shed_delay": self.shed_delay,
+                "overloaded": self.overloaded,
+                "queue_delay_p50_ms": self.queue_delay.percentile(50) / 1e6,
+                "queue_delay_p99_ms": self.queue_delay.percentile(99) / 1e6,
+            }
+
+    def close(self) -> None:
+        """Stop accepting requests, finish queued ones and stop the workers."""
+        with self._ready:
+            self._closed = True
+            self._ready.notify_all()
+        for worker in self._workers:
+            worker.join()
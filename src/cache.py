@@ -0,0 +1,582 @@
+"""
+Two-tier response cache: an in-process LRU tier and an optional Redis tier.
+
+Mirrors config/cache.js on the Python side. The Redis tier speaks RESP over
+pooled connections, pipelining batch reads and writes; an unreachable or
+misbehaving server only turns lookups into misses.
+"""
+
+import json
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+# Returned by cache tiers on a miss, since None is a cacheable value
+CACHE_MISS: Any = object()
+
+
+class CacheError(Exception):
+    """Raised when the remote cache tier rejects a command."""
+
+
+class LRUCache:
+    """
+    Thread-safe in-process cache with least-recently-used eviction and TTLs.
+
+    Expired entries are dropped lazily when they are read or reach the
+    least-recently-used end of the cache.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+            ttl: Default time to live in seconds
+            clock: Callable returning the current time in seconds
+
+        Raises:
+            ValueError: If max_entries or ttl is not positive
+        """
+        if max_entries < 1 or ttl <= 0:
+            raise ValueError("max_entries and ttl must be positive")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """
+        Get a value, refreshing its recency.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or CACHE_MISS if absent or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return CACHE_MISS
+            if entry[0] <= self.clock():
+                del self._entries[key]
+                return CACHE_MISS
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entries if full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Time to live in seconds (defaults to the cache's ttl)
+        """
+        expires_at = self.clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        """Remove a key; return True if it was present."""
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _encode_redis_command(args: tuple) -> bytes:
+    """Encode one command as a RESP array of bulk strings."""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode("utf-8")
+        elif isinstance(arg, (int, float)):
+            arg = str(arg).encode("ascii")
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+class RedisConnection:
+    """One socket to a Redis-protocol server, speaking RESP2."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self._reader = sock.makefile("rb")
+
+    def execute_many(self, commands: list) -> list:
+        """
+        Send commands in one write and read their replies in order.
+
+        Error replies are returned as CacheError instances so every reply is
+        consumed and the connection stays in sync.
+
+        Args:
+            commands: Sequence of command argument tuples
+
+        Returns:
+            list: One reply per command
+        """
+        self.sock.sendall(b"".join(map(_encode_redis_command, commands)))
+        return [self._read_reply() for _ in commands]
+
+    def _read_reply(self) -> Any:
+        """Parse one RESP reply."""
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Redis connection closed mid-reply")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            return CacheError(rest.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Redis connection closed mid-reply")
+            return data[:-2]
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise CacheError(f"Unexpected Redis reply: {line[:40]!r}")
+
+    def close(self) -> None:
+        """Close the socket."""
+        self._reader.close()
+        self.sock.close()
+
+
+class RedisClient:
+    """
+    Minimal Redis-protocol client with a bounded connection pool.
+
+    Connections are opened lazily, reused across calls and discarded after
+    any socket or protocol error. Batches of commands are pipelined: written
+    in one send and answered in one round trip.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        password: Optional[str] = None,
+        db: int = 0,
+        max_connections: int = 10,
+        timeout: float = 1.0,
+    ):
+        """
+        Initialize the client; no connection is made until first use.
+
+        Args:
+            host: Server host
+            port: Server port
+            password: Password sent with AUTH, if any
+            db: Database selected on each new connection
+            max_connections: Connections the pool may hold open
+            timeout: Socket and pool wait timeout in seconds
+        """
+        self.host = host
+        self.port = port
+        self.password = password
+        self.db = db
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._idle: list[RedisConnection] = []
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection, opening one if none is idle."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise ConnectionError("Redis connection pool exhausted")
+        try:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._connect()
+            try:
+                yield conn
+            except BaseException:
+                conn.close()
+                raise
+            with self._lock:
+                self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    def _connect(self) -> RedisConnection:
+        """Open and initialize a new connection."""
+        sock = socket.create_connection((self.host, self.port), self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = RedisConnection(sock)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        try:
+            for reply in conn.execute_many(setup) if setup else ():
+                if isinstance(reply, CacheError):
+                    raise reply
+        except BaseException:
+            conn.close()
+            raise
+        with self._lock:
+            self.connections_opened += 1
+        return conn
+
+    def pipeline(self, commands: list) -> list:
+        """
+        Run commands in a single round trip.
+
+        Args:
+            commands: Sequence of command argument tuples
+
+        Returns:
+            list: One reply per command
+
+        Raises:
+            CacheError: If any command returned an error reply
+            OSError: If the server cannot be reached
+        """
+        if not commands:
+            return []
+        with self.connection() as conn:
+            replies = conn.execute_many(commands)
+        for reply in replies:
+            if isinstance(reply, CacheError):
+                raise reply
+        return replies
+
+    def execute(self, *args: Any) -> Any:
+        """Run a single command and return its reply."""
+        return self.pipeline([args])[0]
+
+    def ping(self) -> bool:
+        """Check the server answers PING."""
+        return self.execute("PING") == "PONG"
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class TwoTierCache:
+    """
+    In-process LRU/TTL cache in front of an optional shared Redis tier.
+
+    Reads try memory first, then Redis (filling memory on a hit); writes go
+    to both. Values are stored in Redis as JSON, so anything read back from
+    it comes back as plain JSON types. A failing Redis tier is counted and
+    treated as a miss, so the cache degrades to memory-only instead of
+    failing requests; so is a Redis value that is not valid JSON, which is
+    also deleted.
+    """
+
+    def __init__(
+        self,
+        memory: Optional[LRUCache] = None,
+        remote: Optional[RedisClient] = None,
+        prefix: str = "app:",
+        ttl: float = 3600.0,
+        load_timeout: float = 30.0,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            memory: In-process tier (defaults to an LRUCache with this ttl)
+            remote: Shared Redis tier, if any
+            prefix: Prefix added to every key
+            ttl: Default time to live in seconds
+            load_timeout: Seconds get_or_load waits for another thread's
+                load of the same key before loading it itself
+        """
+        self.memory = memory or LRUCache(ttl=ttl)
+        self.remote = remote
+        self.prefix = prefix
+        self.ttl = ttl
+        self.load_timeout = load_timeout
+        self._loading: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Zero every counter."""
+        with self._lock:
+            self.memory_hits = 0
+            self.remote_hits = 0
+            self.misses = 0
+            self.sets = 0
+            self.deletes = 0
+            self.loads = 0
+            self.coalesced = 0
+            self.errors = 0
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        """Add amount to a statistics counter."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def get(self, key: str) -> Any:
+        """
+        Get a value from the nearest tier holding it.
+
+        Args:
+            key: Cache key (without prefix)
+
+        Returns:
+            The cached value, or CACHE_MISS
+        """
+        value = self._lookup(key)
+        if value is CACHE_MISS:
+            self._count("misses")
+        return value
+
+    def _lookup(self, key: str) -> Any:
+        """Look a key up in both tiers, counting hits but not misses."""
+        value = self.memory.get(key)
+        if value is not CACHE_MISS:
+            self._count("memory_hits")
+            return value
+        if self.remote is None:
+            return CACHE_MISS
+        try:
+            raw = self.remote.execute("GET", self.prefix + key)
+        except (OSError, CacheError) as e:
+            self._remote_failed("GET", e)
+            return CACHE_MISS
+        if raw is None:
+            return CACHE_MISS
+        return self._decode(key, raw)
+
+    def _decode(self, key: str, raw: bytes) -> Any:
+        """
+        Decode a Redis value and keep it in memory.
+
+        A value that is not JSON (corrupt, or written by something else)
+        is deleted and reported as a miss rather than failing the request.
+        """
+        try:
+            value = json.loads(raw)
+        except ValueError as e:
+            self._count("errors")
+            logging.getLogger(__name__).warning(
+                "⚠️  Dropping undecodable Redis value for %s: %s", key, e
+            )
+            try:
+                self.remote.execute("DEL", self.prefix + key)
+            except (OSError, CacheError) as error:
+                self._remote_failed("DEL", error)
+            return CACHE_MISS
+        self.memory.set(key, value)
+        self._count("remote_hits")
+        return value
+
+    def get_many(self, keys: list) -> Dict[str, Any]:
+        """
+        Get several values, fetching memory misses from Redis in one MGET.
+
+        Args:
+            keys: Cache keys (without prefix)
+
+        Returns:
+            Dict of the keys that were found to their values
+        """
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.memory.get(key)
+            if value is CACHE_MISS:
+                missing.append(key)
+            else:
+                found[key] = value
+        self._count("memory_hits", len(found))
+        if missing and self.remote is not None:
+            try:
+                (raws,) = self.remote.pipeline(
+                    [("MGET", *[self.prefix + key for key in missing])]
+                )
+            except (OSError, CacheError) as e:
+                self._remote_failed("MGET", e)
+                raws = ()
+            for key, raw in zip(missing, raws):
+                if raw is not None:
+                    value = self._decode(key, raw)
+                    if value is not CACHE_MISS:
+                        found[key] = value
+        self._count("misses", len(keys) - len(found))
+        return found
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value in both tiers.
+
+        Args:
+            key: Cache key (without prefix)
+            value: JSON-serializable value
+            ttl: Time to live in seconds (defaults to the cache's ttl)
+        """
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: Mapping[str, Any], ttl: Optional[float] = None) -> None:
+        """
+        Store several values, writing them to Redis in one pipelined batch.
+
+        Args:
+            items: Keys (without prefix) and JSON-serializable values
+            ttl: Time to live in seconds (defaults to the cache's ttl)
+        """
+        ttl = self.ttl if ttl is None else ttl
+        for key, value in items.items():
+            self.memory.set(key, value, ttl)
+        self._count("sets", len(items))
+        if self.remote is None or not items:
+            return
+        expire_ms = max(1, int(ttl * 1000))
+        commands = [
+            ("SET", self.prefix + key, json.dumps(value, default=dict), "PX", expire_ms)
+            for key, value in items.items()
+        ]
+        try:
+            self.remote.pipeline(commands)
+        except (OSError, CacheError) as e:
+            self._remote_failed("SET", e)
+
+    def delete(self, key: str) -> bool:
+        """Remove a key from both tiers; return True if either held it."""
+        removed = self.memory.delete(key)
+        if self.remote is not None:
+            try:
+                removed = bool(self.remote.execute("DEL", self.prefix + key)) or removed
+            except (OSError, CacheError) as e:
+                self._remote_failed("DEL", e)
+        if removed:
+            self._count("deletes")
+        return removed
+
+    def get_or_load(
+        self, key: str, loader: Callable[[], Any], ttl: Optional[float] = None
+    ) -> Any:
+        """
+        Get a value, calling loader and caching its result on a miss.
+
+        Concurrent misses for the same key are coalesced: one thread runs
+        loader while the others wait for its result, so an expiring hot key
+        does not send a stampede of loads to the backend. Exceptions from
+        loader are not cached; waiters then load for themselves, as they do
+        after load_timeout seconds if the load never finishes.
+
+        Args:
+            key: Cache key (without prefix)
+            loader: Callable producing the value
+            ttl: Time to live in seconds (defaults to the cache's ttl)
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        value = self._lookup(key)
+        if value is not CACHE_MISS:
+            return value
+        self._count("misses")
+
+        with self._lock:
+            event = self._loading.get(key)
+            leader = event is None
+            if leader:
+                # A load may have finished between the lookup and this lock
+                value = self.memory.get(key)
+                if value is not CACHE_MISS:
+                    self.coalesced += 1
+                    return value
+                event = self._loading[key] = threading.Event()
+        if not leader:
+            event.wait(self.load_timeout)
+            value = self.memory.get(key)
+            if value is not CACHE_MISS:
+                self._count("coalesced")
+                return value
+            return loader()
+
+        try:
+            value = loader()
+            self._count("loads")
+            self.set(key, value, ttl)
+            return value
+        finally:
+            with self._lock:
+                del self._loading[key]
+            event.set()
+
+    def _remote_failed(self, command: str, error: Exception) -> None:
+        """Count a Redis failure; the operation falls back to memory."""
+        self._count("errors")
+        logging.getLogger(__name__).warning(
+            "⚠️  Redis %s failed, using the memory tier: %s", command, error
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss statistics, in the shape of config/cache.js getStats.
+
+        Returns:
+            Dict of counters, total requests, hit rate and active tiers
+        """
+        with self._lock:
+            counters = {
+                "memory_hits": self.memory_hits,
+                "remote_hits": self.remote_hits,
+                "misses": self.misses,
+                "sets": self.sets,
+                "deletes": self.deletes,
+                "loads": self.loads,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+            }
+        hits = counters["memory_hits"] + counters["remote_hits"]
+        total = hits + counters["misses"]
+        return {
+            "hits": hits,
+            **counters,
+            "evictions": self.memory.evictions,
+            "total_requests": total,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "store": "memory+redis" if self.remote is not None else "memory",
+        }
+
+    def close(self) -> None:
+        """Close the Redis tier's pooled connections."""
+        if self.remote is not None:
+            self.remote.close()
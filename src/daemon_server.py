@@ -0,0 +1,258 @@
+"""
+Greeting daemon: serves greetings over a Unix domain socket.
+
+Holds the length-prefixed JSON framing spoken by src/greet_client.py, the
+request dispatch shared with the HTTP server, and the socket server that
+keeps the greeting services warm between requests.
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import struct
+import tempfile
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional
+
+from errors import DeniedError, OverloadedError, RateLimitedError
+
+if TYPE_CHECKING:
+    from admission import AdmissionController
+    from main import (
+        AdaptiveConcurrencyLimiter,
+        AppInfoService,
+        GreetingService,
+        RateLimiter,
+    )
+
+# Frames are a 4-byte big-endian body length and a UTF-8 JSON body;
+# src/greet_client.py speaks the same protocol
+DAEMON_FRAME = struct.Struct(">I")
+DAEMON_MAX_FRAME = 1 << 20
+
+
+def default_daemon_socket() -> str:
+    """Get the daemon socket path from DAEMON_SOCKET or the temp directory."""
+    return os.getenv("DAEMON_SOCKET") or os.path.join(
+        tempfile.gettempdir(), "project-template.sock"
+    )
+
+
+def encode_frame(message: Mapping[str, Any]) -> bytes:
+    """Encode a message as one length-prefixed JSON frame."""
+    body = json.dumps(message, separators=(",", ":"), default=dict).encode("utf-8")
+    return DAEMON_FRAME.pack(len(body)) + body
+
+
+def read_frame(stream: Any) -> Any:
+    """
+    Read one length-prefixed JSON frame.
+
+    Args:
+        stream: Binary file-like object
+
+    Returns:
+        The decoded message, or None at a clean end of stream
+
+    Raises:
+        ValueError: If the frame is truncated, too large or not JSON
+    """
+    header = stream.read(DAEMON_FRAME.size)
+    if not header:
+        return None
+    if len(header) < DAEMON_FRAME.size:
+        raise ValueError("Truncated frame header")
+    (length,) = DAEMON_FRAME.unpack(header)
+    if length > DAEMON_MAX_FRAME:
+        raise ValueError(f"Frame of {length} bytes exceeds {DAEMON_MAX_FRAME}")
+    body = stream.read(length)
+    if len(body) < length:
+        raise ValueError("Truncated frame")
+    return json.loads(body)
+
+
+def _claim_socket_path(path: str) -> None:
+    """Remove a stale socket left at path, refusing to replace a live one."""
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError(f"{path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise OSError(f"A daemon is already listening on {path}")
+
+
+class _DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """Answers each request frame on a connection, in order."""
+
+    def handle(self) -> None:
+        while True:
+            try:
+                message = read_frame(self.rfile)
+            except ValueError as e:
+                self.wfile.write(encode_frame(_daemon_error("bad_request", str(e))))
+                return
+            if message is None:
+                return
+            self.wfile.write(encode_frame(self.server.handle_message(message)))
+
+
+# Offenders reported when a request gives no count
+DEFAULT_OFFENDERS = 10
+
+
+def _daemon_error(kind: str, message: str) -> Dict[str, Any]:
+    """Build an error response."""
+    return {"ok": False, "error": kind, "message": message}
+
+
+class GreetingEndpoint:
+    """
+    Request dispatch shared by the daemon and HTTP servers.
+
+    Requests are JSON objects with an "op" of "greet" (with name, and
+    optional locale and caller), "info", "metrics", "offenders" (with an
+    optional count) or "ping". Responses are {"ok": true, "result": ...} or
+    {"ok": false, "error": kind, "message": ...}, where kind is one of
+    invalid, rate_limited, denied, overloaded or bad_request. Servers
+    provide app_info_service, an admission controller wrapping
+    GreetingService.greet, the limiter that greet charges and the adaptive
+    concurrency limiter it applies, if any.
+    """
+
+    app_info_service: "AppInfoService"
+    admission: "AdmissionController"
+    limiter: "RateLimiter"
+    concurrency: Optional["AdaptiveConcurrencyLimiter"] = None
+
+    def handle_message(self, message: Any) -> Dict[str, Any]:
+        """
+        Answer one request.
+
+        Args:
+            message: Decoded request
+
+        Returns:
+            Response message
+        """
+        if not isinstance(message, dict):
+            return _daemon_error("bad_request", "Request must be a JSON object")
+        op = message.get("op")
+        try:
+            if op == "greet":
+                name = message.get("name")
+                locale = message.get("locale")
+                caller = message.get("caller")
+                if not isinstance(name, str) or not all(
+                    value is None or isinstance(value, str)
+                    for value in (locale, caller)
+                ):
+                    return _daemon_error(
+                        "bad_request", "name, locale and caller must be strings"
+                    )
+                result: Any = self.admission.call(name, locale, caller)
+            elif op == "info":
+                result = self.app_info_service.get_app_info()
+            elif op == "metrics":
+                result = self.admission.metrics()
+                if self.concurrency is not None:
+                    result["concurrency"] = self.concurrency.metrics()
+            elif op == "offenders":
+                count = message.get("count", DEFAULT_OFFENDERS)
+                tracker = self.limiter.tracker
+                if type(count) is not int or count < 1:
+                    return _daemon_error(
+                        "bad_request", "count must be a positive integer"
+                    )
+                if tracker is None:
+                    return _daemon_error(
+                        "bad_request", "Offender tracking is not enabled"
+                    )
+                result = {
+                    "requests": tracker.total,
+                    "offenders": [
+                        {"caller": caller, "requests": estimate}
+                        for caller, estimate in tracker.top_offenders(count)
+                    ],
+                }
+            elif op == "ping":
+                result = "pong"
+            else:
+                return _daemon_error("bad_request", f"Unknown op: {op!r}")
+        except DeniedError as e:
+            return _daemon_error("denied", str(e))
+        except OverloadedError as e:
+            return _daemon_error("overloaded", str(e))
+        except RateLimitedError as e:
+            return _daemon_error("rate_limited", str(e))
+        except ValueError as e:
+            return _daemon_error("invalid", str(e))
+        return {"ok": True, "result": result}
+
+
+class GreetingDaemon(
+    GreetingEndpoint, socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+):
+    """
+    Serves greetings over a Unix domain socket from warm, resident services.
+
+    Clients keep a connection open and send any number of request frames
+    (see GreetingEndpoint), each answered by one response frame. Greetings
+    run through an AdmissionController, so overload is shed rather than
+    queued without bound.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        path: str,
+        greeting_service: "GreetingService",
+        app_info_service: "AppInfoService",
+        admission: "AdmissionController",
+    ):
+        """
+        Bind the socket; call serve_forever to start serving.
+
+        Args:
+            path: Unix socket path; a stale socket there is replaced
+            greeting_service: Service answering greet requests
+            app_info_service: Service answering info requests
+            admission: Admission controller wrapping greeting_service.greet
+
+        Raises:
+            OSError: If the path is in use or cannot be bound
+        """
+        self.path = path
+        self.greeting_service = greeting_service
+        self.app_info_service = app_info_service
+        self.admission = admission
+        self.limiter = greeting_service.active_limiter
+        self.concurrency = greeting_service.active_concurrency
+        self.logger = logging.getLogger(self.__class__.__name__)
+        _claim_socket_path(path)
+        # Only the daemon's own user may connect; set the mode at bind time,
+        # since a chmod afterwards leaves a window with the default one
+        umask = os.umask(0o177)
+        try:
+            super().__init__(path, _DaemonRequestHandler)
+        finally:
+            os.umask(umask)
+
+    def server_close(self) -> None:
+        """Close the socket and remove its path."""
+        super().server_close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
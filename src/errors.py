@@ -0,0 +1,22 @@
+"""
+Refusal errors shared by the greeting services and the servers.
+
+Each subclasses ValueError, so callers that only handle invalid input still
+catch them; the daemon and HTTP servers map each to its own error kind.
+"""
+
+
+class RateLimitedError(ValueError):
+    """Raised when a caller has used up its rate limit."""
+
+
+class DeniedError(ValueError):
+    """Raised when a caller is on the denylist."""
+
+
+class OverloadedError(ValueError):
+    """Raised when a request is shed instead of served because of load."""
+
+
+class ConcurrencyLimitedError(OverloadedError):
+    """Raised when the adaptive concurrency limit is reached."""
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Thin client for the greeting daemon.
+
+Forwards greetings to a daemon started with ``main.py daemon`` over its Unix
+socket, so a batch script pays only for this module's few standard-library
+imports instead of the application's full startup. When no daemon is
+listening, the greeting is produced in-process instead, with the same
+result.
+
+Usage:
+    python src/greet_client.py --name Alice [--locale ja] [--caller 10.0.0.1]
+"""
+
+import argparse
+import json
+import os
+import socket
+import struct
+import sys
+import tempfile
+from typing import Any, Dict, Optional
+
+# Must match DAEMON_FRAME and DAEMON_MAX_FRAME in daemon_server.py
+FRAME = struct.Struct(">I")
+MAX_FRAME = 1 << 20
+
+
+def default_socket_path() -> str:
+    """Get the daemon socket path from DAEMON_SOCKET or the temp directory."""
+    return os.getenv("DAEMON_SOCKET") or os.path.join(
+        tempfile.gettempdir(), "project-template.sock"
+    )
+
+
+class DaemonClient:
+    """Connection to a running daemon, reused across requests."""
+
+    def __init__(self, path: Optional[str] = None, timeout: float = 30.0):
+        """
+        Connect to the daemon.
+
+        Args:
+            path: Socket path (defaults to default_socket_path())
+            timeout: Seconds to wait for a reply
+
+        Raises:
+            OSError: If no daemon is listening (FileNotFoundError or
+                ConnectionRefusedError)
+        """
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(path or default_socket_path())
+        except OSError:
+            self.sock.close()
+            raise
+        self._reader = self.sock.makefile("rb")
+
+    def request(self, message: Dict[str, Any]) -> Any:
+        """
+        Send one request and wait for its reply.
+
+        Args:
+            message: Request with an "op" and its arguments
+
+        Returns:
+            The reply's result
+
+        Raises:
+            ValueError: If the daemon answered with an error
+            ConnectionError: If the daemon closed the connection
+        """
+        body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+        self.sock.sendall(FRAME.pack(len(body)) + body)
+        header = self._reader.read(FRAME.size)
+        if len(header) < FRAME.size:
+            raise ConnectionError("Daemon closed the connection")
+        (length,) = FRAME.unpack(header)
+        if length > MAX_FRAME:
+            raise ConnectionError(f"Reply of {length} bytes exceeds {MAX_FRAME}")
+        body = self._reader.read(length)
+        if len(body) < length:
+            raise ConnectionError("Daemon closed the connection mid-reply")
+        reply = json.loads(body)
+        if not reply.get("ok"):
+            raise ValueError(reply.get("message") or reply.get("error"))
+        return reply["result"]
+
+    def greet(
+        self, name: str, locale: Optional[str] = None, caller: Optional[str] = None
+    ) -> str:
+        """Get a greeting from the daemon."""
+        return self.request(
+            {"op": "greet", "name": name, "locale": locale, "caller": caller}
+        )
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._reader.close()
+        self.sock.close()
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def greet(
+    name: str,
+    locale: Optional[str] = None,
+    caller: Optional[str] = None,
+    socket_path: Optional[str] = None,
+) -> str:
+    """
+    Get a greeting from the daemon, or in-process if none is running.
+
+    Args:
+        name: The name to greet
+        locale: Locale of the greeting (falls back to English)
+        caller: Caller identity to rate limit
+        socket_path: Daemon socket path (defaults to default_socket_path())
+
+    Returns:
+        str: Greeting message
+
+    Raises:
+        ValueError: If the greeting is refused (invalid name, rate limited,
+            denied or overloaded)
+    """
+    try:
+        client = DaemonClient(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return greet_in_process(name, locale, caller)
+    with client:
+        return client.greet(name, locale, caller)
+
+
+def greet_in_process(
+    name: str, locale: Optional[str] = None, caller: Optional[str] = None
+) -> str:
+    """
+    Configure the application's services in this process and greet.
+
+    Uses the same configuration, rate limit persistence, denylist and cache
+    as the CLI, but leaves logging and tracing unconfigured so nothing but
+    the greeting reaches stdout.
+
+    Raises:
+        ValueError: If the greeting is refused or the configuration is
+            invalid
+    """
+    # Deferred: importing and configuring the application is the startup
+    # cost the daemon exists to avoid
+    import main
+
+    try:
+        config = main.load_configuration()
+        main.configure_rate_limit_persistence()
+        main.configure_denylist()
+        main.configure_cache()
+    except main.ConfigurationError as e:
+        raise ValueError(f"Configuration error: {e}") from e
+    return main.GreetingService(config).greet(name, locale, caller)
+
+
+def main() -> None:
+    """Print one greeting, exiting with status 1 if it is refused."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--name", "-n", default="Developer", help="Name to greet")
+    parser.add_argument("--locale", help="Greeting locale")
+    parser.add_argument("--caller", help="Caller identity to rate limit")
+    parser.add_argument("--socket", help="Daemon socket path")
+    args = parser.parse_args()
+
+    try:
+        print(greet(args.name, args.locale, args.caller, args.socket))
+    except (ValueError, OSError) as e:
+        print(f"💥 {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Log-linear latency histogram used by admission control and trace replay."""
+
+import math
+from array import array
+
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram in the style of HdrHistogram.
+
+    Values are bucketed by their top significant_bits bits, so each one is
+    reported within 2 ** (1 - significant_bits) of its true size (under 1%
+    by default) using a fixed array of counters whatever the range.
+    Histograms from parallel workers combine with merge.
+    """
+
+    def __init__(self, significant_bits: int = 8):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            significant_bits: Leading bits kept per value (2 to 16)
+
+        Raises:
+            ValueError: If significant_bits is out of range
+        """
+        if not 2 <= significant_bits <= 16:
+            raise ValueError("significant_bits must be between 2 and 16")
+        self.significant_bits = significant_bits
+        self._half = 1 << (significant_bits - 1)
+        self.counts = array("Q", bytes(8 * (66 - significant_bits) * self._half))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        """
+        Record one non-negative integer value.
+
+        Args:
+            value: Value to record (e.g. a latency in nanoseconds)
+        """
+        shift = value.bit_length() - self.significant_bits
+        if shift <= 0:
+            self.counts[value] += 1
+        else:
+            self.counts[shift * self._half + (value >> shift)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """
+        Add another histogram's values to this one.
+
+        Args:
+            other: Histogram with the same significant_bits
+
+        Raises:
+            ValueError: If the histograms have different precision
+        """
+        if other.significant_bits != self.significant_bits:
+            raise ValueError("Cannot merge histograms of different precision")
+        counts = self.counts
+        for index, count in enumerate(other.counts):
+            if count:
+                counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent: float) -> int:
+        """
+        Get the value at or below which percent of recorded values fall.
+
+        Args:
+            percent: Percentile between 0 and 100
+
+        Returns:
+            Upper bound of the bucket holding the percentile (0 if empty)
+        """
+        if not self.count:
+            return 0
+        target = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                break
+        if index < 2 * self._half:
+            return index
+        shift = index // self._half - 1
+        upper = ((index - shift * self._half + 1) << shift) - 1
+        return min(upper, self.max)
+
+    @property
+    def mean(self) -> float:
+        """Mean of the recorded values."""
+        return self.total / self.count if self.count else 0.0
@@ -0,0 +1,408 @@
+"""
+HTTP front end: pre-forked workers serving the greeting endpoint over HTTP.
+
+Each worker answers requests through GreetingEndpoint, the dispatch the
+daemon uses, behind its own AdmissionController.
+"""
+
+import http.server
+import json
+import logging
+import math
+import os
+import signal
+import socket
+import threading
+import time
+import urllib.parse
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+from admission import ADMISSION_POLICIES, AdmissionController
+from daemon_server import GreetingEndpoint
+
+if TYPE_CHECKING:
+    from main import (
+        AdaptiveConcurrencyLimiter,
+        AppInfoService,
+        GreetingService,
+        RateLimiter,
+    )
+
+# HTTP status for each refusal kind returned by GreetingEndpoint
+HTTP_ERROR_STATUS = {
+    "bad_request": 400,
+    "invalid": 400,
+    "denied": 403,
+    "rate_limited": 429,
+    "overloaded": 503,
+}
+
+
+class _GreetingHTTPHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves GET /greet?name=&locale=, /info (with ETag), /metrics,
+    /offenders?count= and /healthz.
+
+    Greeting responses use the daemon's JSON reply shape; the caller is
+    the client's address.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "ProjectTemplate"
+    # Headers and body are separate writes; don't let Nagle hold the body
+    disable_nagle_algorithm = True
+    # Idle keep-alive connections are closed after this many seconds
+    timeout = 5
+
+    def do_GET(self) -> None:
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == "/info":
+            status, body, etag = self.server.app_info_service.get_app_info_response(
+                self.headers.get("If-None-Match")
+            )
+            self._send(status, body, ETag=etag)
+            return
+        if url.path == "/greet":
+            query = urllib.parse.parse_qs(url.query)
+            message: Dict[str, Any] = {
+                "op": "greet",
+                "name": query.get("name", ["Developer"])[0],
+                "locale": query.get("locale", [None])[0],
+                "caller": self.client_address[0],
+            }
+        elif url.path == "/metrics":
+            message = {"op": "metrics"}
+        elif url.path == "/offenders":
+            count = urllib.parse.parse_qs(url.query).get("count", [None])[0]
+            message = {"op": "offenders"}
+            if count is not None:
+                message["count"] = int(count) if count.isdigit() else count
+        elif url.path == "/healthz":
+            message = {"op": "ping"}
+        else:
+            self._send(404, b'{"ok":false,"error":"not_found"}')
+            return
+        reply = self.server.handle_message(message)
+        status = 200 if reply["ok"] else HTTP_ERROR_STATUS[reply["error"]]
+        self._send(status, json.dumps(reply, separators=(",", ":")).encode("utf-8"))
+
+    def _send(self, status: int, body: bytes, **headers: str) -> None:
+        """Write a JSON response, closing the connection while draining."""
+        if self.server.draining:
+            self.close_connection = True
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for header, value in headers.items():
+            self.send_header(header, value)
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Access logs would cost more than the greeting itself
+        pass
+
+
+class GreetingHTTPServer(GreetingEndpoint, http.server.ThreadingHTTPServer):
+    """HTTP server for one worker process, on an already bound socket."""
+
+    daemon_threads = False
+    block_on_close = True
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        app_info_service: "AppInfoService",
+        admission: AdmissionController,
+        limiter: "RateLimiter",
+        concurrency: Optional["AdaptiveConcurrencyLimiter"] = None,
+    ):
+        """
+        Serve on a listening socket.
+
+        Args:
+            sock: Bound, listening socket
+            app_info_service: Service answering info requests
+            admission: Admission controller wrapping GreetingService.greet
+            limiter: Limiter greet charges
+            concurrency: Concurrency limiter greet applies, if any
+        """
+        super().__init__(sock.getsockname()[:2], _GreetingHTTPHandler, False)
+        self.socket.close()
+        self.socket = sock
+        self.app_info_service = app_info_service
+        self.admission = admission
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.draining = False
+
+    def drain_backlog(self) -> None:
+        """
+        Serve connections already queued on the socket without waiting.
+
+        Switches the socket to non-blocking mode, so it must not be shared
+        with other processes.
+        """
+        self.socket.setblocking(False)
+        while True:
+            try:
+                request, address = self.socket.accept()
+            except (BlockingIOError, OSError):
+                return
+            request.setblocking(True)
+            self.process_request(request, address)
+
+
+class PreforkServer:
+    """
+    Pre-forked HTTP workers sharing one port, supervised by this process.
+
+    Services are built once in the parent and inherited by every worker.
+    With SO_REUSEPORT each worker binds its own listening socket and the
+    kernel spreads connections across them; otherwise every worker accepts
+    from one socket created before forking. Workers that die are replaced.
+    On SIGTERM or SIGINT workers stop accepting, finish their in-flight and
+    queued requests and exit; any still running after drain_timeout seconds
+    are killed.
+
+    Each worker has its own copy of the rate limiter, so a caller whose
+    connections land on different workers gets up to workers times its
+    limit, and /offenders reports the worker that answered it. The
+    worker_init hook run_serve installs reopens a rotating log file per
+    worker (app.worker0.log, ...), so workers never rotate one file from
+    under each other.
+    Connections still queued on shutdown are drained only with SO_REUSEPORT;
+    a shared socket's backlog is left to the workers still accepting.
+    Each worker greets through its own AdmissionController with threads
+    greeting threads, max_queue and policy, as the daemon does.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        workers: int,
+        greeting_service: "GreetingService",
+        app_info_service: "AppInfoService",
+        reuse_port: bool = True,
+        drain_timeout: float = 30.0,
+        threads: int = 4,
+        max_queue: int = 64,
+        policy: str = "codel",
+        before_fork: Optional[Callable[[], None]] = None,
+        worker_init: Optional[Callable[[int], None]] = None,
+        worker_exit: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Initialize the server; call bind, then serve_forever.
+
+        Args:
+            host: Address to listen on
+            port: Port to listen on (0 picks a free one)
+            workers: Worker processes to run
+            greeting_service: Service answering greet requests
+            app_info_service: Service answering info requests
+            reuse_port: Use SO_REUSEPORT where the platform supports it
+            drain_timeout: Seconds workers get to finish on shutdown
+            threads: Greeting threads in each worker's admission controller
+            max_queue: Requests that may wait for one of a worker's threads
+            policy: Load shedding policy, one of ADMISSION_POLICIES
+            before_fork: Called in this process before each worker forks, to
+                flush anything buffered that the worker would inherit
+            worker_init: Called with the worker's slot first thing in each
+                worker, to drop state it must not share with its parent
+            worker_exit: Called as each worker exits, before its log handlers
+                are flushed
+
+        Raises:
+            ValueError: If a count is not positive or the policy is unknown
+            OSError: If the platform cannot fork
+        """
+        # Checked here: a worker failing to start would be restarted forever
+        if min(workers, threads, max_queue) < 1:
+            raise ValueError("workers, threads and max_queue must be at least 1")
+        if policy not in ADMISSION_POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(ADMISSION_POLICIES)}")
+        if not hasattr(os, "fork"):
+            raise OSError("serve needs os.fork, which this platform lacks")
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.greeting_service = greeting_service
+        self.app_info_service = app_info_service
+        self.reuse_port = reuse_port and hasattr(socket, "SO_REUSEPORT")
+        self.drain_timeout = drain_timeout
+        self.threads = threads
+        self.max_queue = max_queue
+        self.policy = policy
+        self.before_fork = before_fork
+        self.worker_init = worker_init
+        self.worker_exit = worker_exit
+        self.restarts = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._socket: Optional[socket.socket] = None
+        self._children: Dict[int, int] = {}
+        self._stopping = False
+
+    def _listen_socket(self) -> socket.socket:
+        """Create a socket bound to the server's address."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((self.host, self.port))
+        return sock
+
+    def bind(self) -> None:
+        """
+        Bind the port in the parent, so errors surface before forking.
+
+        With SO_REUSEPORT the parent's socket only reserves the port (and
+        resolves port 0); it never listens, so the kernel gives it no
+        connections.
+
+        Raises:
+            OSError: If the address cannot be bound
+        """
+        self._socket = self._listen_socket()
+        if not self.reuse_port:
+            self._socket.listen(socket.SOMAXCONN)
+        self.port = self._socket.getsockname()[1]
+
+    def serve_forever(self) -> None:
+        """Start the workers and supervise them until shutdown."""
+        if self._socket is None:
+            self.bind()
+        previous = {
+            signum: signal.signal(signum, self._stop)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        try:
+            for slot in range(self.workers):
+                self._spawn(slot)
+            self._supervise()
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+            signal.alarm(0)
+            self._socket.close()
+
+    def _stop(self, signum: int, frame: Any) -> None:
+        """Signal handler: ask every worker to drain, then exit."""
+        if self._stopping:
+            return
+        self._stopping = True
+        self.logger.info("🛑 Draining %d workers", len(self._children))
+        for pid in list(self._children):
+            self._signal_worker(pid, signal.SIGTERM)
+        signal.signal(signal.SIGALRM, self._kill_stragglers)
+        signal.alarm(max(1, math.ceil(self.drain_timeout)))
+
+    def _kill_stragglers(self, signum: int, frame: Any) -> None:
+        """Kill workers still running after the drain timeout."""
+        for pid in list(self._children):
+            self.logger.warning("⚠️  Worker %d did not drain in time", pid)
+            self._signal_worker(pid, signal.SIGKILL)
+
+    @staticmethod
+    def _signal_worker(pid: int, signum: int) -> None:
+        """Send signum to a worker that may have exited already."""
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _supervise(self) -> None:
+        """Reap workers, replacing any that exit before shutdown."""
+        started = {slot: time.monotonic() for slot in self._children.values()}
+        while self._children:
+            pid, status = os.wait()
+            slot = self._children.pop(pid, None)
+            if slot is None or self._stopping:
+                continue
+            self.restarts += 1
+            self.logger.warning(
+                "⚠️  Worker %d exited with status %d; restarting",
+                pid,
+                os.waitstatus_to_exitcode(status),
+            )
+            # Back off a worker that crashes as soon as it starts
+            if time.monotonic() - started[slot] < 1.0:
+                time.sleep(1.0)
+            if not self._stopping:
+                self._spawn(slot)
+                started[slot] = time.monotonic()
+
+    def _spawn(self, slot: int) -> None:
+        """Fork a worker for slot."""
+        if self.before_fork is not None:
+            self.before_fork()
+        for handler in logging.getLogger().handlers:
+            handler.flush()
+        pid = os.fork()
+        if pid:
+            self._children[pid] = slot
+            return
+        status = 1
+        try:
+            self._run_worker(slot)
+            status = 0
+        except BaseException as e:
+            self.logger.error("💥 Worker %d failed: %s", os.getpid(), e)
+        finally:
+            try:
+                # os._exit skips atexit, so flush buffered records
+                if self.worker_exit is not None:
+                    self.worker_exit()
+                logging.shutdown()
+            finally:
+                # Never return into the parent's supervisor loop
+                os._exit(status)
+
+    def _run_worker(self, slot: int) -> None:
+        """Serve requests in a forked worker until SIGTERM."""
+        # The parent's handlers would signal sibling workers; it forwards
+        # SIGTERM to each worker and handles SIGINT itself
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGALRM, signal.SIG_DFL)
+        if self.worker_init is not None:
+            self.worker_init(slot)
+
+        if self.reuse_port:
+            self._socket.close()
+            sock = self._listen_socket()
+            sock.listen(socket.SOMAXCONN)
+        else:
+            sock = self._socket
+        admission = AdmissionController(
+            self.greeting_service.greet,
+            workers=self.threads,
+            max_queue=self.max_queue,
+            policy=self.policy,
+        )
+        server = GreetingHTTPServer(
+            sock,
+            self.app_info_service,
+            admission,
+            self.greeting_service.active_limiter,
+            self.greeting_service.active_concurrency,
+        )
+        signal.signal(
+            signal.SIGTERM,
+            lambda signum, frame: threading.Thread(target=server.shutdown).start(),
+        )
+        try:
+            server.serve_forever()
+            server.draining = True
+            if self.reuse_port:
+                # Only a socket of our own; O_NONBLOCK is shared by every
+                # process holding the same socket
+                server.drain_backlog()
+        finally:
+            # Waits for in-flight requests (block_on_close)
+            server.server_close()
+            admission.close()
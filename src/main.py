@@ -14,14 +14,54 @@ This file demonstrates a well-structured Python application with:
 import os
 import sys
 import logging
+import logging.handlers
 import re
 import argparse
 import time
+import hashlib
+import struct
+import bisect
+import tempfile
+import json
+import keyword
+import queue
+import atexit
+import gzip
+import shutil
+import threading
+import itertools
+import math
+import heapq
+import gc
+import mmap
+import random
+import functools
+import contextvars
+import tracemalloc
+import multiprocessing
+import asyncio
+import signal
+from array import array
 from pathlib import Path
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Callable, Mapping, Optional, Tuple
 from dataclasses import dataclass
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from json.encoder import encode_basestring as encode_json_string
 import traceback
 
+from admission import ADMISSION_POLICIES, AdmissionController
+from cache import CacheError, LRUCache, RedisClient, TwoTierCache
+from daemon_server import GreetingDaemon, default_daemon_socket
+from errors import (
+    ConcurrencyLimitedError,
+    DeniedError,
+    RateLimitedError,
+)
+from histogram import LatencyHistogram
+from http_server import PreforkServer
+
 try:
     import typer
 except ImportError:
@@ -72,6 +112,72 @@ def sanitize_input(
     return sanitized
 
 
+MAX_NAME_LENGTH = 50
+
+# A name that already satisfies every check in _validate_name_full unchanged:
+# 1-50 chars of letters, spaces, hyphens and apostrophes with no leading or
+# trailing space. Such a name passes sanitize_input untouched (no control
+# characters, no "<", nothing to strip or truncate), so it can be returned
+# as is. Anything else, including other Unicode whitespace, takes the slow
+# path.
+_CLEAN_NAME_PATTERN = re.compile(r"[A-Za-z'-](?:[A-Za-z '-]{0,48}[A-Za-z'-])?")
+_NAME_CHARACTERS_PATTERN = re.compile(r"^[a-zA-Z\s\-']+$")
+
+
+def validate_name(name: str) -> str:
+    """
+    Validate and sanitize a name to greet.
+
+    Clean names are accepted with a single precompiled pattern match; all
+    other input goes through the full validation and sanitization pipeline.
+
+    Args:
+        name: Name to validate
+
+    Returns:
+        str: Sanitized name
+
+    Raises:
+        ValueError: If the name is invalid
+    """
+    if type(name) is str and _CLEAN_NAME_PATTERN.fullmatch(name):
+        return name
+    return _validate_name_full(name)
+
+
+def _validate_name_full(name: str) -> str:
+    """Validate and sanitize a name with every individual check."""
+    # Validate original input before sanitization
+    if not isinstance(name, str):
+        raise ValueError("Name must be a string")
+
+    if not name.strip():
+        raise ValueError("Name cannot be empty")
+
+    if len(name) > MAX_NAME_LENGTH:
+        raise ValueError("Name must be between 1 and 50 characters long")
+
+    if "\n" in name or "\t" in name:
+        raise ValueError("Name cannot contain newlines or tabs")
+
+    # Input sanitization
+    sanitized_name = sanitize_input(name, max_length=MAX_NAME_LENGTH, strip_html=True)
+
+    if not sanitized_name:
+        raise ValueError("Name cannot be empty after sanitization")
+
+    # Validate name length and characters after sanitization
+    if len(sanitized_name) < 1:
+        raise ValueError("Name must be between 1 and 50 characters long")
+
+    if not _NAME_CHARACTERS_PATTERN.match(sanitized_name):
+        raise ValueError(
+            "Name can only contain letters, spaces, hyphens, and apostrophes"
+        )
+
+    return sanitized_name
+
+
 def is_sensitive_value(key: str, value: str) -> bool:
     """
     Check if a configuration value appears to contain sensitive information.
@@ -109,13 +215,320 @@ def is_sensitive_value(key: str, value: str) -> bool:
     return False
 
 
+# Identifiers longer than this (API keys, tokens) are stored as a digest
+MAX_RAW_KEY_LENGTH = 64
+
+
+def compact_key(identifier: str) -> str:
+    """
+    Normalize a rate-limit identifier into a compact dictionary key.
+
+    Short identifiers (IPs, user IDs) are used as they are. They are not
+    interned: interned strings are never freed on CPython 3.12+, so callers
+    cycling through identifiers would grow the intern table without bound.
+    Long ones are replaced by a fixed-size blake2b digest, which also keeps
+    raw API keys out of limiter state.
+
+    Args:
+        identifier: Caller identity such as an IP, user ID or API key
+
+    Returns:
+        str: Key to store the identifier under
+    """
+    if type(identifier) is not str:
+        identifier = str(identifier)
+    if len(identifier) > MAX_RAW_KEY_LENGTH:
+        digest = hashlib.blake2b(
+            identifier.encode("utf-8", "surrogatepass"), digest_size=16
+        )
+        return "#" + digest.hexdigest()
+    return identifier
+
+
+NS_PER_MS = 1_000_000
+
+
+class VirtualClock:
+    """
+    Manually advanced clock for tests and simulations.
+
+    Like the default time.monotonic_ns clock, calling it returns the current
+    time in integer nanoseconds.
+    """
+
+    def __init__(self, start_ns: int = 0):
+        self.now_ns = start_ns
+
+    def __call__(self) -> int:
+        return self.now_ns
+
+    def advance(self, ns: int) -> None:
+        """
+        Move the clock forward.
+
+        Args:
+            ns: Nanoseconds to advance by
+
+        Raises:
+            ValueError: If ns is negative
+        """
+        if ns < 0:
+            raise ValueError("Virtual time cannot go backwards")
+        self.now_ns += ns
+
+    def set(self, now_ns: int) -> None:
+        """
+        Move the clock forward to an absolute time.
+
+        Args:
+            now_ns: New current time in nanoseconds
+
+        Raises:
+            ValueError: If now_ns is earlier than the current time
+        """
+        if now_ns < self.now_ns:
+            raise ValueError("Virtual time cannot go backwards")
+        self.now_ns = now_ns
+
+
+# Rate limiter snapshot layout: magic, version, saved-at wall clock (ns),
+# identifier count, key blob size, timestamp count. Timestamps are stored as
+# wall-clock nanoseconds and translated to and from the limiter's clock.
+RATE_LIMIT_SNAPSHOT_MAGIC = b"PTRL"
+RATE_LIMIT_SNAPSHOT_VERSION = 2
+RATE_LIMIT_SNAPSHOT_HEADER = struct.Struct("<4sHqQQQ")
+
+
+@contextmanager
+def _gc_paused():
+    """Suspend cyclic garbage collection while building many containers."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _read_rate_limit_snapshot(view: memoryview, path: str) -> Tuple[list, list, list]:
+    """Validate a mapped rate limiter snapshot and unpack keys, counts, stamps."""
+    magic, version, _, key_count, blob_size, stamp_count = (
+        RATE_LIMIT_SNAPSHOT_HEADER.unpack_from(view)
+    )
+    if magic != RATE_LIMIT_SNAPSHOT_MAGIC or version != RATE_LIMIT_SNAPSHOT_VERSION:
+        raise ValueError(f"Not a rate limiter snapshot: {path}")
+
+    offset = RATE_LIMIT_SNAPSHOT_HEADER.size
+    lengths_end = offset + key_count * 2
+    counts_end = lengths_end + key_count * 4
+    blob_end = counts_end + blob_size
+    stamps_start = blob_end + (-blob_end % 8)
+    if len(view) != stamps_start + stamp_count * 8:
+        raise ValueError(f"Truncated rate limiter snapshot: {path}")
+
+    columns = []
+    for start, end, code in (
+        (offset, lengths_end, "H"),
+        (lengths_end, counts_end, "I"),
+        (stamps_start, len(view), "q"),
+    ):
+        column = array(code)
+        column.frombytes(view[start:end])
+        if sys.byteorder != "little":
+            column.byteswap()
+        columns.append(column.tolist())
+    lengths, counts, stamps = columns
+
+    if sum(lengths) + max(key_count - 1, 0) != blob_size or sum(counts) != stamp_count:
+        raise ValueError(f"Corrupt rate limiter snapshot: {path}")
+
+    # Keys are NUL-separated; unless a key itself contains NUL, one split
+    # recovers them all without slicing per key
+    blob = bytes(view[counts_end:blob_end])
+    if not key_count:
+        keys = []
+    elif blob.count(b"\0") == key_count - 1:
+        keys = blob.decode("utf-8", "surrogatepass").split("\0")
+    else:
+        bounds = list(
+            itertools.accumulate((length + 1 for length in lengths), initial=0)
+        )
+        keys = [
+            blob[start : end - 1].decode("utf-8", "surrogatepass")
+            for start, end in zip(bounds, bounds[1:])
+        ]
+    return keys, counts, stamps
+
+
+class HeavyHitterTracker:
+    """
+    Approximate per-identifier request counts in fixed memory.
+
+    A count-min sketch (depth rows of width counters) estimates how often
+    each identifier was seen, and a min-heap keeps the top_k identifiers
+    with the highest estimates. Estimates never undercount; with
+    probability 1 - exp(-depth) they overcount by at most
+    e * total / width. Memory does not grow with the number of distinct
+    identifiers.
+
+    Each row takes its column from a separate bit field of the key's 64-bit
+    hash, so width must be a power of two and depth * log2(width) must not
+    exceed 64.
+    """
+
+    def __init__(self, width: int = 4096, depth: int = 4, top_k: int = 32):
+        if width < 2 or depth < 1 or top_k < 1:
+            raise ValueError("Sketch width, depth and top_k must be positive")
+        bits = width.bit_length() - 1
+        if width != 1 << bits or depth * bits > 64:
+            raise ValueError(
+                "Sketch width must be a power of two with depth * log2(width) <= 64"
+            )
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.total = 0
+        self._bits = bits
+        self._counters = array("Q", bytes(8 * width * depth))
+        self._rows = range(0, width * depth, width)
+        # Heap entries may lag behind _top; they are refreshed when they
+        # reach the root, which keeps updates for tracked keys O(1)
+        self._heap: list = []
+        self._top: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def sketch_bytes(self) -> int:
+        """Size of the counter table in bytes."""
+        return len(self._counters) * self._counters.itemsize
+
+    def add(self, key: str) -> int:
+        """
+        Count one occurrence of key.
+
+        Args:
+            key: Identifier to count
+
+        Returns:
+            int: Estimated number of occurrences so far
+        """
+        # str hashes are cached, so every row is addressed from one hash
+        hashed = hash(key)
+        mask = self.width - 1
+        bits = self._bits
+        counters = self._counters
+        estimate = 1 << 64
+
+        with self._lock:
+            self.total += 1
+            for row in self._rows:
+                slot = row + (hashed & mask)
+                hashed >>= bits
+                count = counters[slot] + 1
+                counters[slot] = count
+                if count < estimate:
+                    estimate = count
+
+            top = self._top
+            if key in top:
+                top[key] = estimate
+            elif len(top) < self.top_k:
+                top[key] = estimate
+                heapq.heappush(self._heap, (estimate, key))
+            elif estimate > self._heap[0][0]:
+                # Stale entries only understate a count, so the cheap check
+                # above rules out most keys before the root is refreshed
+                heap = self._heap
+                while heap[0][0] != top[heap[0][1]]:
+                    heapq.heapreplace(heap, (top[heap[0][1]], heap[0][1]))
+                if estimate > heap[0][0]:
+                    _, evicted = heapq.heapreplace(heap, (estimate, key))
+                    del top[evicted]
+                    top[key] = estimate
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        """
+        Estimate how many times key has been counted.
+
+        Args:
+            key: Identifier to look up
+
+        Returns:
+            int: Estimated count (never lower than the true count)
+        """
+        hashed = hash(key)
+        mask = self.width - 1
+        estimates = []
+        for row in self._rows:
+            estimates.append(self._counters[row + (hashed & mask)])
+            hashed >>= self._bits
+        return min(estimates)
+
+    def top_offenders(self, k: Optional[int] = None) -> list[Tuple[str, int]]:
+        """
+        Return the most frequent identifiers seen so far.
+
+        Args:
+            k: Maximum number of identifiers (defaults to top_k)
+
+        Returns:
+            list: (identifier, estimated count) pairs, most frequent first
+        """
+        with self._lock:
+            ranked = sorted(self._top.items(), key=lambda item: item[1], reverse=True)
+        return ranked[: self.top_k if k is None else k]
+
+    def reset(self) -> None:
+        """Forget every count."""
+        with self._lock:
+            self.total = 0
+            self._counters = array("Q", bytes(self.sketch_bytes))
+            self._heap.clear()
+            self._top.clear()
+
+
 class RateLimiter:
-    """Simple in-memory rate limiter."""
+    """
+    Simple in-memory rate limiter.
+
+    Timestamps come from clock, a callable returning integer nanoseconds;
+    the default monotonic clock is immune to wall-clock jumps, and a
+    VirtualClock lets simulations run faster than real time. A lock makes
+    each check-and-record atomic, so concurrent callers can never be
+    admitted past max_requests or race a sweep of idle identifiers.
+    """
+
+    # Minimum number of is_allowed calls between sweeps of idle identifiers
+    SWEEP_INTERVAL = 10000
 
-    def __init__(self, window_ms: int = 900000, max_requests: int = 100):
+    def __init__(
+        self,
+        window_ms: int = 900000,
+        max_requests: int = 100,
+        tracker: Optional[HeavyHitterTracker] = None,
+        clock: Optional[Callable[[], int]] = None,
+    ):
         self.window_ms = window_ms
         self.max_requests = max_requests
+        self.tracker = tracker
+        self.clock = clock or time.monotonic_ns
         self.requests: Dict[str, list] = {}
+        self._calls_until_sweep = self.SWEEP_INTERVAL
+        self._lock = threading.Lock()
+        self._snapshotter: Optional[Tuple[threading.Thread, threading.Event, str]] = (
+            None
+        )
+
+    @property
+    def window_ms(self) -> int:
+        """Length of the sliding window in milliseconds."""
+        return self.window_ns // NS_PER_MS
+
+    @window_ms.setter
+    def window_ms(self, value: int) -> None:
+        self.window_ns = int(value * NS_PER_MS)
 
     def is_allowed(self, identifier: str) -> bool:
         """
@@ -127,24 +540,36 @@ class RateLimiter:
         Returns:
             True if request is allowed
         """
-        now = time.time() * 1000  # Convert to milliseconds
-        window_start = now - self.window_ms
+        key = compact_key(identifier)
+        if self.tracker is not None:
+            self.tracker.add(key)
 
-        if identifier not in self.requests:
-            self.requests[identifier] = []
+        with self._lock:
+            # Read the clock under the lock so each list stays sorted
+            now = self.clock()
+            window_start = now - self.window_ns
 
-        user_requests = self.requests[identifier]
+            self._calls_until_sweep -= 1
+            if self._calls_until_sweep <= 0:
+                self._prune(now)
 
-        # Remove old requests outside the window
-        valid_requests = [t for t in user_requests if t > window_start]
-        self.requests[identifier] = valid_requests
+            user_requests = self.requests.get(key)
+            if user_requests is None:
+                if self.max_requests < 1:
+                    return False
+                self.requests[key] = [now]
+                return True
 
-        if len(valid_requests) >= self.max_requests:
-            return False
+            # Timestamps are appended in order, so expired ones form a prefix
+            if user_requests and user_requests[0] <= window_start:
+                del user_requests[: bisect.bisect_right(user_requests, window_start)]
 
-        # Add current request
-        valid_requests.append(now)
-        return True
+            if len(user_requests) >= self.max_requests:
+                return False
+
+            # Add current request
+            user_requests.append(now)
+            return True
 
     def get_remaining_requests(self, identifier: str) -> int:
         """
@@ -156,286 +581,3832 @@ class RateLimiter:
         Returns:
             Remaining requests
         """
-        now = time.time() * 1000
-        window_start = now - self.window_ms
+        key = compact_key(identifier)
+        with self._lock:
+            window_start = self.clock() - self.window_ns
 
-        if identifier not in self.requests:
-            return self.max_requests
+            user_requests = self.requests.get(key)
+            if user_requests is None:
+                return self.max_requests
 
-        user_requests = self.requests[identifier]
-        valid_requests = [t for t in user_requests if t > window_start]
+            expired = bisect.bisect_right(user_requests, window_start)
+            return max(0, self.max_requests - (len(user_requests) - expired))
 
-        return max(0, self.max_requests - len(valid_requests))
+    def prune(self, now: Optional[int] = None) -> int:
+        """
+        Forget identifiers with no requests left in the window.
 
+        Runs automatically every SWEEP_INTERVAL calls (or once per tracked
+        identifier, whichever is larger) so idle callers do not accumulate.
 
-# Global rate limiter instance
-rate_limiter = RateLimiter()
+        Args:
+            now: Current clock time in nanoseconds (defaults to clock())
 
-# =============================================================================
-# CONFIGURATION MANAGEMENT
-# =============================================================================
+        Returns:
+            int: Number of identifiers removed
+        """
+        with self._lock:
+            return self._prune(self.clock() if now is None else now)
+
+    def _prune(self, now: int) -> int:
+        """Sweep idle identifiers; the caller must hold the lock."""
+        window_start = now - self.window_ns
+        idle = [
+            key
+            for key, timestamps in self.requests.items()
+            if not timestamps or timestamps[-1] <= window_start
+        ]
+        for key in idle:
+            del self.requests[key]
+        self._calls_until_sweep = max(self.SWEEP_INTERVAL, len(self.requests))
+        return len(idle)
+
+    def snapshot(self, path: str) -> int:
+        """
+        Atomically write the limiter state to a binary snapshot file.
 
+        The file holds a fixed header followed by four columns: key byte
+        lengths (u16), per-key timestamp counts (u32), the NUL-separated
+        UTF-8 keys and the timestamps as int64 wall-clock nanoseconds, padded
+        to 8 bytes so restore can map the file and read every column without
+        copying.
 
-@dataclass
-class AppConfig:
-    """Application configuration container."""
+        Args:
+            path: Snapshot file path
 
-    app_name: str
-    app_version: str
-    environment: str
-    debug: bool
-    log_level: str
+        Returns:
+            int: Number of identifiers written
+        """
+        with _gc_paused():
+            # Only the copy holds the lock; encoding and I/O run without it
+            with self._lock:
+                keys = list(self.requests)
+                values = list(map(list.copy, self.requests.values()))
+                now = self.clock()
+
+            blob = "\0".join(keys).encode("utf-8", "surrogatepass")
+            if len(blob) == sum(map(len, keys)) + max(len(keys) - 1, 0):
+                lengths = array("H", map(len, keys))
+            else:
+                lengths = array(
+                    "H", [len(key.encode("utf-8", "surrogatepass")) for key in keys]
+                )
+            counts = array("I", map(len, values))
+            saved_at = time.time_ns()
+            to_wall = saved_at - now
+            stamps = array(
+                "q", map(to_wall.__add__, itertools.chain.from_iterable(values))
+            )
+        if sys.byteorder != "little":
+            for column in (lengths, counts, stamps):
+                column.byteswap()
+
+        header = RATE_LIMIT_SNAPSHOT_HEADER.pack(
+            RATE_LIMIT_SNAPSHOT_MAGIC,
+            RATE_LIMIT_SNAPSHOT_VERSION,
+            saved_at,
+            len(keys),
+            len(blob),
+            len(stamps),
+        )
+        padding = b"\0" * (
+            -(len(header) + len(lengths) * 2 + len(counts) * 4 + len(blob)) % 8
+        )
 
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".rate-limit-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(header)
+                handle.write(lengths)
+                handle.write(counts)
+                handle.write(blob)
+                handle.write(padding)
+                handle.write(stamps)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return len(keys)
+
+    def restore(self, path: str) -> int:
+        """
+        Replace the limiter state with the contents of a snapshot file.
 
-class ConfigurationError(Exception):
-    """Raised when configuration loading fails."""
+        Timestamps already outside the current window are dropped, as are
+        identifiers left with none.
 
+        Args:
+            path: Snapshot file path
 
-def load_configuration() -> AppConfig:
-    """
-    Load and validate environment configuration.
+        Returns:
+            int: Number of identifiers restored
 
-    Returns:
-        AppConfig: Application configuration object
+        Raises:
+            ValueError: If the file is not a valid rate limiter snapshot
+        """
+        with _gc_paused():
+            with open(path, "rb") as handle:
+                if os.fstat(handle.fileno()).st_size < RATE_LIMIT_SNAPSHOT_HEADER.size:
+                    raise ValueError(f"Truncated rate limiter snapshot: {path}")
+                with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    with memoryview(mapped) as view:
+                        keys, counts, stamps = _read_rate_limit_snapshot(view, path)
+
+            from_wall = self.clock() - time.time_ns()
+            stamps = list(map(from_wall.__add__, stamps))
+            stamp_ends = list(itertools.accumulate(counts))
+            stamp_starts = [0] + stamp_ends[:-1]
+            values = map(stamps.__getitem__, map(slice, stamp_starts, stamp_ends))
+            requests: Dict[str, list] = dict(zip(keys, values))
+
+            # Only walk the identifiers when something has actually expired
+            window_start = self.clock() - self.window_ns
+            if stamps and min(stamps) <= window_start:
+                for key, timestamps in list(requests.items()):
+                    if not timestamps or timestamps[-1] <= window_start:
+                        del requests[key]
+                    elif timestamps[0] <= window_start:
+                        del timestamps[: bisect.bisect_right(timestamps, window_start)]
+
+        with self._lock:
+            self.requests = requests
+            self._calls_until_sweep = max(self.SWEEP_INTERVAL, len(requests))
+        return len(requests)
+
+    def start_snapshots(self, path: str, interval: float) -> None:
+        """
+        Snapshot the limiter state to path every interval seconds.
 
-    Raises:
-        ConfigurationError: If configuration loading fails
-    """
-    try:
-        # Check if running in CI environment
-        is_ci = os.getenv("NODE_ENV") == "production" or os.getenv("CI") == "true"
+        A final snapshot is written when stop_snapshots is called.
 
-        if is_ci:
-            logging.info(
-                "🔧 Running in CI environment. Using environment variables directly."
-            )
-        else:
-            # Resolve the .env file path relative to the current working directory
-            env_path = Path(os.getcwd()) / ".env"
+        Args:
+            path: Snapshot file path
+            interval: Seconds between snapshots
 
-            # Check if .env file exists and load it
-            if not env_path.exists():
-                logging.warning(
-                    f"⚠️  .env file not found at {env_path}."
-                    " Using environment variables."
-                )
-            else:
-                logging.info(f"📄 Loading configuration from: {env_path}")
+        Raises:
+            ValueError: If interval is not positive
+        """
+        if interval <= 0:
+            raise ValueError("Snapshot interval must be positive")
+        self.stop_snapshots(final=False)
+        stop = threading.Event()
 
-                # Load environment variables with error handling for dotenv
+        def run() -> None:
+            while not stop.wait(interval):
                 try:
-                    from dotenv import load_dotenv
-
-                    # Load environment variables
-                    load_dotenv(env_path)
-                    logging.info("✅ .env file loaded successfully.")
-                except ImportError:
-                    logging.warning(
-                        "dotenv not available. Using default configuration."
+                    self.snapshot(path)
+                except OSError as e:
+                    logging.getLogger(__name__).warning(
+                        "Rate limiter snapshot failed: %s", e
                     )
-                    return get_default_config()
-                except Exception as error:
-                    logging.warning(f"⚠️  Failed to load .env file: {error}")
-                    logging.info("🔄 Falling back to environment variables.")
 
-        config = AppConfig(
-            app_name=os.getenv("APP_NAME") or "Project Template",
-            app_version=os.getenv("APP_VERSION") or "1.0.0",
-            environment=os.getenv("APP_ENV") or "development",
-            debug=(os.getenv("DEBUG") or "false").lower() == "true",
-            log_level=os.getenv("LOG_LEVEL") or "INFO",
-        )
+        thread = threading.Thread(target=run, name="rate-limit-snapshot", daemon=True)
+        self._snapshotter = (thread, stop, path)
+        thread.start()
 
-        # Validate configuration
-        validate_config(config)
+    def stop_snapshots(self, final: bool = True) -> None:
+        """
+        Stop periodic snapshots started with start_snapshots.
 
-        # Check for sensitive information in configuration
-        for key, value in os.environ.items():
-            if is_sensitive_value(key, value):
-                logging.warning(
-                    "⚠️  Potential sensitive information detected in environment "
-                    "variable: %s",
-                    key,
-                )
-                logging.warning(
-                    "Use secure vaults or encrypted storage for sensitive data."
-                )
+        Args:
+            final: Whether to write one last snapshot after stopping
+        """
+        snapshotter = getattr(self, "_snapshotter", None)
+        if snapshotter is None:
+            return
+        thread, stop, path = snapshotter
+        self._snapshotter = None
+        stop.set()
+        thread.join()
+        if final:
+            self.snapshot(path)
 
-        return config
 
-    except (FileNotFoundError, PermissionError) as error:
-        raise ConfigurationError(f"Configuration file access error: {error}") from error
-    except (ValueError, TypeError) as error:
-        raise ConfigurationError(f"Configuration validation error: {error}") from error
-    except ImportError as error:
-        raise ConfigurationError(f"Missing dependency: {error}") from error
-    except ConfigurationError as error:
-        raise ConfigurationError(f"Configuration error: {error}") from error
+# Scopes a hierarchical rate limit level can apply to
+RATE_LIMIT_SCOPES = ("caller", "tenant", "global")
 
+# Key of the single bucket used by global levels
+GLOBAL_RATE_LIMIT_KEY = ""
 
-def get_default_config() -> AppConfig:
-    """Get default configuration values."""
-    return AppConfig(
-        app_name="Project Template",
-        app_version="1.0.0",
-        environment="development",
-        debug=False,
-        log_level="INFO",
-    )
 
+@dataclass(frozen=True)
+class RateLimitLevel:
+    """One level of a hierarchical rate limit."""
 
-def validate_config(config: AppConfig) -> None:
-    """
-    Validate configuration values.
+    name: str
+    scope: str
+    window_ms: int
+    max_requests: int
 
-    Args:
-        config: Configuration to validate
 
-    Raises:
-        ConfigurationError: If validation fails
+class HierarchicalRateLimiter:
     """
-    valid_log_levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
-    if config.log_level.upper() not in valid_log_levels:
-        raise ConfigurationError(
-            f"Invalid log_level '{config.log_level}'. Must be one of {valid_log_levels}"
-        )
+    Per-caller, per-tenant and global limits enforced together.
 
-    if not config.app_name.strip():
-        raise ConfigurationError("app_name cannot be empty")
+    Every level is checked before any is charged, so a request counts
+    against all applicable levels or against none, and check reports the
+    first level that rejected it. Tenant levels are skipped for requests
+    without a tenant. Time comes from clock, and checks are serialized by
+    a lock, as for RateLimiter.
+    """
 
-    if not config.app_version.strip():
-        raise ConfigurationError("app_version cannot be empty")
+    SWEEP_INTERVAL = RateLimiter.SWEEP_INTERVAL
 
-    # Validate semantic version format (allow 1.0 or 1.0.0)
-    if not re.match(r"^\d+\.\d+(\.\d+)?$", config.app_version):
-        raise ConfigurationError(
-            "app_version must be in semantic version format "
-            f"(e.g., 1.0 or 1.0.0), got '{config.app_version}'"
-        )
+    def __init__(
+        self,
+        levels: list[RateLimitLevel],
+        clock: Optional[Callable[[], int]] = None,
+    ):
+        if not levels:
+            raise ValueError("At least one rate limit level is required")
+        names = [level.name for level in levels]
+        if len(set(names)) != len(names):
+            raise ValueError("Rate limit level names must be unique")
+        for level in levels:
+            if level.scope not in RATE_LIMIT_SCOPES:
+                raise ValueError(
+                    f"Invalid rate limit scope '{level.scope}'. "
+                    f"Must be one of: {', '.join(RATE_LIMIT_SCOPES)}"
+                )
+        self.levels = tuple(levels)
+        self.clock = clock or time.monotonic_ns
+        self.requests: list[Dict[str, list]] = [{} for _ in levels]
+        self.rejections: Dict[str, int] = dict.fromkeys(names, 0)
+        self._plan = [
+            (
+                level.name,
+                RATE_LIMIT_SCOPES.index(level.scope),
+                level.window_ms * NS_PER_MS,
+                level.max_requests,
+                requests,
+            )
+            for level, requests in zip(self.levels, self.requests)
+        ]
+        self._calls_until_sweep = self.SWEEP_INTERVAL
+        self._lock = threading.Lock()
 
-    valid_environments = ["development", "staging", "production"]
-    if config.environment.lower() not in valid_environments:
-        raise ConfigurationError(
-            f"Invalid environment '{config.environment}'. "
-            f"Must be one of {valid_environments}"
-        )
+    def check(self, caller: str, tenant: Optional[str] = None) -> Optional[str]:
+        """
+        Charge a request to every level, unless one of them rejects it.
+
+        Args:
+            caller: Caller identity (IP, user ID or API key)
+            tenant: Tenant the request belongs to, if any
 
+        Returns:
+            None if the request is allowed, else the name of the level that
+            rejected it
+        """
+        keys = (
+            compact_key(caller),
+            None if tenant is None else compact_key(tenant),
+            GLOBAL_RATE_LIMIT_KEY,
+        )
+        with self._lock:
+            now = self.clock()
+
+            self._calls_until_sweep -= 1
+            if self._calls_until_sweep <= 0:
+                self._prune(now)
+
+            charged = []
+            for name, scope, window_ns, max_requests, requests in self._plan:
+                key = keys[scope]
+                if key is None:
+                    continue
+                timestamps = requests.get(key)
+                if timestamps is None:
+                    # Left empty if a later level rejects; prune removes it
+                    timestamps = requests[key] = []
+                else:
+                    window_start = now - window_ns
+                    if timestamps and timestamps[0] <= window_start:
+                        del timestamps[: bisect.bisect_right(timestamps, window_start)]
+                if len(timestamps) >= max_requests:
+                    self.rejections[name] += 1
+                    return name
+                charged.append(timestamps)
+
+            for timestamps in charged:
+                timestamps.append(now)
+            return None
+
+    def is_allowed(self, caller: str, tenant: Optional[str] = None) -> bool:
+        """
+        Check if request is allowed, charging every level if it is.
+
+        Args:
+            caller: Caller identity (IP, user ID or API key)
+            tenant: Tenant the request belongs to, if any
+
+        Returns:
+            True if request is allowed
+        """
+        return self.check(caller, tenant) is None
+
+    def for_tenant(self, tenant: str) -> "TenantRateLimiter":
+        """
+        Get a RateLimiter-compatible view that charges requests to a tenant.
+
+        Args:
+            tenant: Tenant identifier
+
+        Returns:
+            TenantRateLimiter: View usable wherever a RateLimiter is
+        """
+        return TenantRateLimiter(self, tenant)
+
+    def prune(self, now: Optional[int] = None) -> int:
+        """
+        Forget buckets with no requests left in their level's window.
+
+        Args:
+            now: Current clock time in nanoseconds (defaults to clock())
+
+        Returns:
+            int: Number of buckets removed
+        """
+        with self._lock:
+            return self._prune(self.clock() if now is None else now)
+
+    def _prune(self, now: int) -> int:
+        """Sweep idle buckets; the caller must hold the lock."""
+        removed = 0
+        tracked = 0
+        for _, _, window_ns, _, requests in self._plan:
+            window_start = now - window_ns
+            idle = [
+                key
+                for key, timestamps in requests.items()
+                if not timestamps or timestamps[-1] <= window_start
+            ]
+            for key in idle:
+                del requests[key]
+            removed += len(idle)
+            tracked += len(requests)
+        self._calls_until_sweep = max(self.SWEEP_INTERVAL, tracked)
+        return removed
+
+
+class TenantRateLimiter:
+    """View of a HierarchicalRateLimiter bound to one tenant."""
+
+    __slots__ = ("limiter", "tenant")
+
+    def __init__(self, limiter: HierarchicalRateLimiter, tenant: str):
+        self.limiter = limiter
+        self.tenant = tenant
+
+    def is_allowed(self, identifier: str) -> bool:
+        """
+        Check if request is allowed for this tenant.
+
+        Args:
+            identifier: Caller identity
+
+        Returns:
+            True if request is allowed
+        """
+        return self.limiter.check(identifier, self.tenant) is None
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency limit tuned by AIMD from observed latency.
+
+    Latencies are collected in batches of sample_size completed requests.
+    When a batch's p95 is within target_p95_ms the limit grows by increase
+    (additive increase); when it exceeds the target the limit is multiplied
+    by backoff (multiplicative decrease). The limit stays within
+    [min_limit, max_limit].
+    """
+
+    def __init__(
+        self,
+        target_p95_ms: float = 50.0,
+        initial_limit: int = 16,
+        min_limit: int = 1,
+        max_limit: int = 1024,
+        sample_size: int = 100,
+        increase: float = 1.0,
+        backoff: float = 0.75,
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min <= initial <= max")
+        if target_p95_ms <= 0 or sample_size < 1 or increase <= 0:
+            raise ValueError("Target, sample size and increase must be positive")
+        if not 0 < backoff < 1:
+            raise ValueError("Backoff must be between 0 and 1")
+        self.target_p95_ms = target_p95_ms
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.sample_size = sample_size
+        self.increase = increase
+        self.backoff = backoff
+        self.in_flight = 0
+        self.rejected = 0
+        self.last_p95_ms: Optional[float] = None
+        self._limit = float(initial_limit)
+        self._samples: list[float] = []
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed to run at once."""
+        return int(self._limit)
+
+    def try_acquire(self) -> bool:
+        """
+        Claim a concurrency slot without waiting.
+
+        Returns:
+            True if a slot was claimed; release must then be called
+        """
+        with self._lock:
+            if self.in_flight >= int(self._limit):
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency_ms: Optional[float]) -> None:
+        """
+        Return a slot and record how long its request took.
+
+        Args:
+            latency_ms: Latency of the completed request in milliseconds, or
+                None to return the slot without recording a sample
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if latency_ms is None:
+                return
+            samples = self._samples
+            samples.append(latency_ms)
+            if len(samples) < self.sample_size:
+                return
+
+            samples.sort()
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            samples.clear()
+            self.last_p95_ms = p95
+            if p95 > self.target_p95_ms:
+                self._limit = max(float(self.min_limit), self._limit * self.backoff)
+            else:
+                self._limit = min(float(self.max_limit), self._limit + self.increase)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get the limiter's current state.
+
+        Returns:
+            dict: Current limit, requests in flight, rejections and last p95
+        """
+        with self._lock:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self.in_flight,
+                "rejected": self.rejected,
+                "p95_ms": self.last_p95_ms,
+                "target_p95_ms": self.target_p95_ms,
+            }
+
+
+# Global adaptive concurrency limiter, disabled unless ADAPTIVE_CONCURRENCY=true
+concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None
+
+CONCURRENCY_LIMIT_MESSAGE = "Too many concurrent requests. Please try again later."
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter()
+
+# Bucket shared by greet calls that do not identify their caller
+SHARED_RATE_LIMIT_KEY = "greet_function"
+
+RATE_LIMIT_MESSAGE = "Rate limit exceeded. Please try again later."
+
+
+# Denylist filter file layout: magic, version, bit count, hash count, entry
+# count, exact digest count; the bit array and sorted u64 digests follow,
+# each starting on an 8-byte boundary
+DENYLIST_MAGIC = b"PTBF"
+DENYLIST_VERSION = 1
+DENYLIST_HEADER = struct.Struct("<4sHQBQQ")
+_DENYLIST_DIGEST = struct.Struct("<QQ")
+
+
+def _denylist_hashes(identifier: str) -> Tuple[int, int]:
+    """Derive the two 64-bit hashes used to index a denylist filter."""
+    first, step = _DENYLIST_DIGEST.unpack(
+        hashlib.blake2b(
+            identifier.encode("utf-8", "surrogatepass"), digest_size=16
+        ).digest()
+    )
+    # An odd step never reduces to zero modulo the (even) bit count
+    return first, step | 1
+
+
+def read_denylist_entries(path: str) -> list[str]:
+    """
+    Read denied identifiers from a text file, one per line.
+
+    Blank lines and lines starting with # are ignored.
+
+    Args:
+        path: Path to the denylist source file
+
+    Returns:
+        list[str]: Denied identifiers
+    """
+    with open(path, encoding="utf-8") as handle:
+        return [
+            line for line in map(str.strip, handle) if line and not line.startswith("#")
+        ]
+
+
+class Denylist:
+    """
+    Bloom filter of denied identifiers, optionally with exact confirmation.
+
+    Membership is checked with num_hashes probes derived from one 128-bit
+    blake2b digest (double hashing), so filters are deterministic across processes
+    and can be saved once and mapped by every worker. A filter built with
+    exact=True also keeps the sorted 64-bit digests of its entries and
+    confirms every filter hit against them, removing false positives.
+    """
+
+    def __init__(
+        self,
+        bits: Any,
+        num_bits: int,
+        num_hashes: int,
+        count: int,
+        digests: Optional[Any] = None,
+        mapped: Optional[mmap.mmap] = None,
+    ):
+        self._bits = bits
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.count = count
+        self._digests = digests
+        # Keeps the mapping of a loaded filter alive while it is in use
+        self._mapped = mapped
+
+    @classmethod
+    def build(
+        cls, entries: list[str], error_rate: float = 0.001, exact: bool = False
+    ) -> "Denylist":
+        """
+        Build a filter sized for the given entries.
+
+        Args:
+            entries: Denied identifiers
+            error_rate: Target false positive rate of the filter alone
+            exact: Whether to keep digests for exact confirmation
+
+        Returns:
+            Denylist: The new filter
+
+        Raises:
+            ValueError: If error_rate is not between 0 and 1
+        """
+        if not 0 < error_rate < 1:
+            raise ValueError("Denylist error rate must be between 0 and 1")
+        count = len(entries)
+        ideal = -max(count, 1) * math.log(error_rate) / math.log(2) ** 2
+        num_bits = max(64, -(-int(ideal) // 64) * 64)
+        num_hashes = max(1, round(num_bits / max(count, 1) * math.log(2)))
+
+        bits = bytearray(num_bits // 8)
+        digests = array("Q") if exact else None
+        probes = range(num_hashes)
+        for entry in entries:
+            first, step = _denylist_hashes(entry)
+            if digests is not None:
+                digests.append(first)
+            index = first % num_bits
+            step %= num_bits
+            for _ in probes:
+                bits[index >> 3] |= 1 << (index & 7)
+                index += step
+                if index >= num_bits:
+                    index -= num_bits
+
+        if digests is not None:
+            digests = array("Q", sorted(set(digests)))
+        return cls(bits, num_bits, num_hashes, count, digests)
+
+    @classmethod
+    def load(cls, path: str) -> "Denylist":
+        """
+        Map a saved filter without copying it into memory.
+
+        Args:
+            path: Path written by save
+
+        Returns:
+            Denylist: The mapped filter
+
+        Raises:
+            ValueError: If the file is not a valid denylist filter
+        """
+        with open(path, "rb") as handle:
+            if os.fstat(handle.fileno()).st_size < DENYLIST_HEADER.size:
+                raise ValueError(f"Truncated denylist filter: {path}")
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, num_bits, num_hashes, count, digest_count = (
+            DENYLIST_HEADER.unpack_from(mapped)
+        )
+        bits_start = DENYLIST_HEADER.size + (-DENYLIST_HEADER.size % 8)
+        digests_start = bits_start + num_bits // 8
+        if (
+            magic != DENYLIST_MAGIC
+            or version != DENYLIST_VERSION
+            or num_bits % 64
+            or not num_bits
+            or not num_hashes
+        ):
+            mapped.close()
+            raise ValueError(f"Not a denylist filter: {path}")
+        if len(mapped) != digests_start + digest_count * 8:
+            mapped.close()
+            raise ValueError(f"Truncated denylist filter: {path}")
+
+        view = memoryview(mapped)
+        digests = None
+        if digest_count:
+            if sys.byteorder == "little":
+                digests = view[digests_start:].cast("Q")
+            else:
+                digests = array("Q", view[digests_start:])
+                digests.byteswap()
+        return cls(
+            view[bits_start:digests_start],
+            num_bits,
+            num_hashes,
+            count,
+            digests,
+            mapped,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the bit array and exact digests."""
+        digests = 0 if self._digests is None else len(self._digests) * 8
+        return self.num_bits // 8 + digests
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, identifier: str) -> bool:
+        first, step = _denylist_hashes(identifier)
+        bits = self._bits
+        num_bits = self.num_bits
+        # Double hashing: probe i tests bit (first + i * step) mod num_bits
+        index = first % num_bits
+        step %= num_bits
+        for _ in range(self.num_hashes):
+            if not bits[index >> 3] & 1 << (index & 7):
+                return False
+            index += step
+            if index >= num_bits:
+                index -= num_bits
+
+        digests = self._digests
+        if digests is None:
+            return True
+        position = bisect.bisect_left(digests, first)
+        return position < len(digests) and digests[position] == first
+
+    def save(self, path: str) -> None:
+        """
+        Atomically write the filter so it can be mapped with load.
+
+        Args:
+            path: Filter file path
+        """
+        digests = self._digests
+        header = DENYLIST_HEADER.pack(
+            DENYLIST_MAGIC,
+            DENYLIST_VERSION,
+            self.num_bits,
+            self.num_hashes,
+            self.count,
+            0 if digests is None else len(digests),
+        )
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".denylist-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(header)
+                handle.write(b"\0" * (-len(header) % 8))
+                handle.write(self._bits)
+                if digests is not None:
+                    if sys.byteorder != "little":
+                        digests = array("Q", digests)
+                        digests.byteswap()
+                    handle.write(digests)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+class DenylistGuard:
+    """
+    Holds the active denylist for the greet path.
+
+    Rebuilds run on a background thread and the finished filter replaces
+    the old one with a single reference assignment, so checks never see a
+    partially built filter and never block on a rebuild.
+    """
+
+    def __init__(self, denylist: Optional[Denylist] = None):
+        self.denylist = denylist
+
+    def check(self, identifier: str) -> None:
+        """
+        Reject a denied caller.
+
+        Args:
+            identifier: Caller identity (IP, user ID or API key)
+
+        Raises:
+            DeniedError: If the caller is on the denylist
+        """
+        denylist = self.denylist
+        if denylist is not None and identifier in denylist:
+            raise DeniedError("Access denied.")
+
+    def swap(self, denylist: Optional[Denylist]) -> Optional[Denylist]:
+        """
+        Install a new denylist.
+
+        Args:
+            denylist: Filter to install, or None to allow every caller
+
+        Returns:
+            The previously installed filter
+        """
+        previous = self.denylist
+        self.denylist = denylist
+        return previous
+
+    def rebuild(
+        self,
+        source: str,
+        error_rate: float = 0.001,
+        exact: bool = False,
+        save_path: Optional[str] = None,
+    ) -> threading.Thread:
+        """
+        Build a filter from a source file in the background, then swap it in.
+
+        Args:
+            source: Text file of denied identifiers, one per line
+            error_rate: Target false positive rate of the filter
+            exact: Whether to confirm filter hits exactly
+            save_path: Where to also save the built filter, if anywhere
+
+        Returns:
+            threading.Thread: The running rebuild thread
+        """
+        logger = logging.getLogger(__name__)
+
+        def run() -> None:
+            try:
+                denylist = Denylist.build(
+                    read_denylist_entries(source), error_rate, exact
+                )
+                if save_path:
+                    denylist.save(save_path)
+            except (OSError, ValueError) as e:
+                logger.warning("Denylist rebuild from %s failed: %s", source, e)
+                return
+            self.swap(denylist)
+            logger.info("Denylist rebuilt with %d entries", len(denylist))
+
+        thread = threading.Thread(target=run, name="denylist-rebuild", daemon=True)
+        thread.start()
+        return thread
+
+
+# Global denylist, empty unless DENYLIST_FILE is configured
+denylist_guard = DenylistGuard()
+
+
+# =============================================================================
+# TRACING
+# =============================================================================
+
+# Span active in the current thread or asyncio task
+_current_span: contextvars.ContextVar = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class Span:
+    """
+    A timed operation, nested under the span active when it was started.
+
+    Start and end times are wall-clock nanoseconds, with the duration taken
+    from the monotonic performance counter so it is immune to clock steps.
+    """
+
+    __slots__ = (
+        "tracer",
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "error",
+        "_perf_start",
+        "_token",
+    )
+    recording = True
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        attributes: Dict[str, Any],
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = self.end_ns = 0
+        self.error: Optional[str] = None
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        self._perf_start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = self.start_ns + time.perf_counter_ns() - self._perf_start
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.tracer.exporter.export(self)
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach a key/value pair to the span."""
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to an OTLP-like JSON-serializable record."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": "SPAN_KIND_INTERNAL",
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": (
+                {"code": "STATUS_CODE_ERROR", "message": self.error}
+                if self.error
+                else {"code": "STATUS_CODE_OK"}
+            ),
+        }
+
+
+class NonRecordingSpan:
+    """Span that records nothing; the shared NOOP_SPAN is stateless."""
+
+    __slots__ = ()
+    recording = False
+
+    def __enter__(self) -> "NonRecordingSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Ignore the attribute."""
+
+
+NOOP_SPAN = NonRecordingSpan()
+
+
+class _UnsampledSpan(NonRecordingSpan):
+    """Root that lost the sampling draw; it stays active so its children do."""
+
+    __slots__ = ("_token",)
+
+    def __enter__(self) -> "_UnsampledSpan":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _current_span.reset(self._token)
+        return False
+
+
+# Reused across batches; attribute values that are not JSON types become str
+_SPAN_ENCODER = json.JSONEncoder(default=str, check_circular=False)
+
+
+class NdjsonSpanExporter:
+    """
+    Append finished spans to a local NDJSON file, one span per line.
+
+    Spans are buffered and serialized in batches, so exporting costs a list
+    append on the request path. Each batch is one write() on an O_APPEND
+    descriptor, so processes sharing the file (pre-fork workers) never
+    interleave partial lines.
+    """
+
+    def __init__(self, path: str, service_name: str = "app", batch_size: int = 256):
+        """
+        Open the export file for appending.
+
+        Args:
+            path: NDJSON file to append to
+            service_name: Value of the service.name resource attribute
+            batch_size: Spans buffered before they are written
+        """
+        self.path = path
+        self.resource = {"service.name": service_name}
+        self.batch_size = batch_size
+        self.exported = 0
+        self._buffer: list = []
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = os.open(
+            path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+        )
+
+    def export(self, span: Span) -> None:
+        """Queue a finished span for writing."""
+        with self._lock:
+            self._buffer.append(span)
+            if len(self._buffer) >= self.batch_size:
+                self._write()
+
+    def flush(self) -> None:
+        """Write every buffered span to the file."""
+        with self._lock:
+            self._write()
+
+    def close(self) -> None:
+        """Flush and close the file; later exports are dropped."""
+        with self._lock:
+            self._write()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            self.batch_size = sys.maxsize
+
+    def _write(self) -> None:
+        """Serialize the buffer; the caller must hold the lock."""
+        if not self._buffer or self._fd is None:
+            self._buffer.clear()
+            return
+        resource = self.resource
+        encode = _SPAN_ENCODER.encode
+        data = "".join(
+            encode({"resource": resource, **span.to_dict()}) + "\n"
+            for span in self._buffer
+        ).encode("utf-8")
+        view = memoryview(data)
+        while view:
+            # One call unless a full disk or a signal cuts the write short
+            view = view[os.write(self._fd, view) :]
+        self.exported += len(self._buffer)
+        self._buffer.clear()
+
+
+class Tracer:
+    """
+    Creates spans and hands finished ones to an exporter.
+
+    Sampling is decided once per trace, at its root span (head sampling):
+    children of a sampled root are always recorded and children of an
+    unsampled one never are. The active span lives in a context variable,
+    so it follows asyncio tasks automatically and threads started through
+    propagate_context.
+    """
+
+    enabled = True
+
+    def __init__(self, exporter: NdjsonSpanExporter, sample_rate: float = 1.0):
+        """
+        Initialize the tracer.
+
+        Args:
+            exporter: Destination for finished spans
+            sample_rate: Fraction of traces to record (0 to 1)
+
+        Raises:
+            ValueError: If sample_rate is out of range
+        """
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def span(self, name: str, **attributes: Any):
+        """
+        Create a span to use as a context manager.
+
+        Args:
+            name: Operation name
+            **attributes: Initial span attributes
+
+        Returns:
+            A Span, or a non-recording span when the trace is not sampled
+        """
+        parent = _current_span.get()
+        if parent is None:
+            if self.sample_rate < 1 and random.random() >= self.sample_rate:
+                return _UnsampledSpan()
+            return Span(self, name, f"{random.getrandbits(128):032x}", None, attributes)
+        if not parent.recording:
+            return NOOP_SPAN
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+    def shutdown(self) -> None:
+        """Flush and close the exporter."""
+        self.exporter.close()
+
+
+class NoopTracer:
+    """Tracer used while tracing is disabled; every span is NOOP_SPAN."""
+
+    enabled = False
+
+    def span(self, name: str, **attributes: Any) -> NonRecordingSpan:
+        """Return the shared no-op span."""
+        return NOOP_SPAN
+
+    def shutdown(self) -> None:
+        """Do nothing."""
+
+
+NOOP_TRACER = NoopTracer()
+
+# Global tracer, a no-op unless TRACE_FILE is configured
+tracer: Any = NOOP_TRACER
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorate a function so each call runs in a span of the global tracer.
+
+    Args:
+        name: Span name
+
+    Returns:
+        Decorator
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with tracer.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def propagate_context(func: Callable) -> Callable:
+    """
+    Bind a callable to the current context, including the active span.
+
+    Threads do not inherit context variables, so wrap a thread target (or
+    an executor task) with this to nest its spans under the caller's.
+
+    Args:
+        func: Callable to run in the captured context
+
+    Returns:
+        Callable that runs func in a copy of the current context
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def run(*args: Any, **kwargs: Any) -> Any:
+        # Each call gets its own copy: a context cannot be entered twice
+        return context.copy().run(func, *args, **kwargs)
+
+    return run
+
+
+# =============================================================================
+# CONFIGURATION MANAGEMENT
+# =============================================================================
+
+
+@dataclass
+class AppConfig:
+    """Application configuration container."""
+
+    app_name: str
+    app_version: str
+    environment: str
+    debug: bool
+    log_level: str
+
+
+class ConfigurationError(Exception):
+    """Raised when configuration loading fails."""
+
+
+# Configuration snapshot (opt-in via CONFIG_SNAPSHOT=<path>)
+CONFIG_SNAPSHOT_MAGIC = b"PTCS"
+CONFIG_SNAPSHOT_VERSION = 2
+CONFIG_SNAPSHOT_HEADER = struct.Struct("<4sB16sB")
+CONFIG_SOURCE_ENV_KEYS = (
+    "NODE_ENV",
+    "CI",
+    "APP_NAME",
+    "APP_VERSION",
+    "APP_ENV",
+    "DEBUG",
+    "LOG_LEVEL",
+)
+
+
+def config_fingerprint(env_path: Optional[Path] = None) -> bytes:
+    """
+    Compute a digest of every source load_configuration reads.
+
+    Covers the environment variables that feed AppConfig and the path and
+    contents of the .env file. Must be taken before the .env file is loaded,
+    since loading it mutates os.environ.
+
+    Args:
+        env_path: Path to the .env file (defaults to ./.env)
+
+    Returns:
+        bytes: 16-byte fingerprint
+    """
+    if env_path is None:
+        env_path = Path(os.getcwd()) / ".env"
+
+    digest = hashlib.blake2b(digest_size=16)
+
+    def feed(data: Optional[bytes]) -> None:
+        if data is None:
+            digest.update(b"\xff\xff\xff\xff")
+        else:
+            digest.update(struct.pack("<I", len(data)))
+            digest.update(data)
+
+    feed(str(env_path).encode("utf-8", "surrogateescape"))
+    for key in CONFIG_SOURCE_ENV_KEYS:
+        value = os.environ.get(key)
+        feed(None if value is None else value.encode("utf-8", "surrogateescape"))
+
+    try:
+        feed(env_path.read_bytes())
+    except OSError:
+        feed(None)
+
+    return digest.digest()
+
+
+def write_config_snapshot(
+    path: str,
+    config: AppConfig,
+    fingerprint: bytes,
+    environ: Optional[Mapping[str, str]] = None,
+) -> None:
+    """
+    Atomically write a validated configuration snapshot.
+
+    Args:
+        path: Snapshot file path
+        config: Validated configuration
+        fingerprint: Fingerprint of the sources the configuration came from
+        environ: Variables the .env file defines, restored on a snapshot hit
+            so settings outside AppConfig still see them
+    """
+    parts = [
+        CONFIG_SNAPSHOT_HEADER.pack(
+            CONFIG_SNAPSHOT_MAGIC,
+            CONFIG_SNAPSHOT_VERSION,
+            fingerprint,
+            1 if config.debug else 0,
+        )
+    ]
+    for value in (
+        config.app_name,
+        config.app_version,
+        config.environment,
+        config.log_level,
+    ):
+        encoded = value.encode("utf-8")
+        parts.append(struct.pack("<H", len(encoded)))
+        parts.append(encoded)
+    environ = environ or {}
+    parts.append(struct.pack("<H", len(environ)))
+    for item in environ.items():
+        for value in item:
+            encoded = value.encode("utf-8", "surrogateescape")
+            parts.append(struct.pack("<I", len(encoded)))
+            parts.append(encoded)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".config-snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(b"".join(parts))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_config_snapshot(
+    path: str, fingerprint: bytes, environ: Optional[Dict[str, str]] = None
+) -> Optional[AppConfig]:
+    """
+    Read a configuration snapshot if it matches the current sources.
+
+    Args:
+        path: Snapshot file path
+        fingerprint: Fingerprint of the current sources
+        environ: Filled with the stored .env variables on a hit
+
+    Returns:
+        AppConfig if the snapshot is present, intact and current, else None
+    """
+    try:
+        with open(path, "rb") as handle:
+            data = handle.read()
+    except OSError:
+        return None
+
+    try:
+        magic, version, stored, debug = CONFIG_SNAPSHOT_HEADER.unpack_from(data)
+        if (
+            magic != CONFIG_SNAPSHOT_MAGIC
+            or version != CONFIG_SNAPSHOT_VERSION
+            or stored != fingerprint
+        ):
+            return None
+
+        offset = CONFIG_SNAPSHOT_HEADER.size
+        values = []
+        for _ in range(4):
+            (length,) = struct.unpack_from("<H", data, offset)
+            offset += 2
+            end = offset + length
+            if end > len(data):
+                return None
+            values.append(data[offset:end].decode("utf-8"))
+            offset = end
+        (count,) = struct.unpack_from("<H", data, offset)
+        offset += 2
+        stored_environ = {}
+        for _ in range(count):
+            item = []
+            for _ in range(2):
+                (length,) = struct.unpack_from("<I", data, offset)
+                offset += 4
+                end = offset + length
+                if end > len(data):
+                    return None
+                item.append(data[offset:end].decode("utf-8", "surrogateescape"))
+                offset = end
+            stored_environ[item[0]] = item[1]
+        if offset != len(data):
+            return None
+    except (struct.error, UnicodeDecodeError):
+        return None
+
+    if environ is not None:
+        environ.update(stored_environ)
+
+    app_name, app_version, environment, log_level = values
+    return AppConfig(
+        app_name=app_name,
+        app_version=app_version,
+        environment=environment,
+        debug=bool(debug),
+        log_level=log_level,
+    )
+
+
+@traced("startup.load_configuration")
+def load_configuration(snapshot_path: Optional[str] = None) -> AppConfig:
+    """
+    Load and validate environment configuration.
+
+    When a snapshot path is given (or CONFIG_SNAPSHOT is set), a snapshot
+    whose fingerprint matches the current sources is returned without
+    importing dotenv or re-validating; the variables the .env file defines are
+    put back into os.environ without overriding it, as load_dotenv would. Otherwise the
+    configuration is loaded normally and the snapshot is rewritten.
+
+    Args:
+        snapshot_path: Optional path of the configuration snapshot file
+
+    Returns:
+        AppConfig: Application configuration object
+
+    Raises:
+        ConfigurationError: If configuration loading fails
+    """
+    snapshot_path = snapshot_path or os.getenv("CONFIG_SNAPSHOT")
+    if not snapshot_path:
+        return _load_configuration_from_sources()
+
+    fingerprint = config_fingerprint()
+    environ: Dict[str, str] = {}
+    config = read_config_snapshot(snapshot_path, fingerprint, environ)
+    if config is not None:
+        logging.debug("⚡ Configuration loaded from snapshot: %s", snapshot_path)
+        for key, value in environ.items():
+            # Like load_dotenv, never override the real environment
+            os.environ.setdefault(key, value)
+        warn_sensitive_environment()
+        return config
+
+    environ = _env_file_values()
+    config = _load_configuration_from_sources()
+    try:
+        write_config_snapshot(snapshot_path, config, fingerprint, environ)
+    except OSError as error:
+        logging.warning("⚠️  Failed to write configuration snapshot: %s", error)
+    return config
+
+
+def _env_file_values() -> Dict[str, str]:
+    """
+    Read the variables _load_configuration_from_sources takes from .env.
+
+    Empty in CI, where the .env file is not loaded, and when the file is
+    missing or dotenv is unavailable. Read before loading, since the .env
+    file may itself set NODE_ENV or CI.
+    """
+    if os.getenv("NODE_ENV") == "production" or os.getenv("CI") == "true":
+        return {}
+    env_path = Path(os.getcwd()) / ".env"
+    if not env_path.exists():
+        return {}
+    try:
+        from dotenv import dotenv_values
+
+        values = dotenv_values(env_path)
+    except (ImportError, OSError):
+        return {}
+    return {key: value for key, value in values.items() if value is not None}
+
+
+def warn_sensitive_environment() -> None:
+    """Warn about environment variables that look like secrets."""
+    for key, value in os.environ.items():
+        if is_sensitive_value(key, value):
+            logging.warning(
+                "⚠️  Potential sensitive information detected in environment "
+                "variable: %s",
+                key,
+            )
+            logging.warning(
+                "Use secure vaults or encrypted storage for sensitive data."
+            )
+
+
+def _load_configuration_from_sources() -> AppConfig:
+    """Load configuration from .env and the environment, then validate it."""
+    try:
+        # Check if running in CI environment
+        is_ci = os.getenv("NODE_ENV") == "production" or os.getenv("CI") == "true"
+
+        if is_ci:
+            logging.info(
+                "🔧 Running in CI environment. Using environment variables directly."
+            )
+        else:
+            # Resolve the .env file path relative to the current working directory
+            env_path = Path(os.getcwd()) / ".env"
+
+            # Check if .env file exists and load it
+            if not env_path.exists():
+                logging.warning(
+                    f"⚠️  .env file not found at {env_path}."
+                    " Using environment variables."
+                )
+            else:
+                logging.info(f"📄 Loading configuration from: {env_path}")
+
+                # Load environment variables with error handling for dotenv
+                try:
+                    from dotenv import load_dotenv
+
+                    # Load environment variables
+                    load_dotenv(env_path)
+                    logging.info("✅ .env file loaded successfully.")
+                except ImportError:
+                    logging.warning(
+                        "dotenv not available. Using default configuration."
+                    )
+                    return get_default_config()
+                except Exception as error:
+                    logging.warning(f"⚠️  Failed to load .env file: {error}")
+                    logging.info("🔄 Falling back to environment variables.")
+
+        config = AppConfig(
+            app_name=os.getenv("APP_NAME") or "Project Template",
+            app_version=os.getenv("APP_VERSION") or "1.0.0",
+            environment=os.getenv("APP_ENV") or "development",
+            debug=(os.getenv("DEBUG") or "false").lower() == "true",
+            log_level=os.getenv("LOG_LEVEL") or "INFO",
+        )
+
+        # Validate configuration
+        validate_config(config)
+
+        # Check for sensitive information in configuration
+        warn_sensitive_environment()
+
+        return config
+
+    except (FileNotFoundError, PermissionError) as error:
+        raise ConfigurationError(f"Configuration file access error: {error}") from error
+    except (ValueError, TypeError) as error:
+        raise ConfigurationError(f"Configuration validation error: {error}") from error
+    except ImportError as error:
+        raise ConfigurationError(f"Missing dependency: {error}") from error
+    except ConfigurationError as error:
+        raise ConfigurationError(f"Configuration error: {error}") from error
+
+
+def get_default_config() -> AppConfig:
+    """Get default configuration values."""
+    return AppConfig(
+        app_name="Project Template",
+        app_version="1.0.0",
+        environment="development",
+        debug=False,
+        log_level="INFO",
+    )
+
+
+def validate_config(config: AppConfig) -> None:
+    """
+    Validate configuration values.
+
+    Args:
+        config: Configuration to validate
+
+    Raises:
+        ConfigurationError: If validation fails
+    """
+    valid_log_levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+    if config.log_level.upper() not in valid_log_levels:
+        raise ConfigurationError(
+            f"Invalid log_level '{config.log_level}'. Must be one of {valid_log_levels}"
+        )
+
+    if not config.app_name.strip():
+        raise ConfigurationError("app_name cannot be empty")
+
+    if not config.app_version.strip():
+        raise ConfigurationError("app_version cannot be empty")
+
+    # Validate semantic version format (allow 1.0 or 1.0.0)
+    if not re.match(r"^\d+\.\d+(\.\d+)?$", config.app_version):
+        raise ConfigurationError(
+            "app_version must be in semantic version format "
+            f"(e.g., 1.0 or 1.0.0), got '{config.app_version}'"
+        )
+
+    valid_environments = ["development", "staging", "production"]
+    if config.environment.lower() not in valid_environments:
+        raise ConfigurationError(
+            f"Invalid environment '{config.environment}'. "
+            f"Must be one of {valid_environments}"
+        )
+
+
+def configure_rate_limit_persistence(limiter: Optional[RateLimiter] = None) -> bool:
+    """
+    Persist a rate limiter across restarts when RATE_LIMIT_SNAPSHOT is set.
+
+    Restores the limiter from the snapshot file if one exists, snapshots it
+    every RATE_LIMIT_SNAPSHOT_INTERVAL seconds when that is positive, and
+    always writes a final snapshot at interpreter exit.
+
+    Args:
+        limiter: Limiter to persist (defaults to the global rate limiter)
+
+    Returns:
+        bool: True if persistence was enabled
+    """
+    path = os.getenv("RATE_LIMIT_SNAPSHOT")
+    if not path:
+        return False
+    if limiter is None:
+        limiter = rate_limiter
+    logger = logging.getLogger(__name__)
+
+    try:
+        interval = float(os.getenv("RATE_LIMIT_SNAPSHOT_INTERVAL", "0"))
+    except ValueError:
+        raise ConfigurationError("RATE_LIMIT_SNAPSHOT_INTERVAL must be a number")
+
+    if os.path.exists(path):
+        try:
+            restored = limiter.restore(path)
+            logger.info("Restored %d rate limit identifiers from %s", restored, path)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable rate limiter snapshot: %s", e)
+    if interval > 0:
+        limiter.start_snapshots(path, interval)
+
+    def save() -> None:
+        limiter.stop_snapshots(final=False)
+        try:
+            limiter.snapshot(path)
+        except OSError as e:
+            logger.warning("Rate limiter snapshot failed: %s", e)
+
+    atexit.register(save)
+    return True
+
+
+def configure_denylist(guard: Optional[DenylistGuard] = None) -> bool:
+    """
+    Install the denylist named by DENYLIST_FILE.
+
+    A filter saved with Denylist.save is mapped immediately. Any other file
+    is read as a list of identifiers and built in the background; callers
+    are not denied until the build finishes.
+
+    Args:
+        guard: Guard to install into (defaults to the global denylist guard)
+
+    Returns:
+        bool: True if a denylist was configured
+    """
+    path = os.getenv("DENYLIST_FILE")
+    if not path:
+        return False
+    if guard is None:
+        guard = denylist_guard
+
+    try:
+        error_rate = float(os.getenv("DENYLIST_ERROR_RATE", "0.001"))
+    except ValueError:
+        raise ConfigurationError("DENYLIST_ERROR_RATE must be a number")
+    exact = os.getenv("DENYLIST_EXACT", "false").lower() == "true"
+
+    try:
+        with open(path, "rb") as handle:
+            compiled = handle.read(len(DENYLIST_MAGIC)) == DENYLIST_MAGIC
+        if compiled:
+            guard.swap(Denylist.load(path))
+        else:
+            guard.rebuild(path, error_rate, exact)
+    except (OSError, ValueError) as e:
+        raise ConfigurationError(f"Cannot load denylist {path}: {e}")
+    return True
+
+
+def configure_concurrency_limit() -> bool:
+    """
+    Limit concurrent greetings adaptively when ADAPTIVE_CONCURRENCY=true.
+
+    CONCURRENCY_TARGET_P95_MS sets the latency target, and
+    CONCURRENCY_INITIAL_LIMIT and CONCURRENCY_MAX_LIMIT bound the limit.
+
+    Returns:
+        bool: True if the limiter was enabled
+    """
+    global concurrency_limiter
+
+    if os.getenv("ADAPTIVE_CONCURRENCY", "false").lower() != "true":
+        return False
+    try:
+        concurrency_limiter = AdaptiveConcurrencyLimiter(
+            target_p95_ms=float(os.getenv("CONCURRENCY_TARGET_P95_MS", "50")),
+            initial_limit=int(os.getenv("CONCURRENCY_INITIAL_LIMIT", "16")),
+            max_limit=int(os.getenv("CONCURRENCY_MAX_LIMIT", "1024")),
+        )
+    except ValueError as e:
+        raise ConfigurationError(f"Invalid adaptive concurrency setting: {e}")
+    return True
+
+
+def configure_singleflight() -> bool:
+    """
+    Coalesce identical concurrent greetings when SINGLEFLIGHT=true.
+
+    Returns:
+        bool: True if the singleflight was enabled
+    """
+    global greeting_flight
+
+    if os.getenv("SINGLEFLIGHT", "false").lower() != "true":
+        return False
+    greeting_flight = SingleFlight()
+    return True
+
+
+def configure_tracing() -> bool:
+    """
+    Enable tracing to the NDJSON file named by TRACE_FILE.
+
+    Reads the process environment only (not .env), because it runs before
+    load_configuration so that startup itself can be traced.
+    TRACE_SAMPLE_RATE sets the fraction of traces recorded (default 1.0).
+
+    Returns:
+        bool: True if tracing was enabled
+    """
+    global tracer
+
+    path = os.getenv("TRACE_FILE")
+    if not path:
+        return False
+    try:
+        sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+        exporter = NdjsonSpanExporter(path, os.getenv("APP_NAME") or "app")
+        tracer = Tracer(exporter, sample_rate)
+    except ValueError:
+        raise ConfigurationError("TRACE_SAMPLE_RATE must be a number from 0 to 1")
+    except OSError as e:
+        raise ConfigurationError(f"Cannot open trace file {path}: {e}")
+    atexit.register(tracer.shutdown)
+    return True
+
+
+def configure_cache() -> bool:
+    """
+    Enable the response cache when CACHE_ENABLED=true.
+
+    CACHE_TTL, CACHE_PREFIX and CACHE_MAX_ENTRIES tune it. When REDIS_HOST is
+    set a shared Redis tier (REDIS_PORT, REDIS_PASSWORD, REDIS_DB,
+    REDIS_POOL_SIZE) sits behind the in-process tier; like config/cache.js,
+    an unreachable server leaves the cache memory-only.
+
+    Returns:
+        bool: True if the cache was enabled
+    """
+    global response_cache
+
+    if os.getenv("CACHE_ENABLED", "false").lower() != "true":
+        return False
+    try:
+        ttl = float(os.getenv("CACHE_TTL", "3600"))
+        memory = LRUCache(int(os.getenv("CACHE_MAX_ENTRIES", "10000")), ttl)
+        remote = None
+        host = os.getenv("REDIS_HOST")
+        if host:
+            remote = RedisClient(
+                host,
+                int(os.getenv("REDIS_PORT", "6379")),
+                password=os.getenv("REDIS_PASSWORD") or None,
+                db=int(os.getenv("REDIS_DB", "0")),
+                max_connections=int(os.getenv("REDIS_POOL_SIZE", "10")),
+            )
+    except ValueError:
+        raise ConfigurationError(
+            "CACHE_TTL, CACHE_MAX_ENTRIES and REDIS_* sizes must be positive numbers"
+        )
+
+    if remote is not None:
+        try:
+            remote.ping()
+        except (OSError, CacheError) as e:
+            logging.getLogger(__name__).warning(
+                "⚠️  Redis not available, caching in memory only: %s", e
+            )
+            remote = None
+    prefix = os.getenv("CACHE_PREFIX")
+    response_cache = TwoTierCache(
+        memory, remote, f"{prefix}:" if prefix else "app:", ttl
+    )
+    return True
+
+
+# =============================================================================
+# SETTINGS (config/config.json)
+# =============================================================================
+
+DEFAULT_SETTINGS_PATH = (
+    Path(__file__).resolve().parent.parent / "config" / "config.json"
+)
+SETTINGS_RESERVED_KEYS = ("environments", "schema")
+_PLACEHOLDER_PATTERN = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)\}")
+_SIZE_PATTERN = re.compile(r"^\d+[kmg]?$", re.IGNORECASE)
+_settings_cache: Dict[tuple, "Settings"] = {}
+_settings_lock = threading.Lock()
+
+
+class SettingsNode:
+    """Read-only section of the settings tree."""
+
+    __slots__ = ("_path", "_data")
+
+    def __init__(self, path: str, data: Dict[str, Any]):
+        object.__setattr__(self, "_path", path)
+        object.__setattr__(self, "_data", data)
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._data[name]
+        except KeyError:
+            raise AttributeError(f"No setting named '{self._path}{name}'") from None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Settings are read-only")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Settings are read-only")
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        # Keys only: values may hold credentials resolved from the environment
+        section = self._path.rstrip(".") or "root"
+        return f"<{self.__class__.__name__} {section}: {', '.join(self._data)}>"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a direct child value, or default if it is missing."""
+        return self._data.get(key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert this section back into plain nested dictionaries."""
+        return {
+            key: value.to_dict() if isinstance(value, SettingsNode) else value
+            for key, value in self._data.items()
+        }
+
+
+class Settings(SettingsNode):
+    """Root of the settings tree with O(1) dotted-key lookups."""
+
+    __slots__ = ("_index", "environment")
+
+    def __init__(self, environment: str, data: Dict[str, Any]):
+        super().__init__("", data)
+        index: Dict[str, Any] = {}
+        _index_settings(self, index)
+        object.__setattr__(self, "_index", index)
+        object.__setattr__(self, "environment", environment)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._index[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Look up a setting by dotted key.
+
+        Args:
+            key: Dotted key such as "database.port"
+            default: Value returned when the key is missing
+
+        Returns:
+            The setting value or section
+        """
+        return self._index.get(key, default)
+
+
+def _index_settings(node: SettingsNode, index: Dict[str, Any]) -> None:
+    """Record every section and value of node under its dotted key."""
+    for key, value in node._data.items():
+        index[node._path + key] = value
+        if isinstance(value, SettingsNode):
+            _index_settings(value, index)
+
+
+def _resolve_placeholders(value: Any, environ: Dict[str, str]) -> Any:
+    """Replace ${VAR} placeholders with environment values."""
+    if isinstance(value, str):
+        match = _PLACEHOLDER_PATTERN.fullmatch(value)
+        if match:
+            # A value that is only a placeholder stays None when unset
+            return environ.get(match.group(1))
+        return _PLACEHOLDER_PATTERN.sub(lambda m: environ.get(m.group(1), ""), value)
+    if isinstance(value, dict):
+        return {
+            key: _resolve_placeholders(item, environ) for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_resolve_placeholders(item, environ) for item in value]
+    return value
+
+
+def _merge_settings(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """Deep-merge override into a copy of base."""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge_settings(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _slotted_class(base: type, keys) -> type:
+    """
+    Create a subclass of base with one slot per identifier-safe key.
+
+    Slots turn attribute access into a native descriptor read instead of a
+    failed lookup followed by __getattr__. Keys that are not identifiers or
+    that would shadow a method stay reachable through item access.
+    """
+    reserved = set(dir(base))
+    slots = tuple(
+        key
+        for key in keys
+        if key.isidentifier() and not keyword.iskeyword(key) and key not in reserved
+    )
+    return type(base.__name__, (base,), {"__slots__": slots})
+
+
+def _build_node(cls: type, data: Dict[str, Any], *args: Any) -> SettingsNode:
+    """Instantiate a slotted node class and populate its slots."""
+    node = _slotted_class(cls, data)(*args, data)
+    for key in node.__class__.__slots__:
+        object.__setattr__(node, key, data[key])
+    return node
+
+
+def _freeze_settings(path: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert nested dictionaries into SettingsNode objects."""
+    frozen: Dict[str, Any] = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            child_path = f"{path}{key}."
+            value = _build_node(
+                SettingsNode, _freeze_settings(child_path, value), child_path
+            )
+        elif isinstance(value, list):
+            value = tuple(value)
+        frozen[key] = value
+    return frozen
+
+
+def parse_settings(
+    raw: Dict[str, Any],
+    environment: str,
+    environ: Optional[Dict[str, str]] = None,
+) -> Settings:
+    """
+    Build a validated settings tree from parsed config.json data.
+
+    Args:
+        raw: Parsed JSON document
+        environment: Environment whose overrides should be applied
+        environ: Environment variables for placeholders (defaults to os.environ)
+
+    Returns:
+        Settings: Frozen settings tree
+
+    Raises:
+        ConfigurationError: If the settings are invalid
+    """
+    if not isinstance(raw, dict):
+        raise ConfigurationError("Settings document must be a JSON object")
+
+    data = {
+        key: value for key, value in raw.items() if key not in SETTINGS_RESERVED_KEYS
+    }
+    overrides = (raw.get("environments") or {}).get(environment) or {}
+    data = _merge_settings(data, overrides)
+    data = _resolve_placeholders(data, os.environ if environ is None else environ)
+
+    settings = _build_node(Settings, _freeze_settings("", data), environment)
+    validate_settings(settings)
+    return settings
+
+
+def load_settings(
+    path: Optional[str] = None, environment: Optional[str] = None
+) -> Settings:
+    """
+    Load config/config.json once per process.
+
+    Args:
+        path: Settings file path (defaults to config/config.json)
+        environment: Environment overrides to apply (defaults to APP_ENV)
+
+    Returns:
+        Settings: Frozen settings tree, shared by all callers
+
+    Raises:
+        ConfigurationError: If the file cannot be read or is invalid
+    """
+    environment = environment or os.environ.get("APP_ENV") or "development"
+    cache_key = (path, environment)
+
+    settings = _settings_cache.get(cache_key)
+    if settings is not None:
+        return settings
+
+    settings_path = Path(path) if path else DEFAULT_SETTINGS_PATH
+    with _settings_lock:
+        settings = _settings_cache.get(cache_key)
+        if settings is None:
+            try:
+                with open(settings_path, encoding="utf-8") as handle:
+                    raw = json.load(handle)
+            except (OSError, ValueError) as error:
+                raise ConfigurationError(
+                    f"Failed to read settings from {settings_path}: {error}"
+                ) from error
+            settings = parse_settings(raw, environment)
+            _settings_cache[cache_key] = settings
+    return settings
+
+
+def clear_settings_cache() -> None:
+    """Forget loaded settings so the next load_settings call re-reads them."""
+    with _settings_lock:
+        _settings_cache.clear()
+
+
+def _require_type(settings: Settings, key: str, expected: type) -> None:
+    """Raise ConfigurationError if a present setting has the wrong type."""
+    value = settings.get(key)
+    if value is None:
+        return
+    # bool is an int subclass, so reject it explicitly for integer settings
+    if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+        raise ConfigurationError(
+            f"Setting '{key}' must be of type {expected.__name__}, "
+            f"got {type(value).__name__}"
+        )
+
+
+def validate_settings(settings: Settings) -> None:
+    """
+    Validate settings values.
+
+    Args:
+        settings: Settings to validate
+
+    Raises:
+        ConfigurationError: If validation fails
+    """
+    app_name = settings.get("app.name")
+    if not isinstance(app_name, str) or not app_name.strip():
+        raise ConfigurationError("Setting 'app.name' cannot be empty")
+
+    app_version = settings.get("app.version")
+    if not isinstance(app_version, str) or not re.match(
+        r"^\d+\.\d+(\.\d+)?$", app_version
+    ):
+        raise ConfigurationError(
+            "Setting 'app.version' must be in semantic version format "
+            f"(e.g., 1.0 or 1.0.0), got '{app_version}'"
+        )
+
+    for key in ("database.host", "database.name", "database.username"):
+        _require_type(settings, key, str)
+    for key in ("database.port", "api.timeout", "api.retries", "logging.maxFiles"):
+        _require_type(settings, key, int)
+    for key in ("features.debug", "features.cache", "features.analytics"):
+        _require_type(settings, key, bool)
+
+    port = settings.get("database.port")
+    if port is not None and not 1 <= port <= 65535:
+        raise ConfigurationError(f"Setting 'database.port' out of range: {port}")
+
+    timeout = settings.get("api.timeout")
+    if timeout is not None and timeout <= 0:
+        raise ConfigurationError("Setting 'api.timeout' must be positive")
+
+    retries = settings.get("api.retries")
+    if retries is not None and retries < 0:
+        raise ConfigurationError("Setting 'api.retries' cannot be negative")
+
+    valid_log_levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+    level = settings.get("logging.level")
+    if level is not None and str(level).upper() not in valid_log_levels:
+        raise ConfigurationError(
+            f"Invalid logging.level '{level}'. Must be one of {valid_log_levels}"
+        )
+
+    max_size = settings.get("logging.maxSize")
+    if max_size is not None and not _SIZE_PATTERN.match(str(max_size)):
+        raise ConfigurationError(
+            f"Setting 'logging.maxSize' must look like 10m, 512k or 1g, "
+            f"got '{max_size}'"
+        )
+
+    max_files = settings.get("logging.maxFiles")
+    if max_files is not None and max_files < 1:
+        raise ConfigurationError("Setting 'logging.maxFiles' must be at least 1")
+
+
+def parse_size(value: str) -> int:
+    """
+    Parse a size such as 512k, 10m or 1g into bytes.
+
+    Args:
+        value: Size string; a bare number is taken as bytes
+
+    Returns:
+        int: Size in bytes
+
+    Raises:
+        ValueError: If the size is malformed
+    """
+    value = value.strip()
+    if not _SIZE_PATTERN.match(value):
+        raise ValueError(f"invalid size '{value}' (expected e.g. 512k, 10m or 1g)")
+    multiplier = {"k": 1024, "m": 1024**2, "g": 1024**3}.get(value[-1].lower(), 1)
+    digits = value if multiplier == 1 else value[:-1]
+    return int(digits) * multiplier
+
+
+# =============================================================================
+# LOGGING CONFIGURATION
+# =============================================================================
+
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_QUEUE_POLICIES = ("block", "drop")
+LOG_FORMATS = ("text", "json")
+
+_log_listener: Optional["QueueLogListener"] = None
+_log_queue_handler: Optional["BoundedQueueHandler"] = None
+
+
+@dataclass
+class LoggingOptions:
+    """Logging behaviour beyond the level carried by AppConfig."""
+
+    log_file: str = "app.log"
+    async_mode: bool = False
+    queue_size: int = 10000
+    overflow_policy: str = "block"
+    log_format: str = "text"
+    sample_rate: int = 1
+    rate_cap: int = 0
+    max_bytes: int = 0
+    max_files: int = 5
+    rotate_interval: int = 0
+    buffer_size: int = 0
+    flush_interval: float = 1.0
+    compress: bool = False
+
+    @property
+    def managed_file(self) -> bool:
+        """Whether the log file needs rotation or buffering."""
+        return bool(self.max_bytes or self.rotate_interval or self.buffer_size)
+
+
+def load_logging_options() -> LoggingOptions:
+    """
+    Read logging options from LOG_* environment variables.
+
+    Returns:
+        LoggingOptions: Logging options
+
+    Raises:
+        ConfigurationError: If an option is invalid
+    """
+    try:
+        options = LoggingOptions(
+            log_file=os.getenv("LOG_FILE") or "app.log",
+            async_mode=(os.getenv("LOG_ASYNC") or "false").lower() == "true",
+            queue_size=int(os.getenv("LOG_QUEUE_SIZE") or 10000),
+            overflow_policy=(os.getenv("LOG_QUEUE_POLICY") or "block").lower(),
+            log_format=(os.getenv("LOG_FORMAT") or "text").lower(),
+            sample_rate=int(os.getenv("LOG_SAMPLE_RATE") or 1),
+            rate_cap=int(os.getenv("LOG_RATE_CAP") or 0),
+            max_bytes=parse_size(os.getenv("LOG_MAX_SIZE") or "0"),
+            max_files=int(os.getenv("LOG_MAX_FILES") or 5),
+            rotate_interval=int(os.getenv("LOG_ROTATE_INTERVAL") or 0),
+            buffer_size=parse_size(os.getenv("LOG_BUFFER_SIZE") or "0"),
+            flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL") or 1.0),
+            compress=(os.getenv("LOG_COMPRESS") or "false").lower() == "true",
+        )
+    except ValueError as error:
+        raise ConfigurationError(f"Invalid logging option: {error}") from error
+
+    if options.queue_size < 1:
+        raise ConfigurationError("LOG_QUEUE_SIZE must be at least 1")
+    if options.overflow_policy not in LOG_QUEUE_POLICIES:
+        raise ConfigurationError(
+            f"Invalid LOG_QUEUE_POLICY '{options.overflow_policy}'. "
+            f"Must be one of {list(LOG_QUEUE_POLICIES)}"
+        )
+    if options.log_format not in LOG_FORMATS:
+        raise ConfigurationError(
+            f"Invalid LOG_FORMAT '{options.log_format}'. "
+            f"Must be one of {list(LOG_FORMATS)}"
+        )
+    if options.sample_rate < 1:
+        raise ConfigurationError("LOG_SAMPLE_RATE must be at least 1")
+    if options.rate_cap < 0:
+        raise ConfigurationError("LOG_RATE_CAP cannot be negative")
+    if options.max_files < 0:
+        raise ConfigurationError("LOG_MAX_FILES cannot be negative")
+    if options.rotate_interval < 0:
+        raise ConfigurationError("LOG_ROTATE_INTERVAL cannot be negative")
+    if options.flush_interval <= 0:
+        raise ConfigurationError("LOG_FLUSH_INTERVAL must be positive")
+    return options
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Single-line JSON formatter.
+
+    Static fields are encoded once at construction and level and logger
+    name fragments are cached, so each record costs one message encode and
+    one string join rather than building and serializing a dict.
+    """
+
+    def __init__(self, static_fields: Optional[Dict[str, Any]] = None):
+        super().__init__()
+        self._suffix = (
+            "".join(
+                f",{encode_json_string(key)}:{json.dumps(value)}"
+                for key, value in (static_fields or {}).items()
+            )
+            + "}"
+        )
+        self._levels: Dict[int, str] = {}
+        self._loggers: Dict[str, str] = {}
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format a record as a JSON object."""
+        level = self._levels.get(record.levelno)
+        if level is None:
+            level = self._levels[record.levelno] = (
+                f',"level":{encode_json_string(record.levelname)}'
+            )
+        name = self._loggers.get(record.name)
+        if name is None:
+            if len(self._loggers) >= 1024:
+                self._loggers.clear()
+            name = self._loggers[record.name] = (
+                f',"logger":{encode_json_string(record.name)},"msg":'
+            )
+
+        parts = [
+            '{"ts":',
+            "%.3f" % record.created,
+            level,
+            name,
+            encode_json_string(record.getMessage()),
+        ]
+        if record.exc_info:
+            parts.append(',"exc":')
+            parts.append(encode_json_string(self.formatException(record.exc_info)))
+        parts.append(self._suffix)
+        return "".join(parts)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Sample and rate-cap records per (logger, message template).
+
+    Records at or above always_level (WARNING by default) always pass. Below
+    that, only the first of every sample_rate records for a template passes,
+    and at most rate_cap per second when rate_cap is set. The decision is
+    cached on the record so several handlers sharing the filter agree.
+    Counters are guarded by a lock, so the rates hold exactly when several
+    threads log the same template.
+    """
+
+    MAX_TRACKED_KEYS = 4096
+
+    def __init__(
+        self,
+        sample_rate: int = 1,
+        rate_cap: int = 0,
+        always_level: int = logging.WARNING,
+    ):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.rate_cap = rate_cap
+        self.always_level = always_level
+        self.suppressed = 0
+        self._counts: Dict[tuple, int] = {}
+        self._windows: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Decide whether a record should be emitted."""
+        if record.levelno >= self.always_level:
+            return True
+        decision = record.__dict__.get("_sampled")
+        if decision is None:
+            msg = record.msg
+            template = msg if isinstance(msg, str) else type(msg).__name__
+            with self._lock:
+                decision = self._decide((record.name, template))
+                if not decision:
+                    self.suppressed += 1
+            record._sampled = decision
+        return decision
+
+    def _decide(self, key: tuple) -> bool:
+        """Apply sampling then the per-second cap; caller holds the lock."""
+        if self.sample_rate > 1:
+            counts = self._counts
+            if len(counts) >= self.MAX_TRACKED_KEYS and key not in counts:
+                counts.clear()
+            count = counts.get(key, 0)
+            counts[key] = count + 1
+            if count % self.sample_rate:
+                return False
+
+        if self.rate_cap:
+            second = int(time.monotonic())
+            window = self._windows.get(key)
+            if window is None or window[0] != second:
+                if len(self._windows) >= self.MAX_TRACKED_KEYS:
+                    self._windows.clear()
+                self._windows[key] = [second, 1]
+            elif window[1] >= self.rate_cap:
+                return False
+            else:
+                window[1] += 1
+        return True
+
+
+class BufferedRotatingFileHandler(logging.Handler):
+    """
+    File handler with in-memory batching and size/time based rotation.
+
+    Encoded records are collected in a buffer and written with a single
+    unbuffered write once buffer_size bytes are pending, flush_interval
+    seconds have passed, or a record at flush_level or above arrives. A
+    background thread flushes quiet buffers on the same interval.
+
+    Before a batch is written the file is rotated if it would grow past
+    max_bytes or rotate_interval seconds have elapsed since it was opened.
+    Rotated files are named app.log.1 .. app.log.N (newest first) and are
+    optionally gzip-compressed to app.log.N.gz in a background thread.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = 0,
+        backup_count: int = 5,
+        rotate_interval: int = 0,
+        buffer_size: int = 64 * 1024,
+        flush_interval: float = 1.0,
+        flush_level: int = logging.ERROR,
+        compress: bool = False,
+    ):
+        super().__init__()
+        self.baseFilename = os.path.abspath(filename)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_interval = rotate_interval
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self.compress = compress
+
+        self._buffer: list[bytes] = []
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        self._compressor: Optional[threading.Thread] = None
+        self._open()
+
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if buffer_size:
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, name="log-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    def _open(self) -> None:
+        """Open the log file for unbuffered appends."""
+        # Unbuffered so each batch is exactly one write() call
+        self._stream = open(self.baseFilename, "ab", buffering=0)
+        self._size = os.fstat(self._stream.fileno()).st_size
+        self._rollover_at = (
+            time.time() + self.rotate_interval if self.rotate_interval else 0.0
+        )
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Buffer a record and flush when a threshold is reached."""
+        try:
+            data = (self.format(record) + "\n").encode("utf-8")
+            self._buffer.append(data)
+            self._buffered += len(data)
+            if (
+                self._buffered >= self.buffer_size
+                or record.levelno >= self.flush_level
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self._write_buffer()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """Write any buffered records."""
+        self.acquire()
+        try:
+            self._write_buffer()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        """Flush, stop the background threads and close the file."""
+        self.acquire()
+        try:
+            if self._stream is not None:
+                self._closed.set()
+                self._write_buffer()
+                self._stream.close()
+                self._stream = None
+        finally:
+            self.release()
+        if (
+            self._flusher is not None
+            and self._flusher is not threading.current_thread()
+        ):
+            self._flusher.join()
+        if self._compressor is not None:
+            self._compressor.join()
+        super().close()
+
+    def reopen(self, filename: str) -> None:
+        """
+        Write to filename from now on, such as from a forked worker process.
+
+        Pending records go to the current file first. The background flusher
+        is restarted, since threads do not survive a fork.
+        """
+        self.acquire()
+        try:
+            self._write_buffer()
+            if self._stream is not None:
+                self._stream.close()
+            self.baseFilename = os.path.abspath(filename)
+            self._open()
+        finally:
+            self.release()
+        if self._flusher is not None and not self._flusher.is_alive():
+            self._closed = threading.Event()
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, name="log-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    def _flush_periodically(self) -> None:
+        """Flush buffers left idle for longer than flush_interval."""
+        while not self._closed.wait(self.flush_interval):
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def _write_buffer(self) -> None:
+        """Write pending records in one call; caller holds the handler lock."""
+        self._last_flush = time.monotonic()
+        if not self._buffer or self._stream is None:
+            return
+        data = b"".join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+
+        if self._should_rollover(len(data)):
+            self._rollover()
+
+        view = memoryview(data)
+        while view:
+            written = self._stream.write(view)
+            view = view[written:]
+        self._size += len(data)
+
+    def _should_rollover(self, pending: int) -> bool:
+        """Check whether writing pending bytes should start a new file."""
+        if self.max_bytes and self._size and self._size + pending > self.max_bytes:
+            return True
+        return bool(self._rollover_at and time.time() >= self._rollover_at)
+
+    def _backup_name(self, index: int) -> str:
+        """Return the name of the index-th rotated file."""
+        return f"{self.baseFilename}.{index}"
+
+    def _rollover(self) -> None:
+        """Shift rotated files up by one and start a fresh log file."""
+        self._stream.close()
+        if self._compressor is not None:
+            # Never rename a file that is still being compressed
+            self._compressor.join()
+            self._compressor = None
+
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                for suffix in ("", ".gz"):
+                    source = self._backup_name(index) + suffix
+                    if os.path.exists(source):
+                        os.replace(source, self._backup_name(index + 1) + suffix)
+            stale = self._backup_name(1) + ".gz"
+            if os.path.exists(stale):
+                os.remove(stale)
+            os.replace(self.baseFilename, self._backup_name(1))
+            if self.compress:
+                self._compressor = threading.Thread(
+                    target=_gzip_file,
+                    args=(self._backup_name(1),),
+                    name="log-compressor",
+                    daemon=True,
+                )
+                self._compressor.start()
+        else:
+            os.remove(self.baseFilename)
+        self._open()
+
+
+def _gzip_file(path: str) -> None:
+    """Compress path to path.gz and remove the original."""
+    try:
+        with open(path, "rb") as source, gzip.open(path + ".gz", "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.remove(path)
+    except OSError as error:
+        sys.stderr.write(f"Failed to compress rotated log {path}: {error}\n")
+
+
+def build_log_formatter(
+    config: AppConfig, options: LoggingOptions
+) -> logging.Formatter:
+    """Create the formatter selected by options.log_format."""
+    if options.log_format == "json":
+        return JsonFormatter(
+            {
+                "app": config.app_name,
+                "version": config.app_version,
+                "env": config.environment,
+            }
+        )
+    return logging.Formatter(LOG_FORMAT)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that hands records to a bounded queue unformatted.
+
+    Formatting is left to the listener thread, so callers only pay for the
+    enqueue. Records keep references to their args, which must therefore not
+    be mutated after logging (true for the str args used throughout this app).
+    """
+
+    def __init__(self, log_queue: queue.Queue, overflow_policy: str = "block"):
+        super().__init__(log_queue)
+        self.overflow_policy = overflow_policy
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Pass the record through untouched; the listener formats it."""
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Enqueue a record, blocking or dropping when the queue is full."""
+        if self.overflow_policy == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class QueueLogListener(logging.handlers.QueueListener):
+    """Queue listener whose stop sentinel is never dropped on a full queue."""
+
+    def enqueue_sentinel(self) -> None:
+        """Block until the stop sentinel fits in the queue."""
+        self.queue.put(self._sentinel)
+
+
+def _build_log_handlers(
+    config: AppConfig, options: LoggingOptions
+) -> list[logging.Handler]:
+    """Create the stdout and file handlers used by setup_logging."""
+    if not config.debug:
+        Path(options.log_file).parent.mkdir(parents=True, exist_ok=True)
+    if config.debug:
+        file_handler: logging.Handler = logging.NullHandler()
+    elif options.managed_file:
+        file_handler = BufferedRotatingFileHandler(
+            options.log_file,
+            max_bytes=options.max_bytes,
+            backup_count=options.max_files,
+            rotate_interval=options.rotate_interval,
+            buffer_size=options.buffer_size,
+            flush_interval=options.flush_interval,
+            compress=options.compress,
+        )
+    else:
+        file_handler = logging.FileHandler(options.log_file)
+    return [logging.StreamHandler(sys.stdout), file_handler]
+
+
+@traced("startup.setup_logging")
+def setup_logging(config: AppConfig, options: Optional[LoggingOptions] = None) -> None:
+    """
+    Configure application logging.
+
+    In async mode the root logger only enqueues records; a background
+    listener formats them and performs the stdout/file I/O. Sampling, when
+    enabled, is applied before a record is formatted or enqueued.
+
+    Args:
+        config: Application configuration
+        options: Logging options (defaults to load_logging_options())
+    """
+    global _log_listener, _log_queue_handler
+
+    options = options or load_logging_options()
+    log_level = getattr(logging, config.log_level.upper(), logging.INFO)
+    handlers = _build_log_handlers(config, options)
+
+    formatter = build_log_formatter(config, options)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    sampler = None
+    if options.sample_rate > 1 or options.rate_cap:
+        sampler = SamplingFilter(options.sample_rate, options.rate_cap)
+
+    if not options.async_mode:
+        if sampler:
+            for handler in handlers:
+                handler.addFilter(sampler)
+        _install_root_handlers(log_level, handlers)
+        return
+
+    shutdown_logging()
+    log_queue: queue.Queue = queue.Queue(maxsize=options.queue_size)
+    _log_queue_handler = BoundedQueueHandler(log_queue, options.overflow_policy)
+    if sampler:
+        # Sample before enqueueing so suppressed records cost no queue slot
+        _log_queue_handler.addFilter(sampler)
+    _log_listener = QueueLogListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+    _install_root_handlers(log_level, [_log_queue_handler])
+
+
+def _install_root_handlers(level: int, handlers: list[logging.Handler]) -> None:
+    """
+    Replace the root logger's handlers.
+
+    load_configuration logs before logging is set up, which makes the
+    logging module install a default stderr handler; without force the
+    configured handlers would be silently ignored.
+    """
+    logging.basicConfig(level=level, handlers=handlers, force=True)
+
+
+def shutdown_logging() -> None:
+    """
+    Stop the async log listener after flushing every queued record.
+
+    The listener's handlers are reattached to the root logger so records
+    logged after shutdown are still written. Safe to call more than once.
+    """
+    global _log_listener, _log_queue_handler
+
+    listener, queue_handler = _log_listener, _log_queue_handler
+    if listener is None or queue_handler is None:
+        return
+    _log_listener = _log_queue_handler = None
+
+    root = logging.getLogger()
+    for handler in listener.handlers:
+        root.addHandler(handler)
+    root.removeHandler(queue_handler)
+    listener.stop()
+    for handler in listener.handlers:
+        handler.flush()
+
+    if queue_handler.dropped:
+        logging.getLogger(__name__).warning(
+            "⚠️  Dropped %d log records: logging queue was full",
+            queue_handler.dropped,
+        )
+
+
+atexit.register(shutdown_logging)
+
+
+# =============================================================================
+# LOCALIZATION
+# =============================================================================
+
+# Mirrors config/i18n.js: ./locales/{{lng}}/{{ns}}.json with {{var}} placeholders
+LOCALES_DIR = Path(__file__).resolve().parent.parent / "locales"
+SUPPORTED_LOCALES = ("en", "es", "fr", "de", "zh", "ja")
+DEFAULT_LOCALE = "en"
+GREETING_NAMESPACE = "greeting"
+GREETING_KEY = "welcome"
+DEFAULT_GREETING_TEMPLATE = "Hello, {{name}}! Welcome to {{appName}}"
+_TEMPLATE_PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+_catalog_cache: Dict[str, "GreetingCatalog"] = {}
+
+
+def compile_template(template: str, **bound: str) -> str:
+    """
+    Precompile an i18next-style template into a printf-style format string.
+
+    Placeholders named in bound are substituted now; the single remaining
+    {{name}} placeholder becomes %s, so formatting a greeting is one
+    string % operation with no parsing.
+
+    Args:
+        template: Template such as "Hello, {{name}}! Welcome to {{appName}}"
+        **bound: Values for every placeholder except name
+
+    Returns:
+        str: Format string taking the name as its only argument
+
+    Raises:
+        ConfigurationError: If a placeholder is unknown or name is missing
+    """
+    parts = []
+    seen_name = False
+    position = 0
+    for match in _TEMPLATE_PLACEHOLDER.finditer(template):
+        parts.append(template[position : match.start()].replace("%", "%%"))
+        placeholder = match.group(1)
+        if placeholder == "name" and not seen_name:
+            parts.append("%s")
+            seen_name = True
+        elif placeholder in bound:
+            parts.append(bound[placeholder].replace("%", "%%"))
+        else:
+            raise ConfigurationError(
+                f"Unsupported placeholder '{{{{{placeholder}}}}}' in template "
+                f"'{template}'"
+            )
+        position = match.end()
+    parts.append(template[position:].replace("%", "%%"))
+
+    if not seen_name:
+        raise ConfigurationError(f"Template '{template}' has no {{{{name}}}}")
+    return "".join(parts)
+
+
+class GreetingCatalog:
+    """
+    Greeting templates for every supported locale, loaded once.
+
+    Templates are kept raw and compiled per application name on first use,
+    giving a locale -> format string table for O(1) lookups.
+    """
+
+    def __init__(self, templates: Dict[str, str], fallback: str = DEFAULT_LOCALE):
+        if fallback not in templates:
+            raise ConfigurationError(f"No greeting template for '{fallback}'")
+        self.templates = dict(templates)
+        self.fallback = fallback
+        self._tables: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def locales(self) -> Tuple[str, ...]:
+        """Locales that have a greeting template."""
+        return tuple(self.templates)
+
+    def table(self, app_name: str) -> Dict[str, str]:
+        """
+        Get the compiled locale -> format string table for an app name.
+
+        Args:
+            app_name: Application name bound into every template
+
+        Returns:
+            Dict mapping locale to a format string taking the name
+        """
+        table = self._tables.get(app_name)
+        if table is None:
+            table = {
+                locale: compile_template(template, appName=app_name)
+                for locale, template in self.templates.items()
+            }
+            with self._lock:
+                if len(self._tables) >= 256:
+                    self._tables.clear()
+                self._tables[app_name] = table
+        return table
+
+    def resolve(self, locale: Optional[str]) -> str:
+        """
+        Map a requested locale to one with a template.
+
+        Accepts region variants such as es-MX or pt_BR, falling back to the
+        catalog's fallback locale.
+        """
+        if locale in self.templates:
+            return locale
+        if locale:
+            language = locale.replace("_", "-").split("-", 1)[0].lower()
+            if language in self.templates:
+                return language
+        return self.fallback
+
+
+def load_greeting_catalog(locales_dir: Optional[Path] = None) -> GreetingCatalog:
+    """
+    Load greeting templates from locales/<lng>/greeting.json once per process.
+
+    Locales without a file are skipped; if English is missing the built-in
+    template is used so greetings always work.
+
+    Args:
+        locales_dir: Directory holding one sub-directory per locale
+
+    Returns:
+        GreetingCatalog: Shared catalog
+
+    Raises:
+        ConfigurationError: If a locale file is malformed
+    """
+    directory = Path(locales_dir) if locales_dir else LOCALES_DIR
+    cache_key = str(directory)
+    catalog = _catalog_cache.get(cache_key)
+    if catalog is not None:
+        return catalog
+
+    templates = {}
+    for locale in SUPPORTED_LOCALES:
+        path = directory / locale / f"{GREETING_NAMESPACE}.json"
+        try:
+            with open(path, encoding="utf-8") as handle:
+                messages = json.load(handle)
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError) as error:
+            raise ConfigurationError(f"Failed to load {path}: {error}") from error
+
+        template = messages.get(GREETING_KEY) if isinstance(messages, dict) else None
+        if not isinstance(template, str):
+            raise ConfigurationError(f"{path} has no '{GREETING_KEY}' message")
+        compile_template(template, appName="")  # fail fast on bad templates
+        templates[locale] = template
+
+    templates.setdefault(DEFAULT_LOCALE, DEFAULT_GREETING_TEMPLATE)
+    catalog = _catalog_cache.setdefault(cache_key, GreetingCatalog(templates))
+    return catalog
+
+
+# =============================================================================
+# CACHING
+# =============================================================================
+
+# Global response cache, disabled unless CACHE_ENABLED=true
+response_cache: Optional[TwoTierCache] = None
+
+
+def cached(
+    namespace: str, key: Callable[..., str], ttl: Optional[float] = None
+) -> Callable:
+    """
+    Decorate a function so its results are kept in the global response cache.
+
+    Calls go straight through while caching is disabled. Exceptions are not
+    cached.
+
+    Args:
+        namespace: Key namespace for the decorated function
+        key: Callable building the cache key from the call's arguments
+        ttl: Time to live in seconds (defaults to the cache's ttl)
+
+    Returns:
+        Decorator
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            cache = response_cache
+            if cache is None:
+                return func(*args, **kwargs)
+            return cache.get_or_load(
+                f"{namespace}:{key(*args, **kwargs)}",
+                lambda: func(*args, **kwargs),
+                ttl,
+            )
+
+        return wrapper
+
+    return decorator
+
+
+class _Flight:
+    """One in-flight SingleFlight call and the outcome its waiters share."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        # Created by the first waiter, so uncontended calls never allocate one
+        self.done: Optional[threading.Event] = None
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait and receive the same result, or the same exception. Nothing is
+    kept once the call finishes, so unlike a cache this never serves stale
+    results. Threads use do(); asyncio tasks use do_async(), whose flights
+    are separate per event loop.
+    """
+
+    def __init__(self):
+        self.executions = 0
+        self.shared = 0
+        self._flights: Dict[Any, _Flight] = {}
+        self._tasks: Dict[Any, "asyncio.Future"] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Any, func: Callable, *args: Any) -> Any:
+        """
+        Call func(*args), or wait for the identical call already running.
+
+        Args:
+            key: Hashable key identifying equivalent calls
+            func: Function to call
+            *args: Arguments for func
+
+        Returns:
+            func's result
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.executions += 1
+            else:
+                self.shared += 1
+                if flight.done is None:
+                    flight.done = threading.Event()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func(*args)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                done = flight.done
+            if done is not None:
+                done.set()
+
+    async def do_async(self, key: Any, func: Callable, *args: Any) -> Any:
+        """
+        Await func(*args), or the identical call already running on this loop.
+
+        A waiter that is cancelled does not cancel the shared call; if the
+        leading task is cancelled, its waiters are cancelled too.
+
+        Args:
+            key: Hashable key identifying equivalent calls
+            func: Callable returning an awaitable
+            *args: Arguments for func
+
+        Returns:
+            The awaited result
+        """
+        loop = asyncio.get_running_loop()
+        key = (loop, key)
+        future = self._tasks.get(key)
+        if future is not None:
+            self.shared += 1
+            return await asyncio.shield(future)
+
+        future = self._tasks[key] = loop.create_future()
+        self.executions += 1
+        try:
+            result = await func(*args)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieve it so an unawaited flight does not log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._tasks[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Get the executions run and the calls that shared one."""
+        return {"executions": self.executions, "shared": self.shared}
+
+
+# Global greeting singleflight, disabled unless SINGLEFLIGHT=true
+greeting_flight: Optional[SingleFlight] = None
+
+
+# =============================================================================
+# BUSINESS LOGIC
+# =============================================================================
+
+
+class GreetingService:
+    """Service for generating personalized greetings."""
+
+    def __init__(
+        self,
+        config: AppConfig,
+        catalog: Optional[GreetingCatalog] = None,
+        limiter: Optional[RateLimiter] = None,
+        denylist: Optional[DenylistGuard] = None,
+        concurrency: Optional[AdaptiveConcurrencyLimiter] = None,
+        singleflight: Optional[SingleFlight] = None,
+    ):
+        self.config = config
+        self.catalog = catalog or load_greeting_catalog()
+        self.limiter = limiter
+        self.denylist = denylist
+        self.concurrency = concurrency
+        self.singleflight = singleflight
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._templates_for = ""
+        self._templates: Dict[str, str] = {}
+
+    def greet(
+        self, name: str, locale: Optional[str] = None, caller: Optional[str] = None
+    ) -> str:
+        """
+        Generate a personalized greeting message.
+
+        Args:
+            name: The name to greet
+            locale: Locale of the greeting (falls back to English)
+            caller: Caller identity (IP, user ID or API key) to rate limit;
+                callers without one share a single bucket
+
+        Returns:
+            str: Greeting message
+
+        Raises:
+            DeniedError: If the caller is on the denylist
+            ConcurrencyLimitedError: If the service is at its concurrency limit
+            ValueError: If name is invalid
+        """
+        greet = self._greet_traced if tracer.enabled else self._greet
+        concurrency = self.active_concurrency
+        if concurrency is None:
+            return greet(name, locale, caller)
+
+        if not concurrency.try_acquire():
+            raise ConcurrencyLimitedError(CONCURRENCY_LIMIT_MESSAGE)
+        start = time.perf_counter()
+        latency_ms = None
+        try:
+            greeting = greet(name, locale, caller)
+            latency_ms = (time.perf_counter() - start) * 1000
+            return greeting
+        finally:
+            # Failed requests are mostly fast rejections (denied, rate
+            # limited, invalid); timing them would pull the p95 down
+            concurrency.release(latency_ms)
+
+    async def greet_async(
+        self, name: str, locale: Optional[str] = None, caller: Optional[str] = None
+    ) -> str:
+        """
+        Generate a personalized greeting from asyncio code.
+
+        The caller is checked on the event loop; the greeting is then rendered
+        and logged in the loop's default executor, so blocking log handlers
+        do not stall other tasks.
+
+        Args:
+            name: The name to greet
+            locale: Locale of the greeting (falls back to English)
+            caller: Caller identity to rate limit
+
+        Returns:
+            str: Greeting message
+
+        Raises:
+            DeniedError: If the caller is on the denylist
+            ConcurrencyLimitedError: If the service is at its concurrency limit
+            ValueError: If name is invalid
+        """
+        concurrency = self.active_concurrency
+        if concurrency is not None and not concurrency.try_acquire():
+            raise ConcurrencyLimitedError(CONCURRENCY_LIMIT_MESSAGE)
+        start = time.perf_counter()
+        latency_ms = None
+        try:
+            self._check_caller(caller)
+            loop = asyncio.get_running_loop()
+            flight = self.active_singleflight
+            if flight is None:
+                greeting = await loop.run_in_executor(
+                    None, self._generate, name, locale
+                )
+            else:
+                greeting = await flight.do_async(
+                    self._greeting_key(name, locale),
+                    loop.run_in_executor,
+                    None,
+                    self._generate,
+                    name,
+                    locale,
+                )
+            latency_ms = (time.perf_counter() - start) * 1000
+            return greeting
+        finally:
+            if concurrency is not None:
+                concurrency.release(latency_ms)
+
+    def _greet(self, name: str, locale: Optional[str], caller: Optional[str]) -> str:
+        """Check the caller and render the greeting."""
+        self._check_caller(caller)
+        flight = self.active_singleflight
+        if flight is None:
+            return self._generate(name, locale)
+        return flight.do(self._greeting_key(name, locale), self._generate, name, locale)
+
+    @property
+    def active_limiter(self) -> RateLimiter:
+        """The limiter greet charges: limiter, or the global rate_limiter."""
+        return self.limiter if self.limiter is not None else rate_limiter
+
+    @property
+    def active_concurrency(self) -> Optional[AdaptiveConcurrencyLimiter]:
+        """The concurrency limiter greet applies: concurrency, or the global one."""
+        if self.concurrency is not None:
+            return self.concurrency
+        return concurrency_limiter
+
+    @property
+    def active_singleflight(self) -> Optional[SingleFlight]:
+        """The singleflight greet uses: singleflight, or the global one."""
+        return self.singleflight if self.singleflight is not None else greeting_flight
+
+    def _check_caller(self, caller: Optional[str]) -> None:
+        """Apply the denylist and charge the caller's rate limit."""
+        # Denied callers are rejected before they touch limiter state
+        if caller is not None:
+            guard = self.denylist if self.denylist is not None else denylist_guard
+            guard.check(caller)
+
+        # Rate limiting check
+        if not self.active_limiter.is_allowed(caller or SHARED_RATE_LIMIT_KEY):
+            raise RateLimitedError(RATE_LIMIT_MESSAGE)
+
+    def _generate(self, name: str, locale: Optional[str]) -> str:
+        """
+        Render and log a greeting.
+
+        This is the work identical concurrent greetings share through the
+        singleflight, so a shared greeting is logged once.
+        """
+        sanitized_name, greeting = self._render(name, locale)
+        self.logger.info("Generated greeting for: %s", sanitized_name)
+        return greeting
+
+    def _greet_traced(
+        self, name: str, locale: Optional[str], caller: Optional[str]
+    ) -> str:
+        """_greet with a span around each stage, used while tracing."""
+        with tracer.span("greet", locale=locale or DEFAULT_LOCALE) as span:
+            if not span.recording:
+                # Unsampled: the stage spans would all be no-ops
+                return self._greet(name, locale, caller)
+
+            with tracer.span("greet.check_caller"):
+                self._check_caller(caller)
+
+            flight = self.active_singleflight
+            if flight is not None:
+                with tracer.span("greet.singleflight"):
+                    return flight.do(
+                        self._greeting_key(name, locale), self._generate, name, locale
+                    )
+
+            with tracer.span("greet.render"):
+                sanitized_name, greeting = self._render(name, locale)
+
+            with tracer.span("greet.log"):
+                self.logger.info("Generated greeting for: %s", sanitized_name)
+            return greeting
+
+    def _greeting_key(self, name: str, locale: Optional[str]) -> str:
+        """
+        Key shared by greetings that render identically.
+
+        Raises:
+            ValueError: If name or locale is not a string
+        """
+        if not isinstance(name, str):
+            raise ValueError("Name must be a string")
+        if locale is not None and not isinstance(locale, str):
+            raise ValueError("Locale must be a string")
+        return "\x1f".join((self.config.app_name, locale or DEFAULT_LOCALE, name))
+
+    @cached("greeting", key=lambda self, name, locale: self._greeting_key(name, locale))
+    def _render(self, name: str, locale: Optional[str]) -> list:
+        """
+        Validate a name and format its greeting.
+
+        Only this step is cached: the denylist and rate limit checks in
+        _greet still run, and charge the caller, on every call.
+
+        Returns:
+            list: Sanitized name and greeting (a list so it survives JSON)
+        """
+        sanitized_name = validate_name(name)
+        return [sanitized_name, self._template(locale) % sanitized_name]
+
+    def _template(self, locale: Optional[str]) -> str:
+        """Get the compiled greeting format string for a locale."""
+        app_name = self.config.app_name
+        if app_name is not self._templates_for:
+            # Private copy so resolved locale aliases can be added below
+            self._templates = dict(self.catalog.table(app_name))
+            self._templates_for = app_name
+        template = self._templates.get(locale or DEFAULT_LOCALE)
+        if template is None:
+            template = self._templates[self.catalog.resolve(locale)]
+            if len(self._templates) < 64:
+                self._templates[locale] = template
+        return template
+
+    def get_multiple_greetings(
+        self,
+        names: list[str],
+        locale: Optional[str] = None,
+        caller: Optional[str] = None,
+    ) -> list[str]:
+        """
+        Generate greetings for multiple names.
+
+        Args:
+            names: List of names to greet
+            locale: Locale of the greetings (falls back to English)
+            caller: Caller identity charged once per name
+
+        Returns:
+            list[str]: List of greeting messages
+        """
+        return [self.greet(name, locale, caller) for name in names]
+
+
+@dataclass(frozen=True)
+class AppInfoSnapshot:
+    """Immutable application info with its pre-serialized JSON and ETag."""
+
+    key: tuple
+    info: Mapping[str, Any]
+    body: bytes
+    etag: str
+
+
+class AppInfoService:
+    """Service for retrieving application information."""
+
+    def __init__(self, config: AppConfig):
+        self.config = config
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._snapshot: Optional[AppInfoSnapshot] = None
+
+    def snapshot(self) -> AppInfoSnapshot:
+        """
+        Get the current application info snapshot.
+
+        The snapshot is built once and rebuilt only when a configuration
+        value it depends on changes.
+
+        Returns:
+            AppInfoSnapshot: Current snapshot
+        """
+        config = self.config
+        key = (config.app_name, config.app_version, config.environment, config.debug)
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.key != key:
+            snapshot = self._snapshot = self._build_snapshot(key)
+        return snapshot
+
+    def _build_snapshot(self, key: tuple) -> AppInfoSnapshot:
+        """Build the info mapping, its JSON encoding and ETag."""
+        app_name, app_version, environment, debug = key
+        info = {
+            "name": app_name,
+            "version": app_version,
+            "environment": environment,
+            "python_version": sys.version,
+            "platform": sys.platform,
+            "debug_mode": debug,
+        }
+        body = json.dumps(info, separators=(",", ":")).encode("utf-8")
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        self.logger.debug("Built application info snapshot %s", etag)
+        return AppInfoSnapshot(key, MappingProxyType(info), body, etag)
+
+    def get_app_info(self) -> Mapping[str, Any]:
+        """
+        Get comprehensive application information.
+
+        Not kept in the response cache: the snapshot already serves it
+        without copying, and it describes this host.
+
+        Returns:
+            Read-only mapping from the current snapshot. This used to be a
+            new dict per call; use dict() for a mutable copy.
+        """
+        return self.snapshot().info
+
+    def get_app_info_json(self) -> bytes:
+        """Get application information as cached UTF-8 JSON bytes."""
+        return self.snapshot().body
+
+    def get_app_info_response(
+        self, if_none_match: Optional[str] = None
+    ) -> Tuple[int, bytes, str]:
+        """
+        Get an HTTP-style response for the application information.
+
+        Args:
+            if_none_match: ETag sent by the client, if any
+
+        Returns:
+            Tuple of status code (200 or 304), body and ETag. The body is the
+            cached bytes object itself, so no copy is made per response.
+        """
+        snapshot = self.snapshot()
+        if if_none_match is not None and if_none_match == snapshot.etag:
+            return 304, b"", snapshot.etag
+        return 200, snapshot.body, snapshot.etag
+
+
+@dataclass(frozen=True)
+class TenantServices:
+    """Services built for one tenant's configuration."""
+
+    config: AppConfig
+    greeting_service: GreetingService
+    app_info_service: AppInfoService
+
+
+class TenantRegistry:
+    """
+    Per-tenant services, built lazily and evicted least-recently-used.
+
+    Each tenant's configuration is fetched from config_provider and validated
+    once when its services are built. At most max_tenants tenants stay
+    resident, so memory is bounded no matter how many tenants exist. With a
+    hierarchical limiter, each tenant's greetings are charged to its
+    tenant levels as well as the caller and global ones.
+    """
+
+    def __init__(
+        self,
+        config_provider: Callable[[str], AppConfig],
+        max_tenants: int = 1024,
+        limiter: Optional[HierarchicalRateLimiter] = None,
+    ):
+        if max_tenants < 1:
+            raise ValueError("max_tenants must be at least 1")
+        self.config_provider = config_provider
+        self.max_tenants = max_tenants
+        self.limiter = limiter
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._tenants: "OrderedDict[str, TenantServices]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, tenant_id: str) -> TenantServices:
+        """
+        Get the services for a tenant, building them on first use.
+
+        Args:
+            tenant_id: Tenant identifier
+
+        Returns:
+            TenantServices: The tenant's services
+
+        Raises:
+            ConfigurationError: If the tenant's configuration is invalid
+        """
+        with self._lock:
+            services = self._tenants.get(tenant_id)
+            if services is not None:
+                self._tenants.move_to_end(tenant_id)
+                self.hits += 1
+                return services
+
+        # Build outside the lock so a slow provider does not block hot tenants
+        built = self._build(tenant_id)
+
+        with self._lock:
+            services = self._tenants.get(tenant_id)
+            if services is not None:
+                # Another thread built this tenant first; keep its services
+                self._tenants.move_to_end(tenant_id)
+                self.hits += 1
+                return services
+            self.misses += 1
+            self._tenants[tenant_id] = built
+            while len(self._tenants) > self.max_tenants:
+                self._tenants.popitem(last=False)
+                self.evictions += 1
+        return built
+
+    def _build(self, tenant_id: str) -> TenantServices:
+        """Fetch, validate and wrap one tenant's configuration."""
+        config = self.config_provider(tenant_id)
+        try:
+            validate_config(config)
+        except ConfigurationError as error:
+            raise ConfigurationError(f"Tenant '{tenant_id}': {error}") from error
+        limiter = None if self.limiter is None else self.limiter.for_tenant(tenant_id)
+        return TenantServices(
+            config, GreetingService(config, limiter=limiter), AppInfoService(config)
+        )
+
+    def evict(self, tenant_id: str) -> bool:
+        """Drop a tenant so its services are rebuilt on next use."""
+        with self._lock:
+            return self._tenants.pop(tenant_id, None) is not None
+
+    def __contains__(self, tenant_id: object) -> bool:
+        return tenant_id in self._tenants
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    def stats(self) -> Dict[str, int]:
+        """Get registry counters."""
+        return {
+            "resident": len(self._tenants),
+            "max_tenants": self.max_tenants,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# =============================================================================
+# TRACE REPLAY
+# =============================================================================
+
+REPLAY_MODES = ("thread", "process")
+REPLAY_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+@dataclass
+class ReplayReport:
+    """Outcome of replaying a request trace."""
+
+    requests: int
+    elapsed: float
+    latency: LatencyHistogram
+    rejections: int
+    errors: Dict[str, int]
+
+    @property
+    def throughput(self) -> float:
+        """Requests completed per second of wall-clock time."""
+        return self.requests / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summarize the report with latencies in microseconds."""
+        latency = self.latency
+        return {
+            "requests": self.requests,
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput_rps": round(self.throughput, 1),
+            "latency_us": {
+                "mean": round(latency.mean / 1000, 2),
+                **{
+                    f"p{percent:g}": round(latency.percentile(percent) / 1000, 2)
+                    for percent in REPLAY_PERCENTILES
+                },
+                "max": round(latency.max / 1000, 2),
+            },
+            "rejections": self.rejections,
+            "errors": dict(self.errors),
+        }
+
+
+def read_trace(path: str):
+    """
+    Stream (timestamp_ns, caller, name) tuples from an NDJSON trace.
+
+    Each line holds a {"ts", "caller", "name"} record with ts in seconds;
+    caller may be null or missing. Blank lines are skipped.
+
+    Args:
+        path: Trace file, or "-" for standard input
+
+    Yields:
+        Tuple of integer nanosecond timestamp, caller and name
+
+    Raises:
+        ValueError: If a record is malformed
+    """
+    handle = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                yield int(record["ts"] * 1e9), record.get("caller"), record["name"]
+            except (ValueError, KeyError, TypeError) as e:
+                raise ValueError(
+                    f"Invalid trace record on line {line_number}: {e}"
+                ) from e
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def _quiet_greeting_logs(service: GreetingService) -> None:
+    """Skip per-greeting INFO logs, which would measure log I/O instead."""
+    service.logger = logging.getLogger("GreetingService.quiet")
+    service.logger.setLevel(logging.WARNING)
+
+
+def _replay_shard(
+    config: AppConfig,
+    window_ms: int,
+    max_requests: int,
+    virtual_time: bool,
+    inbox,
+) -> tuple:
+    """Greet every batch from inbox with a private limiter and tally results."""
+    clock = VirtualClock() if virtual_time else None
+    service = GreetingService(
+        config, limiter=RateLimiter(window_ms, max_requests, clock=clock)
+    )
+    _quiet_greeting_logs(service)
+
+    latency = LatencyHistogram()
+    errors: Counter = Counter()
+    rejections = 0
+    greet = service.greet
+    perf_counter_ns = time.perf_counter_ns
+    for batch in iter(inbox.get, None):
+        for ts, caller, name in batch:
+            if clock is not None and ts > clock.now_ns:
+                clock.set(ts)
+            start = perf_counter_ns()
+            try:
+                greet(name, caller=caller)
+            except Exception as e:  # Tallied, so one bad record cannot stop a run
+                if isinstance(e, RateLimitedError):
+                    rejections += 1
+                else:
+                    errors[f"{type(e).__name__}: {e}"] += 1
+            latency.record(perf_counter_ns() - start)
+    return latency, rejections, errors
+
+
+def _replay_process(*args: Any) -> None:
+    """Process target: run a shard and send its results back."""
+    *shard_args, outbox = args
+    outbox.put(_replay_shard(*shard_args))
+
+
+def replay_trace(
+    path: str,
+    config: AppConfig,
+    workers: int = 1,
+    mode: str = "thread",
+    speed: float = 0.0,
+    window_ms: int = 900000,
+    max_requests: int = 100,
+    batch_size: int = 256,
+) -> ReplayReport:
+    """
+    Replay an NDJSON request trace through GreetingService.greet.
 
-# =============================================================================
-# LOGGING CONFIGURATION
-# =============================================================================
+    Records are sharded across workers by caller, so each caller's requests
+    stay in order and meet a single limiter. Unpaced replays drive each
+    limiter from the recorded timestamps on a VirtualClock, so windows
+    expire as they did when the trace was captured; paced replays use the
+    real monotonic clock.
 
+    Args:
+        path: Trace file, or "-" for standard input
+        config: Configuration for the greeting services
+        workers: Number of parallel workers
+        mode: "thread" or "process" parallelism
+        speed: Multiple of the recorded pace to replay at (0 = unpaced)
+        window_ms: Rate limit window in milliseconds
+        max_requests: Requests allowed per caller per window
+        batch_size: Records handed to a worker at a time
 
-def setup_logging(config: AppConfig) -> None:
-    """Configure application logging."""
-    log_level = getattr(logging, config.log_level.upper(), logging.INFO)
+    Returns:
+        ReplayReport: Throughput, latency, rejection and error totals
 
-    logging.basicConfig(
-        level=log_level,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            (
-                logging.FileHandler("app.log")
-                if not config.debug
-                else logging.NullHandler()
-            ),
-        ],
+    Raises:
+        ValueError: If an argument or trace record is invalid
+    """
+    if mode not in REPLAY_MODES:
+        raise ValueError(f"Replay mode must be one of: {', '.join(REPLAY_MODES)}")
+    if workers < 1 or batch_size < 1:
+        raise ValueError("workers and batch_size must be at least 1")
+    if speed < 0:
+        raise ValueError("speed must not be negative")
+
+    shard_args = (config, window_ms, max_requests, not speed)
+    results: list = []
+    if mode == "process":
+        outbox = multiprocessing.Queue()
+        inboxes = [multiprocessing.Queue(64) for _ in range(workers)]
+        runners = [
+            multiprocessing.Process(
+                target=_replay_process, args=(*shard_args, inbox, outbox), daemon=True
+            )
+            for inbox in inboxes
+        ]
+    else:
+        inboxes = [queue.Queue(64) for _ in range(workers)]
+        runners = [
+            threading.Thread(
+                target=lambda inbox: results.append(_replay_shard(*shard_args, inbox)),
+                args=(inbox,),
+                daemon=True,
+            )
+            for inbox in inboxes
+        ]
+    for runner in runners:
+        runner.start()
+
+    batches: list = [[] for _ in range(workers)]
+    requests = 0
+    first = None
+    start = time.perf_counter()
+    try:
+        for record in read_trace(path):
+            requests += 1
+            if speed:
+                if first is None:
+                    first = record[0]
+                delay = (record[0] - first) / speed / 1e9 - (
+                    time.perf_counter() - start
+                )
+                if delay > 0:
+                    for shard, batch in enumerate(batches):
+                        if batch:
+                            inboxes[shard].put(batch)
+                            batches[shard] = []
+                    time.sleep(delay)
+            shard = hash(record[1]) % workers
+            batch = batches[shard]
+            batch.append(record)
+            if len(batch) >= batch_size:
+                inboxes[shard].put(batch)
+                batches[shard] = []
+    finally:
+        for shard, batch in enumerate(batches):
+            if batch:
+                inboxes[shard].put(batch)
+            inboxes[shard].put(None)
+
+    if mode == "process":
+        results = [outbox.get() for _ in runners]
+    for runner in runners:
+        runner.join()
+    elapsed = time.perf_counter() - start
+
+    latency = LatencyHistogram()
+    errors: Counter = Counter()
+    rejections = 0
+    for shard_latency, shard_rejections, shard_errors in results:
+        latency.merge(shard_latency)
+        rejections += shard_rejections
+        errors.update(shard_errors)
+    return ReplayReport(requests, elapsed, latency, rejections, dict(errors))
+
+
+def log_replay_report(report: ReplayReport) -> None:
+    """Log a replay summary."""
+    logger = logging.getLogger(__name__)
+    summary = report.to_dict()
+    logger.info(
+        "🔁 Replayed %d requests in %.2fs (%.0f req/s)",
+        report.requests,
+        report.elapsed,
+        report.throughput,
+    )
+    logger.info(
+        "⏱️ Latency (us): %s",
+        ", ".join(f"{key} {value}" for key, value in summary["latency_us"].items()),
     )
+    logger.info("🚦 Rate limit rejections: %d", report.rejections)
+    for error, count in sorted(report.errors.items(), key=lambda item: -item[1]):
+        logger.info("  ❌ %s: %d", error, count)
 
 
 # =============================================================================
-# BUSINESS LOGIC
+# MEMORY PROFILING
 # =============================================================================
 
+MEMORY_WORKLOADS = ("greet", "is_allowed")
 
-class GreetingService:
-    """Service for generating personalized greetings."""
+# Allocations made by the profiler itself rather than the workload
+_PROFILER_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
 
-    def __init__(self, config: AppConfig):
-        self.config = config
-        self.logger = logging.getLogger(self.__class__.__name__)
 
-    def greet(self, name: str) -> str:
-        """
-        Generate a personalized greeting message.
+@dataclass
+class MemoryProfile:
+    """Memory retained by a workload, as measured by tracemalloc."""
 
-        Args:
-            name: The name to greet
+    operations: int
+    retained: int
+    peak: int
+    top: list
 
-        Returns:
-            str: Greeting message
+    @property
+    def bytes_per_op(self) -> float:
+        """Bytes still allocated after the workload, per operation."""
+        return self.retained / self.operations if self.operations else 0.0
 
-        Raises:
-            ValueError: If name is invalid
-        """
-        # Rate limiting check
-        identifier = "greet_function"  # In a real app, use IP or user ID
-        if not rate_limiter.is_allowed(identifier):
-            raise ValueError("Rate limit exceeded. Please try again later.")
+    @property
+    def peak_per_op(self) -> float:
+        """Peak bytes allocated during the workload, per operation."""
+        return self.peak / self.operations if self.operations else 0.0
 
-        # Validate original input before sanitization
-        if not isinstance(name, str):
-            raise ValueError("Name must be a string")
 
-        if not name.strip():
-            raise ValueError("Name cannot be empty")
+def profile_memory(
+    operation: Callable[[int], Any], operations: int, top: int = 10
+) -> MemoryProfile:
+    """
+    Run a workload under tracemalloc and report what it left allocated.
 
-        if len(name) > 50:
-            raise ValueError("Name must be between 1 and 50 characters long")
+    Snapshots are taken before and after the workload (after a full
+    collection, so only memory that is really retained counts) and diffed by
+    source line.
 
-        if "\n" in name or "\t" in name:
-            raise ValueError("Name cannot contain newlines or tabs")
+    Args:
+        operation: Callable invoked with each operation's index
+        operations: Number of times to call operation
+        top: Number of allocation sites to report
 
-        # Input sanitization
-        sanitized_name = sanitize_input(name, max_length=50, strip_html=True)
+    Returns:
+        MemoryProfile: Retained and peak bytes and the top allocation sites
+            as (location, size_diff, count_diff) tuples
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        gc.collect()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        for index in range(operations):
+            operation(index)
+        _, peak = tracemalloc.get_traced_memory()
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    stats = after.filter_traces(_PROFILER_FILTERS).compare_to(
+        before.filter_traces(_PROFILER_FILTERS), "lineno"
+    )
+    sites = [
+        (str(stat.traceback[0]), stat.size_diff, stat.count_diff)
+        for stat in stats[:top]
+        if stat.size_diff
+    ]
+    return MemoryProfile(
+        operations=operations,
+        retained=sum(stat.size_diff for stat in stats),
+        peak=max(0, peak - baseline),
+        top=sites,
+    )
 
-        if not sanitized_name:
-            raise ValueError("Name cannot be empty after sanitization")
 
-        # Validate name length and characters after sanitization
-        if len(sanitized_name) < 1:
-            raise ValueError("Name must be between 1 and 50 characters long")
+def build_memory_workload(
+    workload: str,
+    config: AppConfig,
+    identifiers: int = 1000,
+    window_ms: int = 900000,
+    max_requests: int = 100,
+) -> Callable[[int], Any]:
+    """
+    Build an operation for profile_memory that cycles through identifiers.
 
-        if not re.match(r"^[a-zA-Z\s\-']+$", sanitized_name):
-            raise ValueError(
-                "Name can only contain letters, spaces, hyphens, and apostrophes"
-            )
+    Args:
+        workload: "greet" (the full GreetingService path) or "is_allowed"
+            (the rate limiter alone)
+        config: Configuration for the greeting service
+        identifiers: Number of distinct callers
+        window_ms: Rate limit window in milliseconds
+        max_requests: Requests allowed per caller per window
 
-        greeting = f"Hello, {sanitized_name}! Welcome to {self.config.app_name}"
-        self.logger.info("Generated greeting for: %s", sanitized_name)
-        return greeting
+    Returns:
+        Callable taking the operation index
 
-    def get_multiple_greetings(self, names: list[str]) -> list[str]:
-        """
-        Generate greetings for multiple names.
+    Raises:
+        ValueError: If the workload is unknown or identifiers is not positive
+    """
+    if workload not in MEMORY_WORKLOADS:
+        raise ValueError(
+            f"Memory workload must be one of: {', '.join(MEMORY_WORKLOADS)}"
+        )
+    if identifiers < 1:
+        raise ValueError("identifiers must be at least 1")
 
-        Args:
-            names: List of names to greet
+    callers = [
+        f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}"
+        for index in range(identifiers)
+    ]
+    limiter = RateLimiter(window_ms, max_requests)
+    if workload == "is_allowed":
+        return lambda index: limiter.is_allowed(callers[index % identifiers])
 
-        Returns:
-            list[str]: List of greeting messages
-        """
-        return [self.greet(name) for name in names]
+    service = GreetingService(config, limiter=limiter)
+    _quiet_greeting_logs(service)
 
+    def greet(index: int) -> None:
+        try:
+            service.greet("Alice", caller=callers[index % identifiers])
+        except ValueError:
+            pass  # Rejections are part of the steady state being measured
 
-class AppInfoService:
-    """Service for retrieving application information."""
+    return greet
 
-    def __init__(self, config: AppConfig):
-        self.config = config
-        self.logger = logging.getLogger(self.__class__.__name__)
 
-    def get_app_info(self) -> Dict[str, Any]:
-        """Get comprehensive application information."""
-        return {
-            "name": self.config.app_name,
-            "version": self.config.app_version,
-            "environment": self.config.environment,
-            "python_version": sys.version,
-            "platform": sys.platform,
-            "debug_mode": self.config.debug,
-        }
+def log_memory_profile(profile: MemoryProfile) -> None:
+    """Log a memory profile summary."""
+    logger = logging.getLogger(__name__)
+    logger.info(
+        "🧠 %d operations retained %d bytes (%.1f B/op), peak %d bytes " "(%.1f B/op)",
+        profile.operations,
+        profile.retained,
+        profile.bytes_per_op,
+        profile.peak,
+        profile.peak_per_op,
+    )
+    for location, size, count in profile.top:
+        logger.info("  %s: %+d bytes in %+d blocks", location, size, count)
 
 
 # =============================================================================
@@ -445,8 +4416,9 @@ class AppInfoService:
 if typer:
     app = typer.Typer()
 
-    @app.command()
+    @app.callback(invoke_without_command=True)
     def main(
+        ctx: typer.Context = None,
         name: str = typer.Option("Developer", "--name", "-n", help="Name to greet"),
         verbose: bool = typer.Option(
             False, "--verbose", "-v", help="Enable verbose output"
@@ -456,25 +4428,43 @@ if typer:
         ),
     ):
         """Main application entry point."""
+        if ctx is not None and ctx.invoked_subcommand is not None:
+            return
         try:
-            # Load configuration
-            config = load_configuration()
+            # Trace startup when TRACE_FILE is set in the environment
+            configure_tracing()
 
-            # Setup logging
-            setup_logging(config)
+            with tracer.span("startup"):
+                # Load configuration
+                config = load_configuration()
 
-            # Log startup information
-            log_startup_info(config)
+                # Setup logging
+                setup_logging(config)
 
-            # Initialize services
-            greeting_service = GreetingService(config)
-            app_info_service = AppInfoService(config)
+                # Carry rate limits over from the previous run
+                configure_rate_limit_persistence()
+                configure_denylist()
+                configure_cache()
+                configure_concurrency_limit()
+                configure_singleflight()
+
+                # Log startup information
+                log_startup_info(config)
+
+                # Initialize services
+                with tracer.span("startup.services"):
+                    greeting_service = GreetingService(config)
+                    app_info_service = AppInfoService(config)
 
             # Create args-like object
             args = type(
                 "Args",
                 (),
-                {"name": name, "verbose": verbose, "list_greetings": list_greetings},
+                {
+                    "name": name,
+                    "verbose": verbose,
+                    "list_greetings": list_greetings,
+                },
             )()
 
             # Demonstrate features
@@ -501,6 +4491,136 @@ if typer:
                 traceback.print_exc()
             sys.exit(1)
 
+    @app.command()
+    def replay(
+        trace: str = typer.Argument(
+            ..., help="NDJSON trace of {ts, caller, name} records ('-' for stdin)"
+        ),
+        workers: int = typer.Option(1, "--workers", "-w", help="Parallel workers"),
+        mode: str = typer.Option(
+            "thread", "--mode", help="Parallelism: thread or process"
+        ),
+        speed: float = typer.Option(
+            0.0, "--speed", help="Multiple of the recorded pace (0 = unpaced)"
+        ),
+        window_ms: int = typer.Option(
+            900000, "--window-ms", help="Rate limit window in milliseconds"
+        ),
+        max_requests: int = typer.Option(
+            100, "--max-requests", help="Requests allowed per caller per window"
+        ),
+    ):
+        """Replay a request trace and report throughput and latency."""
+        run_replay(
+            argparse.Namespace(
+                trace=trace,
+                workers=workers,
+                mode=mode,
+                speed=speed,
+                window_ms=window_ms,
+                max_requests=max_requests,
+            )
+        )
+
+    @app.command("profile-memory")
+    def profile_memory_command(
+        workload: str = typer.Option(
+            "greet", "--workload", help="Workload: greet or is_allowed"
+        ),
+        operations: int = typer.Option(
+            1_000_000, "--operations", help="Number of calls to profile"
+        ),
+        identifiers: int = typer.Option(
+            1000, "--identifiers", help="Distinct callers to cycle through"
+        ),
+        window_ms: int = typer.Option(
+            900000, "--window-ms", help="Rate limit window in milliseconds"
+        ),
+        max_requests: int = typer.Option(
+            100, "--max-requests", help="Requests allowed per caller per window"
+        ),
+        top: int = typer.Option(10, "--top", help="Allocation sites to report"),
+    ):
+        """Profile the memory a workload leaves allocated."""
+        run_profile_memory(
+            argparse.Namespace(
+                workload=workload,
+                operations=operations,
+                identifiers=identifiers,
+                window_ms=window_ms,
+                max_requests=max_requests,
+                top=top,
+            )
+        )
+
+    @app.command()
+    def daemon(
+        socket_path: str = typer.Option(
+            None, "--socket", help="Unix socket path (default: DAEMON_SOCKET)"
+        ),
+        workers: int = typer.Option(4, "--workers", "-w", help="Greeting workers"),
+        max_queue: int = typer.Option(
+            64, "--max-queue", help="Requests that may wait for a worker"
+        ),
+        policy: str = typer.Option(
+            "codel", "--policy", help="Load shedding policy: codel or max-wait"
+        ),
+    ):
+        """Serve greetings over a Unix socket from warm services."""
+        run_daemon(
+            argparse.Namespace(
+                socket=socket_path or default_daemon_socket(),
+                workers=workers,
+                max_queue=max_queue,
+                policy=policy,
+            )
+        )
+
+    @app.command()
+    def serve(
+        host: str = typer.Option("127.0.0.1", "--host", help="Address to listen on"),
+        port: int = typer.Option(8000, "--port", "-p", help="Port to listen on"),
+        workers: int = typer.Option(
+            os.cpu_count() or 1, "--workers", "-w", help="Worker processes"
+        ),
+        threads: int = typer.Option(
+            4, "--threads", help="Greeting threads per worker process"
+        ),
+        max_queue: int = typer.Option(
+            64, "--max-queue", help="Requests that may wait for a worker thread"
+        ),
+        policy: str = typer.Option(
+            "codel", "--policy", help="Load shedding policy: codel or max-wait"
+        ),
+        shared_socket: bool = typer.Option(
+            False, "--shared-socket", help="Accept from one socket, not SO_REUSEPORT"
+        ),
+        drain_timeout: float = typer.Option(
+            30.0, "--drain-timeout", help="Seconds workers get to drain on shutdown"
+        ),
+        window_ms: int = typer.Option(
+            900000, "--window-ms", help="Rate limit window in milliseconds"
+        ),
+        max_requests: int = typer.Option(
+            100, "--max-requests", help="Requests allowed per caller per window"
+        ),
+    ):
+        """Serve greetings over HTTP from pre-forked worker processes."""
+        run_serve(
+            argparse.Namespace(
+                host=host,
+                port=port,
+                workers=workers,
+                threads=threads,
+                max_queue=max_queue,
+                policy=policy,
+                shared_socket=shared_socket,
+                drain_timeout=drain_timeout,
+                window_ms=window_ms,
+                max_requests=max_requests,
+            )
+        )
+
 
 def parse_arguments() -> argparse.Namespace:
     """Parse command-line arguments."""
@@ -515,6 +4635,135 @@ def parse_arguments() -> argparse.Namespace:
         "--list-greetings", action="store_true", help="Show multiple greeting examples"
     )
 
+    subparsers = parser.add_subparsers(dest="command")
+    replay = subparsers.add_parser(
+        "replay", help="Replay a request trace and report throughput and latency"
+    )
+    replay.add_argument(
+        "trace", help="NDJSON trace of {ts, caller, name} records ('-' for stdin)"
+    )
+    replay.add_argument(
+        "--workers", "-w", type=int, default=1, help="Parallel workers (default: 1)"
+    )
+    replay.add_argument(
+        "--mode", choices=REPLAY_MODES, default="thread", help="Parallelism"
+    )
+    replay.add_argument(
+        "--speed",
+        type=float,
+        default=0.0,
+        help="Multiple of the recorded pace (default: 0, unpaced)",
+    )
+    replay.add_argument(
+        "--window-ms", type=int, default=900000, help="Rate limit window"
+    )
+    replay.add_argument(
+        "--max-requests",
+        type=int,
+        default=100,
+        help="Requests allowed per caller per window",
+    )
+
+    profile = subparsers.add_parser(
+        "profile-memory", help="Profile the memory a workload leaves allocated"
+    )
+    profile.add_argument(
+        "--workload", choices=MEMORY_WORKLOADS, default="greet", help="Workload"
+    )
+    profile.add_argument(
+        "--operations", type=int, default=1_000_000, help="Number of calls"
+    )
+    profile.add_argument(
+        "--identifiers", type=int, default=1000, help="Distinct callers"
+    )
+    profile.add_argument(
+        "--window-ms", type=int, default=900000, help="Rate limit window"
+    )
+    profile.add_argument(
+        "--max-requests",
+        type=int,
+        default=100,
+        help="Requests allowed per caller per window",
+    )
+    profile.add_argument(
+        "--top", type=int, default=10, help="Allocation sites to report"
+    )
+
+    daemon = subparsers.add_parser(
+        "daemon", help="Serve greetings over a Unix socket from warm services"
+    )
+    daemon.add_argument(
+        "--socket",
+        default=default_daemon_socket(),
+        help="Unix socket path (default: DAEMON_SOCKET or the temp directory)",
+    )
+    daemon.add_argument(
+        "--workers", "-w", type=int, default=4, help="Greeting workers (default: 4)"
+    )
+    daemon.add_argument(
+        "--max-queue",
+        type=int,
+        default=64,
+        help="Requests that may wait for a worker (default: 64)",
+    )
+    daemon.add_argument(
+        "--policy",
+        choices=ADMISSION_POLICIES,
+        default="codel",
+        help="Load shedding policy",
+    )
+
+    serve = subparsers.add_parser(
+        "serve", help="Serve greetings over HTTP from pre-forked worker processes"
+    )
+    serve.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    serve.add_argument("--port", "-p", type=int, default=8000, help="Port to listen on")
+    serve.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes (default: one per CPU)",
+    )
+    serve.add_argument(
+        "--threads",
+        type=int,
+        default=4,
+        help="Greeting threads per worker process (default: 4)",
+    )
+    serve.add_argument(
+        "--max-queue",
+        type=int,
+        default=64,
+        help="Requests that may wait for a worker thread (default: 64)",
+    )
+    serve.add_argument(
+        "--policy",
+        choices=ADMISSION_POLICIES,
+        default="codel",
+        help="Load shedding policy",
+    )
+    serve.add_argument(
+        "--shared-socket",
+        action="store_true",
+        help="Accept from one socket instead of SO_REUSEPORT",
+    )
+    serve.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=30.0,
+        help="Seconds workers get to drain on shutdown",
+    )
+    serve.add_argument(
+        "--window-ms", type=int, default=900000, help="Rate limit window"
+    )
+    serve.add_argument(
+        "--max-requests",
+        type=int,
+        default=100,
+        help="Requests allowed per caller per window",
+    )
+
     return parser.parse_args()
 
 
@@ -524,18 +4773,36 @@ def main_fallback() -> None:
         # Parse command-line arguments
         args = parse_arguments()
 
-        # Load configuration
-        config = load_configuration()
+        # Subcommands replace the feature demonstration
+        command = CLI_COMMANDS.get(args.command)
+        if command is not None:
+            command(args)
+            return
 
-        # Setup logging
-        setup_logging(config)
+        # Trace startup when TRACE_FILE is set in the environment
+        configure_tracing()
+
+        with tracer.span("startup"):
+            # Load configuration
+            config = load_configuration()
+
+            # Setup logging
+            setup_logging(config)
 
-        # Log startup information
-        log_startup_info(config)
+            # Carry rate limits over from the previous run
+            configure_rate_limit_persistence()
+            configure_denylist()
+            configure_cache()
+            configure_concurrency_limit()
+            configure_singleflight()
 
-        # Initialize services
-        greeting_service = GreetingService(config)
-        app_info_service = AppInfoService(config)
+            # Log startup information
+            log_startup_info(config)
+
+            # Initialize services
+            with tracer.span("startup.services"):
+                greeting_service = GreetingService(config)
+                app_info_service = AppInfoService(config)
 
         # Demonstrate features
         demonstrate_features(greeting_service, app_info_service, args)
@@ -562,6 +4829,211 @@ def main_fallback() -> None:
         sys.exit(1)
 
 
+def run_replay(args: argparse.Namespace) -> None:
+    """
+    Run the replay subcommand.
+
+    Args:
+        args: Parsed arguments with trace, workers, mode, speed, window_ms
+            and max_requests
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        config = load_configuration()
+        setup_logging(config)
+        report = replay_trace(
+            args.trace,
+            config,
+            workers=args.workers,
+            mode=args.mode,
+            speed=args.speed,
+            window_ms=args.window_ms,
+            max_requests=args.max_requests,
+        )
+        log_replay_report(report)
+    except KeyboardInterrupt:
+        logger.info("🛑 Replay interrupted by user")
+        sys.exit(0)
+    except (ConfigurationError, ValueError, OSError) as e:
+        logger.error("💥 Replay failed: %s", e)
+        sys.exit(1)
+
+
+def run_profile_memory(args: argparse.Namespace) -> None:
+    """
+    Run the profile-memory subcommand.
+
+    Args:
+        args: Parsed arguments with workload, operations, identifiers,
+            window_ms, max_requests and top
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        config = load_configuration()
+        setup_logging(config)
+        operation = build_memory_workload(
+            args.workload,
+            config,
+            identifiers=args.identifiers,
+            window_ms=args.window_ms,
+            max_requests=args.max_requests,
+        )
+        log_memory_profile(profile_memory(operation, args.operations, args.top))
+    except KeyboardInterrupt:
+        logger.info("🛑 Memory profiling interrupted by user")
+        sys.exit(0)
+    except (ConfigurationError, ValueError) as e:
+        logger.error("💥 Memory profiling failed: %s", e)
+        sys.exit(1)
+
+
+def run_daemon(args: argparse.Namespace) -> None:
+    """
+    Run the daemon subcommand until interrupted or sent SIGTERM.
+
+    Args:
+        args: Parsed arguments with socket, workers, max_queue and policy
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        config = load_configuration()
+        setup_logging(config)
+        configure_rate_limit_persistence()
+        configure_denylist()
+        configure_cache()
+        configure_concurrency_limit()
+        configure_singleflight()
+        track_offenders(rate_limiter)
+        greeting_service = GreetingService(config)
+        admission = AdmissionController(
+            greeting_service.greet,
+            workers=args.workers,
+            max_queue=args.max_queue,
+            policy=args.policy,
+        )
+        try:
+            server = GreetingDaemon(
+                args.socket, greeting_service, AppInfoService(config), admission
+            )
+        except BaseException:
+            admission.close()
+            raise
+    except KeyboardInterrupt:
+        logger.info("🛑 Daemon interrupted by user")
+        sys.exit(0)
+    except (ConfigurationError, ValueError, OSError) as e:
+        logger.error("💥 Daemon failed to start: %s", e)
+        sys.exit(1)
+
+    # serve_forever must be stopped from another thread
+    signal.signal(
+        signal.SIGTERM,
+        lambda signum, frame: threading.Thread(target=server.shutdown).start(),
+    )
+    logger.info("👂 Daemon listening on %s", args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("🛑 Daemon interrupted by user")
+    finally:
+        server.server_close()
+        admission.close()
+        logger.info("📊 Admission metrics: %s", admission.metrics())
+
+
+def prepare_worker_fork() -> None:
+    """Flush logs and spans buffered in this process before a worker forks."""
+    # A worker cannot use the parent's log listener thread, so log
+    # synchronously from here on
+    shutdown_logging()
+    if tracer.enabled:
+        tracer.exporter.flush()
+
+
+def init_worker(slot: int) -> None:
+    """
+    Drop state a forked HTTP worker must not share with its parent.
+
+    Args:
+        slot: Worker slot, used to name the worker's own log file
+    """
+    # Pooled Redis connections were opened by the parent; never share them
+    if response_cache is not None:
+        response_cache.close()
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, BufferedRotatingFileHandler):
+            base, extension = os.path.splitext(handler.baseFilename)
+            handler.reopen(f"{base}.worker{slot}{extension}")
+
+
+def exit_worker() -> None:
+    """Flush spans a forked HTTP worker buffered, since os._exit skips atexit."""
+    tracer.shutdown()
+
+
+def run_serve(args: argparse.Namespace) -> None:
+    """
+    Run the serve subcommand until SIGTERM or SIGINT.
+
+    Configuration is loaded and validated once, before any worker forks.
+
+    Args:
+        args: Parsed arguments with host, port, workers, threads, max_queue,
+            policy, shared_socket, drain_timeout, window_ms and max_requests
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        config = load_configuration()
+        setup_logging(config)
+        configure_denylist()
+        configure_cache()
+        configure_concurrency_limit()
+        configure_singleflight()
+        limiter = RateLimiter(window_ms=args.window_ms, max_requests=args.max_requests)
+        track_offenders(limiter)
+        server = PreforkServer(
+            args.host,
+            args.port,
+            args.workers,
+            GreetingService(config, limiter=limiter),
+            AppInfoService(config),
+            reuse_port=not args.shared_socket,
+            drain_timeout=args.drain_timeout,
+            threads=args.threads,
+            max_queue=args.max_queue,
+            policy=args.policy,
+            before_fork=prepare_worker_fork,
+            worker_init=init_worker,
+            worker_exit=exit_worker,
+        )
+        server.bind()
+    except KeyboardInterrupt:
+        logger.info("🛑 Server interrupted by user")
+        sys.exit(0)
+    except (ConfigurationError, ValueError, OSError) as e:
+        logger.error("💥 Server failed to start: %s", e)
+        sys.exit(1)
+
+    logger.info(
+        "🌐 Serving on http://%s:%d with %d workers (%s)",
+        args.host,
+        server.port,
+        args.workers,
+        "SO_REUSEPORT" if server.reuse_port else "shared socket",
+    )
+    server.serve_forever()
+    logger.info("✅ Server stopped after %d worker restarts", server.restarts)
+
+
+# Subcommands dispatched by main_fallback
+CLI_COMMANDS: Dict[str, Callable[[argparse.Namespace], None]] = {
+    "replay": run_replay,
+    "profile-memory": run_profile_memory,
+    "daemon": run_daemon,
+    "serve": run_serve,
+}
+
+
 def log_startup_info(config: AppConfig) -> None:
     """Log application startup information."""
     logger = logging.getLogger(__name__)
@@ -604,6 +5076,20 @@ def demonstrate_features(
         logger.info("  %s: %s", key, value)
 
 
+def track_offenders(limiter: RateLimiter) -> None:
+    """
+    Start tracking heavy hitters on a long-lived limiter.
+
+    The sketch has a fixed size, so tracking costs the same whatever the
+    number of callers; servers report it through their offenders op.
+
+    Args:
+        limiter: Limiter to track, unless it already has a tracker
+    """
+    if limiter.tracker is None:
+        limiter.tracker = HeavyHitterTracker()
+
+
 # =============================================================================
 # APPLICATION ENTRY POINT
 # =============================================================================
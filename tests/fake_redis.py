@@ -0,0 +1,137 @@
+"""
+In-process fake of a Redis server, for testing the cache's Redis tier.
+
+Speaks enough RESP2 for RedisClient: PING, AUTH, SELECT, GET, SET (with EX
+or PX), MGET, DEL and FLUSHDB. Every request batch read from a socket is
+counted, so tests can check that pipelined commands share a round trip.
+"""
+
+import socketserver
+import threading
+import time
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Threaded RESP server on 127.0.0.1 with an ephemeral port."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password=None):
+        super().__init__(("127.0.0.1", 0), _FakeRedisHandler)
+        self.password = password
+        self.data = {}
+        self.commands = []
+        self.round_trips = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+    def execute(self, args, authenticated):
+        """Run one command; return its RESP reply and the new auth state."""
+        name = args[0].upper().decode()
+        with self.lock:
+            self.commands.append(name)
+            if name == "AUTH":
+                if args[1].decode() == self.password:
+                    return b"+OK\r\n", True
+                return b"-WRONGPASS invalid password\r\n", False
+            if self.password and not authenticated:
+                return b"-NOAUTH Authentication required.\r\n", False
+            return self._dispatch(name, args[1:]), authenticated
+
+    def _dispatch(self, name, args):
+        if name == "PING":
+            return b"+PONG\r\n"
+        if name == "SELECT":
+            return b"+OK\r\n"
+        if name == "GET":
+            return _bulk(self._get(args[0]))
+        if name == "MGET":
+            return b"*%d\r\n" % len(args) + b"".join(_bulk(self._get(k)) for k in args)
+        if name == "SET":
+            expires_at = None
+            if len(args) == 4:
+                unit = 1 if args[2].upper() == b"EX" else 0.001
+                expires_at = time.monotonic() + int(args[3]) * unit
+            self.data[args[0]] = (args[1], expires_at)
+            return b"+OK\r\n"
+        if name == "DEL":
+            return b":%d\r\n" % sum(self.data.pop(k, None) is not None for k in args)
+        if name == "FLUSHDB":
+            self.data.clear()
+            return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % name.encode()
+
+    def _get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+
+def _bulk(value):
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class _FakeRedisHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        authenticated = False
+        buffer = b""
+        while True:
+            data = self.request.recv(65536)
+            if not data:
+                return
+            buffer += data
+            # Every complete command received in one read is one round trip
+            replies = []
+            while True:
+                parsed = _parse_command(buffer)
+                if parsed is None:
+                    break
+                args, buffer = parsed
+                reply, authenticated = server.execute(args, authenticated)
+                replies.append(reply)
+            if replies:
+                with server.lock:
+                    server.round_trips += 1
+                self.request.sendall(b"".join(replies))
+
+
+def _parse_command(buffer):
+    """Split one RESP array off buffer; None if it is still incomplete."""
+    end = buffer.find(b"\r\n")
+    if end < 0:
+        return None
+    count = int(buffer[1:end])
+    position = end + 2
+    args = []
+    for _ in range(count):
+        end = buffer.find(b"\r\n", position)
+        if end < 0:
+            return None
+        length = int(buffer[position + 1 : end])
+        start = end + 2
+        if len(buffer) < start + length + 2:
+            return None
+        args.append(buffer[start : start + length])
+        position = start + length + 2
+    return args, buffer[position:]
@@ -6,11 +6,29 @@ This module contains comprehensive unit tests for all classes and functions
 in the main application.
 """
 
+import asyncio
+import fcntl
+import gzip
+import http.client
+import json
 import os
+import sys
+import queue
+import signal
+import socket
+import socketserver
+import tempfile
+import threading
+import time
 import unittest  # noqa: E402
 import logging  # noqa: E402
 from unittest.mock import patch, MagicMock  # noqa: E402
 from src import main  # noqa: E402
+
+try:
+    from hypothesis import given, settings, strategies as st
+except ImportError:
+    given = None
 from src.main import (  # noqa: E402
     AppConfig,
     ConfigurationError,
@@ -24,7 +42,94 @@ from src.main import (  # noqa: E402
     demonstrate_features,
     sanitize_input,
     is_sensitive_value,
+    config_fingerprint,
+    read_config_snapshot,
+    write_config_snapshot,
+    Settings,
+    load_settings,
+    parse_settings,
+    clear_settings_cache,
+    LoggingOptions,
+    BoundedQueueHandler,
+    load_logging_options,
+    shutdown_logging,
+    JsonFormatter,
+    SamplingFilter,
+    BufferedRotatingFileHandler,
+    parse_size,
+    TenantRegistry,
+    GreetingCatalog,
+    compile_template,
+    load_greeting_catalog,
+    validate_name,
+    RateLimiter,
+    compact_key,
+    configure_rate_limit_persistence,
+    HeavyHitterTracker,
+    Denylist,
+    DenylistGuard,
+    configure_denylist,
+    read_denylist_entries,
+    HierarchicalRateLimiter,
+    RateLimitLevel,
+    AdaptiveConcurrencyLimiter,
+    configure_concurrency_limit,
+    VirtualClock,
+    read_trace,
+    replay_trace,
+    profile_memory,
+    build_memory_workload,
+    Tracer,
+    NdjsonSpanExporter,
+    NOOP_SPAN,
+    configure_cache,
+    SingleFlight,
+    configure_singleflight,
+    prepare_worker_fork,
+    init_worker,
+    exit_worker,
 )
+from src import greet_client  # noqa: E402
+from admission import AdmissionController  # noqa: E402
+from cache import (
+    CACHE_MISS,
+    CacheError,
+    LRUCache,
+    RedisClient,
+    TwoTierCache,
+)  # noqa: E402
+from daemon_server import (
+    DAEMON_FRAME,
+    DAEMON_MAX_FRAME,
+    GreetingDaemon,
+    read_frame,
+)  # noqa: E402
+from errors import DeniedError, OverloadedError, RateLimitedError  # noqa: E402
+from histogram import LatencyHistogram  # noqa: E402
+from http_server import GreetingHTTPServer, PreforkServer  # noqa: E402
+from tests.fake_redis import FakeRedisServer  # noqa: E402
+
+
+def isolate_root_logging(test, log_dir):
+    """Send log files to log_dir and restore the root logger after a test."""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    log_file = os.environ.get("LOG_FILE")
+    os.environ["LOG_FILE"] = os.path.join(log_dir, "app.log")
+
+    def restore():
+        if log_file is None:
+            os.environ.pop("LOG_FILE", None)
+        else:
+            os.environ["LOG_FILE"] = log_file
+        shutdown_logging()
+        for handler in root.handlers:
+            if handler not in handlers:
+                handler.close()
+        root.handlers[:] = handlers
+        root.setLevel(level)
+
+    test.addCleanup(restore)
 
 
 class TestAppConfig(unittest.TestCase):
@@ -228,6 +333,240 @@ class TestConfiguration(unittest.TestCase):
                 validate_config(config)
 
 
+class TestConfigSnapshot(unittest.TestCase):
+    """Test cases for the configuration snapshot cache."""
+
+    def setUp(self):
+        """Set up a temporary snapshot location."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.snapshot_path = os.path.join(self.tmpdir.name, "config.snapshot")
+        self.config = AppConfig(
+            app_name="Snapshot App",
+            app_version="1.2.3",
+            environment="staging",
+            debug=True,
+            log_level="WARNING",
+        )
+
+    def tearDown(self):
+        """Remove the temporary snapshot location."""
+        self.tmpdir.cleanup()
+
+    def test_snapshot_round_trip(self):
+        """Test a written snapshot is read back unchanged."""
+        fingerprint = b"f" * 16
+        write_config_snapshot(self.snapshot_path, self.config, fingerprint)
+        self.assertEqual(
+            read_config_snapshot(self.snapshot_path, fingerprint), self.config
+        )
+
+    def test_snapshot_fingerprint_mismatch(self):
+        """Test a snapshot for different sources is ignored."""
+        write_config_snapshot(self.snapshot_path, self.config, b"a" * 16)
+        self.assertIsNone(read_config_snapshot(self.snapshot_path, b"b" * 16))
+
+    def test_snapshot_corrupt_file(self):
+        """Test a truncated or garbage snapshot is ignored."""
+        fingerprint = b"f" * 16
+        write_config_snapshot(self.snapshot_path, self.config, fingerprint)
+        with open(self.snapshot_path, "rb") as handle:
+            data = handle.read()
+        for corrupt in (data[:-3], b"garbage", data + b"x"):
+            with self.subTest(corrupt=corrupt[:8]):
+                with open(self.snapshot_path, "wb") as handle:
+                    handle.write(corrupt)
+                self.assertIsNone(read_config_snapshot(self.snapshot_path, fingerprint))
+
+    def test_snapshot_missing_file(self):
+        """Test a missing snapshot is reported as a miss."""
+        self.assertIsNone(read_config_snapshot(self.snapshot_path, b"f" * 16))
+
+    @patch.dict(os.environ, {"APP_NAME": "Fingerprint App"})
+    def test_fingerprint_tracks_environment(self):
+        """Test the fingerprint changes when a source variable changes."""
+        before = config_fingerprint()
+        self.assertEqual(before, config_fingerprint())
+        os.environ["APP_NAME"] = "Other App"
+        self.assertNotEqual(before, config_fingerprint())
+
+    def test_fingerprint_tracks_env_file(self):
+        """Test the fingerprint changes when the .env file changes."""
+        env_path = main.Path(self.tmpdir.name) / ".env"
+        missing = config_fingerprint(env_path)
+        env_path.write_text("APP_NAME=One\n")
+        first = config_fingerprint(env_path)
+        env_path.write_text("APP_NAME=Two\n")
+        self.assertNotEqual(missing, first)
+        self.assertNotEqual(first, config_fingerprint(env_path))
+
+    @patch.dict(os.environ, {"APP_NAME": "Snapshot App", "APP_ENV": "staging"})
+    def test_load_configuration_uses_snapshot(self):
+        """Test a current snapshot skips loading from sources."""
+        first = load_configuration(snapshot_path=self.snapshot_path)
+        self.assertTrue(os.path.exists(self.snapshot_path))
+
+        with patch.object(main, "_load_configuration_from_sources") as mock_load:
+            second = load_configuration(snapshot_path=self.snapshot_path)
+            mock_load.assert_not_called()
+        self.assertEqual(first, second)
+
+    @patch.dict(os.environ, {"APP_NAME": "Snapshot App", "APP_ENV": "staging"})
+    def test_load_configuration_invalidates_snapshot(self):
+        """Test a stale snapshot is replaced with freshly loaded values."""
+        load_configuration(snapshot_path=self.snapshot_path)
+        os.environ["APP_NAME"] = "Renamed App"
+        config = load_configuration(snapshot_path=self.snapshot_path)
+        self.assertEqual(config.app_name, "Renamed App")
+        self.assertEqual(
+            read_config_snapshot(self.snapshot_path, config_fingerprint()), config
+        )
+
+    @patch.dict(os.environ, {}, clear=False)
+    def test_load_configuration_snapshot_restores_env_file(self):
+        """Test a warm start still exposes .env settings outside AppConfig."""
+        for key in ("APP_NAME", "CACHE_ENABLED", "NODE_ENV", "CI"):
+            os.environ.pop(key, None)
+        main.Path(self.tmpdir.name, ".env").write_text(
+            "APP_NAME=Acme\nCACHE_ENABLED=true\n"
+        )
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        self.addCleanup(os.chdir, cwd)
+
+        cold = load_configuration(snapshot_path=self.snapshot_path)
+        self.assertEqual(os.environ["CACHE_ENABLED"], "true")
+
+        # A fresh process: the .env variables are not in the environment yet
+        del os.environ["APP_NAME"], os.environ["CACHE_ENABLED"]
+        with patch.object(main, "_load_configuration_from_sources") as mock_load:
+            warm = load_configuration(snapshot_path=self.snapshot_path)
+            mock_load.assert_not_called()
+        self.assertEqual(warm, cold)
+        self.assertEqual(os.environ["APP_NAME"], "Acme")
+        self.assertEqual(os.environ["CACHE_ENABLED"], "true")
+
+        # The real environment still wins over the .env file
+        os.environ["CACHE_ENABLED"] = "false"
+        load_configuration(snapshot_path=self.snapshot_path)
+        self.assertEqual(os.environ["CACHE_ENABLED"], "false")
+
+    @patch.dict(os.environ, {}, clear=False)
+    def test_load_configuration_snapshot_keeps_env_file_values_already_set(self):
+        """Test .env values shadowed by the writing run are still restored."""
+        for key in ("NODE_ENV", "CI"):
+            os.environ.pop(key, None)
+        os.environ["EXTRA_VAR"] = "real"
+        main.Path(self.tmpdir.name, ".env").write_text("EXTRA_VAR=hello\n")
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        self.addCleanup(os.chdir, cwd)
+
+        load_configuration(snapshot_path=self.snapshot_path)
+        self.assertEqual(os.environ["EXTRA_VAR"], "real")
+
+        del os.environ["EXTRA_VAR"]
+        with patch.object(main, "_load_configuration_from_sources") as mock_load:
+            load_configuration(snapshot_path=self.snapshot_path)
+            mock_load.assert_not_called()
+        self.assertEqual(os.environ["EXTRA_VAR"], "hello")
+
+
+class TestSettings(unittest.TestCase):
+    """Test cases for the config.json settings loader."""
+
+    def setUp(self):
+        """Set up a sample settings document."""
+        self.raw = {
+            "app": {"name": "My Project", "version": "1.0.0", "environment": "${ENV}"},
+            "database": {"host": "${DB_HOST}", "port": 5432, "name": "db"},
+            "api": {"baseUrl": "http://${API_HOST}/v1", "timeout": 5000},
+            "logging": {"level": "info", "maxSize": "10m", "maxFiles": 5},
+            "features": {"debug": True},
+            "environments": {
+                "production": {"database": {"host": "prod-db"}, "features": {}}
+            },
+            "schema": {"type": "object"},
+        }
+        self.environ = {"DB_HOST": "localhost", "API_HOST": "api.local"}
+
+    def tearDown(self):
+        """Reset the per-process settings cache."""
+        clear_settings_cache()
+
+    def test_placeholders_resolved(self):
+        """Test ${VAR} placeholders are replaced from the environment."""
+        settings = parse_settings(self.raw, "development", self.environ)
+        self.assertEqual(settings.get("database.host"), "localhost")
+        self.assertEqual(settings.get("api.baseUrl"), "http://api.local/v1")
+        self.assertIsNone(settings.get("app.environment"))
+
+    def test_environment_overrides_merged(self):
+        """Test per-environment overrides replace only the keys they set."""
+        settings = parse_settings(self.raw, "production", self.environ)
+        self.assertEqual(settings.get("database.host"), "prod-db")
+        self.assertEqual(settings.get("database.port"), 5432)
+        self.assertEqual(settings.environment, "production")
+        self.assertNotIn("environments", settings)
+        self.assertNotIn("schema", settings)
+
+    def test_dotted_and_attribute_access(self):
+        """Test dotted keys, item access and attribute access agree."""
+        settings = parse_settings(self.raw, "development", self.environ)
+        self.assertEqual(settings["database.port"], settings.database.port)
+        self.assertIs(settings.get("database"), settings.database)
+        self.assertEqual(settings.get("missing.key", "default"), "default")
+        with self.assertRaises(AttributeError):
+            _ = settings.database.missing
+
+    def test_settings_are_frozen(self):
+        """Test the settings tree cannot be modified."""
+        settings = parse_settings(self.raw, "development", self.environ)
+        with self.assertRaises(AttributeError):
+            settings.database.port = 1
+        with self.assertRaises(AttributeError):
+            settings.extra = 1
+        with self.assertRaises(AttributeError):
+            _ = settings.__dict__
+
+    def test_repr_hides_values(self):
+        """Test repr does not leak resolved values."""
+        self.environ["DB_HOST"] = "secret-host"
+        settings = parse_settings(self.raw, "development", self.environ)
+        self.assertNotIn("secret-host", repr(settings.database))
+
+    def test_validation_errors(self):
+        """Test invalid sections are rejected."""
+        invalid = [
+            ("app", "version", "v1"),
+            ("app", "name", " "),
+            ("database", "port", 70000),
+            ("database", "port", "5432"),
+            ("api", "timeout", 0),
+            ("logging", "level", "verbose"),
+            ("logging", "maxSize", "ten"),
+            ("logging", "maxFiles", 0),
+            ("features", "debug", "yes"),
+        ]
+        for section, key, value in invalid:
+            with self.subTest(key=f"{section}.{key}", value=value):
+                raw = dict(self.raw, **{section: dict(self.raw[section])})
+                raw[section][key] = value
+                with self.assertRaises(ConfigurationError):
+                    parse_settings(raw, "development", self.environ)
+
+    def test_load_settings_parses_once(self):
+        """Test the repository config.json is parsed once per environment."""
+        first = load_settings(environment="development")
+        self.assertIsInstance(first, Settings)
+        self.assertIs(first, load_settings(environment="development"))
+        self.assertEqual(first.get("database.port"), 5432)
+
+    def test_load_settings_missing_file(self):
+        """Test a missing settings file raises ConfigurationError."""
+        with self.assertRaises(ConfigurationError):
+            load_settings(path="/nonexistent/config.json")
+
+
 class TestGreetingService(unittest.TestCase):
     """Test cases for GreetingService."""
 
@@ -340,6 +679,1010 @@ class TestGreetingService(unittest.TestCase):
             self.service.get_multiple_greetings(names)
 
 
+def _validation_outcome(validator, name):
+    """Return a validator's result or the message of the ValueError it raised."""
+    try:
+        return ("ok", validator(name))
+    except ValueError as error:
+        return ("error", str(error))
+
+
+class TestNameValidation(unittest.TestCase):
+    """Test cases for the fast-path name validator."""
+
+    def assert_same_as_full(self, name):
+        """Assert the fast path agrees with the full pipeline."""
+        self.assertEqual(
+            _validation_outcome(validate_name, name),
+            _validation_outcome(main._validate_name_full, name),
+        )
+
+    def test_clean_names_take_fast_path(self):
+        """Test clean names are returned without running sanitize_input."""
+        with patch.object(main, "sanitize_input") as mock_sanitize:
+            for name in ("A", "Alice", "Mary-Jane", "O'Connor", "A" * 50, "Jo Ann"):
+                self.assertIs(validate_name(name), name)
+            mock_sanitize.assert_not_called()
+
+    def test_edge_cases_match_full_pipeline(self):
+        """Test hand-picked edge cases give identical results."""
+        cases = [
+            "",
+            " ",
+            " Alice",
+            "Alice ",
+            "-",
+            "'",
+            "A" * 51,
+            " " + "A" * 50,
+            "Alice\nBob",
+            "Alice\tBob",
+            "Al\x00ice",
+            "<b>Alice</b>",
+            "<script>x</script>Bob",
+            "Ali<ce",
+            "Alice\xa0Bob",
+            "Alice\u2003",
+            "Aliceñ",
+            "Alice1",
+            123,
+            None,
+        ]
+        for name in cases:
+            with self.subTest(name=name):
+                self.assert_same_as_full(name)
+
+    @unittest.skipIf(given is None, "hypothesis is not installed")
+    def test_property_matches_full_pipeline(self):
+        """Property: the fast path never changes a validation outcome."""
+        alphabet = st.sampled_from(
+            list("AbZz -'<>/\n\t\r\x00\x1f\x7f\xa0\u2003ñ1@")
+            + ["<script>", "</script>", "<b>", "</b>"]
+        )
+        names = st.one_of(
+            st.lists(alphabet, max_size=60).map("".join),
+            st.text(max_size=60),
+        )
+
+        @settings(max_examples=500, deadline=None)
+        @given(names)
+        def check(name):
+            self.assert_same_as_full(name)
+
+        check()
+
+
+class TestPerCallerRateLimiting(unittest.TestCase):
+    """Test cases for per-caller rate limiting."""
+
+    def setUp(self):
+        """Set up a greeting service with its own limiter."""
+        self.config = AppConfig(
+            app_name="Test App",
+            app_version="1.0.0",
+            environment="development",
+            debug=False,
+            log_level="INFO",
+        )
+        self.limiter = RateLimiter(window_ms=60000, max_requests=2)
+        self.service = GreetingService(self.config, limiter=self.limiter)
+
+    def test_callers_have_separate_quotas(self):
+        """Test one caller exhausting its quota does not throttle another."""
+        self.service.greet("Alice", caller="10.0.0.1")
+        self.service.greet("Alice", caller="10.0.0.1")
+        with self.assertRaises(ValueError):
+            self.service.greet("Alice", caller="10.0.0.1")
+        self.assertEqual(
+            self.service.greet("Bob", caller="10.0.0.2"),
+            "Hello, Bob! Welcome to Test App",
+        )
+
+    @patch.object(main, "RATE_LIMIT_MESSAGE", "Slow down")
+    def test_rejection_raises_rate_limited_error(self):
+        """Test rejections are typed, so rewording the message is safe."""
+        self.service.greet("Alice", caller="10.0.0.1")
+        self.service.greet("Alice", caller="10.0.0.1")
+        with self.assertRaisesRegex(RateLimitedError, "Slow down"):
+            self.service.greet("Alice", caller="10.0.0.1")
+
+    def test_anonymous_callers_share_a_bucket(self):
+        """Test calls without a caller share the default bucket."""
+        self.service.greet("Alice")
+        self.service.greet("Bob")
+        with self.assertRaises(ValueError):
+            self.service.greet("Carol")
+
+    def test_multiple_greetings_charge_caller(self):
+        """Test each name in a batch is charged to the caller."""
+        self.service.get_multiple_greetings(["Alice", "Bob"], caller="user-1")
+        self.assertEqual(self.limiter.get_remaining_requests("user-1"), 0)
+        self.assertEqual(self.limiter.get_remaining_requests("user-2"), 2)
+
+    def test_compact_key_keeps_short_identifiers(self):
+        """Test short identifiers are used as given, without interning."""
+        identifier = "".join(["192.168.", "0.1"])
+        self.assertIs(compact_key(identifier), identifier)
+        self.assertIsNot(compact_key("".join(["192.168.0", ".1"])), identifier)
+
+    def test_compact_key_hashes_long_identifiers(self):
+        """Test long identifiers are stored as fixed-size digests."""
+        api_key = "sk_live_" + "x" * 80
+        key = compact_key(api_key)
+        self.assertTrue(key.startswith("#"))
+        self.assertEqual(len(key), 33)
+        self.assertNotIn("x" * 10, key)
+        self.assertEqual(key, compact_key(api_key))
+        self.assertNotEqual(key, compact_key(api_key + "y"))
+
+    def test_long_identifiers_limited_by_digest(self):
+        """Test a long identifier keeps its quota across calls."""
+        api_key = "k" * 100
+        self.assertTrue(self.limiter.is_allowed(api_key))
+        self.assertTrue(self.limiter.is_allowed(api_key))
+        self.assertFalse(self.limiter.is_allowed(api_key))
+        self.assertNotIn(api_key, self.limiter.requests)
+
+    def test_prune_drops_idle_identifiers(self):
+        """Test identifiers with only expired requests are removed."""
+        clock = VirtualClock()
+        limiter = RateLimiter(window_ms=60000, max_requests=2, clock=clock)
+        limiter.is_allowed("old")
+        clock.advance(100 * 10**9)
+        limiter.is_allowed("new")
+        self.assertEqual(limiter.prune(), 1)
+        self.assertEqual(list(limiter.requests), ["new"])
+
+    def test_window_expiry_restores_quota(self):
+        """Test requests older than the window no longer count."""
+        clock = VirtualClock()
+        limiter = RateLimiter(window_ms=60000, max_requests=2, clock=clock)
+        limiter.is_allowed("user")
+        limiter.is_allowed("user")
+        self.assertFalse(limiter.is_allowed("user"))
+        clock.advance(60 * 10**9 - 1)
+        self.assertFalse(limiter.is_allowed("user"))
+        clock.advance(1)
+        self.assertEqual(limiter.get_remaining_requests("user"), 2)
+        self.assertTrue(limiter.is_allowed("user"))
+
+    def test_default_clock_is_monotonic_ns(self):
+        """Test limiters use integer monotonic nanoseconds by default."""
+        limiter = RateLimiter()
+        self.assertIs(limiter.clock, time.monotonic_ns)
+        limiter.is_allowed("user")
+        self.assertIsInstance(limiter.requests["user"][0], int)
+
+    def test_window_ms_updates_window(self):
+        """Test changing window_ms rescales the nanosecond window."""
+        limiter = RateLimiter(window_ms=1000)
+        limiter.window_ms = 250
+        self.assertEqual((limiter.window_ms, limiter.window_ns), (250, 250_000_000))
+
+    def test_virtual_clock_only_moves_forward(self):
+        """Test the virtual clock advances and refuses to go back."""
+        clock = VirtualClock(start_ns=5)
+        clock.advance(10)
+        clock.set(20)
+        self.assertEqual(clock(), 20)
+        with self.assertRaises(ValueError):
+            clock.set(19)
+        with self.assertRaises(ValueError):
+            clock.advance(-1)
+
+    def test_concurrent_callers_never_over_admitted(self):
+        """Test racing threads neither exceed the limit nor break sweeps."""
+        limiter = RateLimiter(window_ms=60000, max_requests=500)
+        limiter.SWEEP_INTERVAL = 50
+        errors = []
+
+        def hammer(worker):
+            try:
+                for index in range(2000):
+                    limiter.is_allowed("shared")
+                    limiter.is_allowed(f"once-{worker}-{index}")
+            except Exception as e:  # Surface thread failures in the test
+                errors.append(e)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [
+                threading.Thread(target=hammer, args=(worker,)) for worker in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+        self.assertEqual(len(limiter.requests["shared"]), 500)
+
+
+class TestRateLimiterSnapshot(unittest.TestCase):
+    """Test cases for rate limiter snapshot and restore."""
+
+    def setUp(self):
+        """Set up a temporary snapshot location and a limiter."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.snapshot_path = os.path.join(self.tmpdir.name, "limiter.snapshot")
+        self.limiter = RateLimiter(window_ms=60000, max_requests=2)
+
+    def tearDown(self):
+        """Stop snapshot threads and remove the snapshot location."""
+        self.limiter.stop_snapshots(final=False)
+        self.tmpdir.cleanup()
+
+    def test_round_trip_preserves_quotas(self):
+        """Test a restored limiter keeps each caller's remaining quota."""
+        self.limiter.is_allowed("10.0.0.1")
+        self.limiter.is_allowed("10.0.0.1")
+        self.limiter.is_allowed("k" * 100)
+        self.limiter.is_allowed("café")
+        self.assertEqual(self.limiter.snapshot(self.snapshot_path), 3)
+
+        restored = RateLimiter(window_ms=60000, max_requests=2)
+        self.assertEqual(restored.restore(self.snapshot_path), 3)
+        self.assertFalse(restored.is_allowed("10.0.0.1"))
+        self.assertEqual(restored.get_remaining_requests("k" * 100), 1)
+        self.assertEqual(restored.get_remaining_requests("café"), 1)
+        self.assertEqual(restored.get_remaining_requests("10.0.0.2"), 2)
+
+    def test_state_access_takes_the_lock(self):
+        """Test snapshot, restore and quota reads wait for is_allowed."""
+        self.limiter.is_allowed("10.0.0.1")
+        self.limiter.snapshot(self.snapshot_path)
+        calls = {
+            "snapshot": lambda: self.limiter.snapshot(self.snapshot_path),
+            "restore": lambda: self.limiter.restore(self.snapshot_path),
+            "remaining": lambda: self.limiter.get_remaining_requests("10.0.0.1"),
+        }
+        for name, call in calls.items():
+            with self.subTest(name):
+                thread = threading.Thread(target=call)
+                with self.limiter._lock:
+                    thread.start()
+                    thread.join(0.05)
+                    self.assertTrue(thread.is_alive())
+                thread.join(5)
+                self.assertFalse(thread.is_alive())
+
+    def test_round_trip_keys_containing_separator(self):
+        """Test identifiers containing NUL bytes survive a round trip."""
+        for key in ("a\0b", "\0", "plain"):
+            self.limiter.is_allowed(key)
+        self.limiter.snapshot(self.snapshot_path)
+        restored = RateLimiter(window_ms=60000, max_requests=2)
+        restored.restore(self.snapshot_path)
+        self.assertEqual(sorted(restored.requests), ["\0", "a\0b", "plain"])
+
+    def test_restore_drops_expired_entries(self):
+        """Test timestamps outside the window are not restored."""
+        clock = VirtualClock(start_ns=10**12)
+        limiter = RateLimiter(window_ms=60000, max_requests=2, clock=clock)
+        limiter.is_allowed("old")
+        clock.advance(50 * 10**9)
+        limiter.is_allowed("new")
+        limiter.is_allowed("new")
+        with patch("main.time.time_ns", return_value=5 * 10**18):
+            limiter.snapshot(self.snapshot_path)
+
+        # Restored into a fresh process whose clock started elsewhere
+        restored = RateLimiter(window_ms=60000, max_requests=2, clock=VirtualClock())
+        with patch("main.time.time_ns", return_value=5 * 10**18 + 20 * 10**9):
+            self.assertEqual(restored.restore(self.snapshot_path), 1)
+        self.assertEqual(list(restored.requests), ["new"])
+        self.assertEqual(restored.requests["new"], [-20 * 10**9] * 2)
+        self.assertFalse(restored.is_allowed("new"))
+
+    def test_empty_limiter_round_trip(self):
+        """Test an empty limiter snapshots and restores cleanly."""
+        self.limiter.snapshot(self.snapshot_path)
+        self.limiter.is_allowed("user")
+        self.assertEqual(self.limiter.restore(self.snapshot_path), 0)
+        self.assertEqual(self.limiter.requests, {})
+
+    def test_restore_rejects_invalid_files(self):
+        """Test garbage and truncated snapshots raise ValueError."""
+        self.limiter.is_allowed("user")
+        self.limiter.snapshot(self.snapshot_path)
+        with open(self.snapshot_path, "rb") as handle:
+            data = handle.read()
+        for content in (b"", b"garbage" * 10, data[:-4]):
+            with self.subTest(size=len(content)):
+                with open(self.snapshot_path, "wb") as handle:
+                    handle.write(content)
+                with self.assertRaises(ValueError):
+                    self.limiter.restore(self.snapshot_path)
+        self.assertIn("user", self.limiter.requests)
+
+    def test_snapshot_is_atomic(self):
+        """Test snapshot replaces the file and leaves no temporary files."""
+        self.limiter.is_allowed("user")
+        self.limiter.snapshot(self.snapshot_path)
+        self.limiter.snapshot(self.snapshot_path)
+        self.assertEqual(os.listdir(self.tmpdir.name), ["limiter.snapshot"])
+
+    def test_periodic_snapshots(self):
+        """Test background snapshots are written and a final one on stop."""
+        self.limiter.is_allowed("user")
+        self.limiter.start_snapshots(self.snapshot_path, interval=0.01)
+        deadline = time.time() + 5
+        while not os.path.exists(self.snapshot_path) and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(os.path.exists(self.snapshot_path))
+
+        self.limiter.is_allowed("late")
+        self.limiter.stop_snapshots()
+        restored = RateLimiter(window_ms=60000, max_requests=2)
+        self.assertEqual(restored.restore(self.snapshot_path), 2)
+
+    def test_persistence_disabled_without_env(self):
+        """Test persistence is a no-op unless RATE_LIMIT_SNAPSHOT is set."""
+        with patch.dict(os.environ, {}, clear=True):
+            self.assertFalse(configure_rate_limit_persistence(self.limiter))
+
+    def test_persistence_restores_from_env(self):
+        """Test persistence restores the limiter and registers a final save."""
+        self.limiter.is_allowed("user")
+        self.limiter.snapshot(self.snapshot_path)
+        fresh = RateLimiter(window_ms=60000, max_requests=2)
+        env = {"RATE_LIMIT_SNAPSHOT": self.snapshot_path}
+        with patch.dict(os.environ, env), patch("main.atexit.register") as register:
+            self.assertTrue(configure_rate_limit_persistence(fresh))
+        self.assertEqual(fresh.get_remaining_requests("user"), 1)
+
+        fresh.is_allowed("other")
+        register.call_args[0][0]()
+        self.assertEqual(self.limiter.restore(self.snapshot_path), 2)
+
+
+class TestHeavyHitterTracker(unittest.TestCase):
+    """Test cases for sketch-based heavy-hitter tracking."""
+
+    def test_estimates_never_undercount(self):
+        """Test every estimate is at least the true count."""
+        tracker = HeavyHitterTracker(width=64, depth=3, top_k=4)
+        counts = {f"10.0.{index}.1": index % 7 + 1 for index in range(500)}
+        for key, count in counts.items():
+            for _ in range(count):
+                tracker.add(key)
+        for key, count in counts.items():
+            self.assertGreaterEqual(tracker.estimate(key), count)
+        self.assertEqual(tracker.total, sum(counts.values()))
+
+    def test_finds_heavy_hitters_among_noise(self):
+        """Test the heaviest identifiers surface above many light ones."""
+        tracker = HeavyHitterTracker(top_k=8)
+        for index in range(20000):
+            tracker.add(f"noise-{index}")
+            if index % 10 == 0:
+                tracker.add("attacker-1")
+            if index % 20 == 0:
+                tracker.add("attacker-2")
+        offenders = tracker.top_offenders(2)
+        self.assertEqual([key for key, _ in offenders], ["attacker-1", "attacker-2"])
+        self.assertGreaterEqual(offenders[0][1], 2000)
+
+    def test_top_offenders_respects_k(self):
+        """Test top_offenders returns at most k entries, heaviest first."""
+        tracker = HeavyHitterTracker(top_k=3)
+        for count, key in enumerate("abcde", start=1):
+            for _ in range(count * 10):
+                tracker.add(key)
+        self.assertEqual([key for key, _ in tracker.top_offenders()], ["e", "d", "c"])
+        self.assertEqual(len(tracker.top_offenders(1)), 1)
+
+    def test_memory_is_fixed(self):
+        """Test tracker state does not grow with distinct identifiers."""
+        tracker = HeavyHitterTracker(width=256, depth=4, top_k=16)
+        size = tracker.sketch_bytes
+        for index in range(50000):
+            tracker.add(f"caller-{index}")
+        self.assertEqual(tracker.sketch_bytes, size)
+        self.assertLessEqual(len(tracker.top_offenders(100)), 16)
+        self.assertEqual(len(tracker._heap), 16)
+
+    def test_reset_clears_counts(self):
+        """Test reset forgets all counts and offenders."""
+        tracker = HeavyHitterTracker()
+        tracker.add("user")
+        tracker.reset()
+        self.assertEqual(tracker.estimate("user"), 0)
+        self.assertEqual(tracker.top_offenders(), [])
+        self.assertEqual(tracker.total, 0)
+
+    def test_invalid_dimensions(self):
+        """Test unusable sketch dimensions are rejected."""
+        with self.assertRaises(ValueError):
+            HeavyHitterTracker(width=0)
+        with self.assertRaises(ValueError):
+            HeavyHitterTracker(top_k=0)
+        with self.assertRaises(ValueError):
+            HeavyHitterTracker(width=1000)
+        with self.assertRaises(ValueError):
+            HeavyHitterTracker(width=1 << 20, depth=4)
+
+    def test_rate_limiter_tracks_denied_requests(self):
+        """Test the limiter counts every attempt, including rejected ones."""
+        tracker = HeavyHitterTracker()
+        limiter = RateLimiter(window_ms=60000, max_requests=2, tracker=tracker)
+        for _ in range(10):
+            limiter.is_allowed("10.0.0.1")
+        limiter.is_allowed("10.0.0.2")
+        self.assertEqual(tracker.top_offenders(1), [("10.0.0.1", 10)])
+
+    def test_track_offenders_keeps_existing_tracker(self):
+        """Test servers enable tracking without replacing a configured sketch."""
+        limiter = RateLimiter()
+        main.track_offenders(limiter)
+        tracker = limiter.tracker
+        self.assertIsInstance(tracker, HeavyHitterTracker)
+        main.track_offenders(limiter)
+        self.assertIs(limiter.tracker, tracker)
+
+
+class TestHierarchicalRateLimiter(unittest.TestCase):
+    """Test cases for multi-level rate limiting."""
+
+    def setUp(self):
+        """Set up caller, tenant and global levels."""
+        self.clock = VirtualClock()
+        self.limiter = HierarchicalRateLimiter(
+            [
+                RateLimitLevel("caller/s", "caller", 1000, 2),
+                RateLimitLevel("tenant/min", "tenant", 60000, 3),
+                RateLimitLevel("global/15min", "global", 900000, 5),
+            ],
+            clock=self.clock,
+        )
+
+    def test_reports_rejecting_level(self):
+        """Test the first exhausted level is reported."""
+        self.assertIsNone(self.limiter.check("alice", "acme"))
+        self.assertIsNone(self.limiter.check("alice", "acme"))
+        self.assertEqual(self.limiter.check("alice", "acme"), "caller/s")
+        self.assertIsNone(self.limiter.check("bob", "acme"))
+        self.assertEqual(self.limiter.check("carol", "acme"), "tenant/min")
+        self.assertIsNone(self.limiter.check("carol", "globex"))
+        self.assertIsNone(self.limiter.check("dave", "globex"))
+        self.assertEqual(self.limiter.check("erin", "initech"), "global/15min")
+        self.assertEqual(
+            self.limiter.rejections,
+            {"caller/s": 1, "tenant/min": 1, "global/15min": 1},
+        )
+
+    def test_rejected_requests_charge_no_level(self):
+        """Test a rejection at one level leaves every other level untouched."""
+        for _ in range(3):
+            self.limiter.check("alice", "acme")
+        caller_bucket, tenant_bucket, global_bucket = self.limiter.requests
+        self.assertEqual(len(caller_bucket["alice"]), 2)
+        self.assertEqual(len(tenant_bucket["acme"]), 2)
+        self.assertEqual(len(global_bucket[""]), 2)
+
+        self.limiter.check("bob", "acme")
+        self.assertEqual(self.limiter.check("carol", "acme"), "tenant/min")
+        self.assertEqual(caller_bucket.get("carol"), [])
+        self.assertEqual(len(global_bucket[""]), 3)
+
+    def test_levels_use_their_own_windows(self):
+        """Test a short window recovers while longer ones keep counting."""
+        self.limiter.check("alice", "acme")
+        self.limiter.check("alice", "acme")
+        self.assertFalse(self.limiter.is_allowed("alice", "acme"))
+        self.clock.advance(1_500_000_000)
+        self.assertTrue(self.limiter.is_allowed("alice", "acme"))
+        self.assertEqual(self.limiter.check("alice", "acme"), "tenant/min")
+
+    def test_requests_without_tenant_skip_tenant_levels(self):
+        """Test tenant levels only apply when a tenant is given."""
+        for caller in ("a", "b", "c", "d"):
+            self.assertTrue(self.limiter.is_allowed(caller))
+        self.assertEqual(self.limiter.requests[1], {})
+
+    def test_prune_drops_idle_buckets(self):
+        """Test buckets idle for their level's window are removed."""
+        self.limiter.check("alice", "acme")
+        self.clock.advance(2 * 10**9)
+        self.assertEqual(self.limiter.prune(), 1)
+        self.assertEqual(self.limiter.requests[0], {})
+        self.assertIn("acme", self.limiter.requests[1])
+
+    def test_invalid_levels(self):
+        """Test empty, duplicate and unknown-scope levels are rejected."""
+        level = RateLimitLevel("per-caller", "caller", 1000, 1)
+        for levels in ([], [level, level], [RateLimitLevel("x", "region", 1, 1)]):
+            with self.subTest(levels=levels):
+                with self.assertRaises(ValueError):
+                    HierarchicalRateLimiter(levels)
+
+    def test_tenant_registry_charges_tenant_levels(self):
+        """Test tenant greeting services share the hierarchical limiter."""
+
+        def provider(tenant_id):
+            return AppConfig(
+                app_name=f"Brand {tenant_id}",
+                app_version="1.0.0",
+                environment="production",
+                debug=False,
+                log_level="INFO",
+            )
+
+        registry = TenantRegistry(provider, limiter=self.limiter)
+        greeter = registry.get("acme").greeting_service
+        for caller in ("alice", "bob", "carol"):
+            greeter.greet("Alice", caller=caller)
+        with self.assertRaises(ValueError):
+            greeter.greet("Alice", caller="dave")
+        self.assertEqual(self.limiter.rejections["tenant/min"], 1)
+        registry.get("globex").greeting_service.greet("Alice", caller="dave")
+
+
+class TestAdaptiveConcurrencyLimiter(unittest.TestCase):
+    """Test cases for AIMD concurrency limiting."""
+
+    def feed(self, limiter, latency_ms, batches=1):
+        """Complete batches of requests with a fixed latency."""
+        for _ in range(batches * limiter.sample_size):
+            self.assertTrue(limiter.try_acquire())
+            limiter.release(latency_ms)
+
+    def test_additive_increase_when_healthy(self):
+        """Test the limit grows by one per healthy batch."""
+        limiter = AdaptiveConcurrencyLimiter(
+            target_p95_ms=10, initial_limit=4, sample_size=10
+        )
+        self.feed(limiter, 5, batches=3)
+        self.assertEqual(limiter.limit, 7)
+        self.assertEqual(limiter.metrics()["p95_ms"], 5)
+
+    def test_multiplicative_decrease_when_slow(self):
+        """Test the limit shrinks by the backoff factor when p95 is too high."""
+        limiter = AdaptiveConcurrencyLimiter(
+            target_p95_ms=10, initial_limit=16, sample_size=10, backoff=0.5
+        )
+        self.feed(limiter, 50)
+        self.assertEqual(limiter.limit, 8)
+        self.feed(limiter, 50, batches=10)
+        self.assertEqual(limiter.limit, limiter.min_limit)
+
+    def test_p95_ignores_rare_outliers(self):
+        """Test a single slow request in a batch does not trigger backoff."""
+        limiter = AdaptiveConcurrencyLimiter(
+            target_p95_ms=10, initial_limit=4, sample_size=100
+        )
+        for index in range(100):
+            limiter.try_acquire()
+            limiter.release(500 if index == 0 else 1)
+        self.assertEqual(limiter.limit, 5)
+
+    def test_limit_capped_at_max(self):
+        """Test additive increase stops at max_limit."""
+        limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=2, max_limit=3, sample_size=1
+        )
+        self.feed(limiter, 1, batches=5)
+        self.assertEqual(limiter.limit, 3)
+
+    def test_rejects_beyond_limit(self):
+        """Test requests beyond the limit are rejected and counted."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2)
+        self.assertTrue(limiter.try_acquire())
+        self.assertTrue(limiter.try_acquire())
+        self.assertFalse(limiter.try_acquire())
+        limiter.release(1)
+        self.assertTrue(limiter.try_acquire())
+        metrics = limiter.metrics()
+        self.assertEqual((metrics["in_flight"], metrics["rejected"]), (2, 1))
+
+    def test_invalid_settings(self):
+        """Test inconsistent limits and factors are rejected."""
+        for kwargs in (
+            {"min_limit": 0},
+            {"initial_limit": 2000},
+            {"backoff": 1.0},
+            {"target_p95_ms": 0},
+        ):
+            with self.subTest(kwargs=kwargs):
+                with self.assertRaises(ValueError):
+                    AdaptiveConcurrencyLimiter(**kwargs)
+
+    def test_greet_records_latency_and_releases_slot(self):
+        """Test greet holds a slot while running, even when it fails."""
+        concurrency = AdaptiveConcurrencyLimiter(
+            initial_limit=1, max_limit=1, sample_size=2
+        )
+        service = GreetingService(
+            get_default_config(),
+            limiter=RateLimiter(window_ms=1, max_requests=1000),
+            concurrency=concurrency,
+        )
+        service.greet("Alice")
+        with self.assertRaises(ValueError):
+            service.greet("")
+        self.assertEqual(concurrency.in_flight, 0)
+        self.assertIsNone(concurrency.last_p95_ms)
+        service.greet("Bob")
+        self.assertIsNotNone(concurrency.last_p95_ms)
+
+        concurrency.try_acquire()
+        with self.assertRaises(OverloadedError):
+            service.greet("Alice")
+
+    def test_fast_rejections_are_not_latency_samples(self):
+        """Test rate limited and denied requests do not feed the p95."""
+        concurrency = AdaptiveConcurrencyLimiter(sample_size=1)
+        guard = DenylistGuard(Denylist.build(["10.0.0.9"]))
+        service = GreetingService(
+            get_default_config(),
+            limiter=RateLimiter(max_requests=1),
+            denylist=guard,
+            concurrency=concurrency,
+        )
+        service.greet("Alice", caller="10.0.0.1")
+        concurrency.last_p95_ms = None
+        with self.assertRaises(RateLimitedError):
+            service.greet("Alice", caller="10.0.0.1")
+        with self.assertRaises(DeniedError):
+            service.greet("Alice", caller="10.0.0.9")
+        with self.assertRaises(RateLimitedError):
+            asyncio.run(service.greet_async("Alice", caller="10.0.0.1"))
+        self.assertIsNone(concurrency.last_p95_ms)
+        self.assertEqual(concurrency.in_flight, 0)
+
+    def test_configure_from_environment(self):
+        """Test ADAPTIVE_CONCURRENCY enables the limiter greet applies."""
+        environ = {
+            "ADAPTIVE_CONCURRENCY": "true",
+            "CONCURRENCY_TARGET_P95_MS": "20",
+            "CONCURRENCY_INITIAL_LIMIT": "4",
+        }
+        with patch.object(main, "concurrency_limiter", None):
+            with patch.dict(os.environ, {"ADAPTIVE_CONCURRENCY": "false"}):
+                self.assertFalse(configure_concurrency_limit())
+            self.assertIsNone(GreetingService(get_default_config()).active_concurrency)
+            with patch.dict(os.environ, environ):
+                self.assertTrue(configure_concurrency_limit())
+            limiter = main.concurrency_limiter
+            self.assertEqual((limiter.limit, limiter.target_p95_ms), (4, 20))
+            service = GreetingService(get_default_config())
+            self.assertIs(service.active_concurrency, limiter)
+            with patch.dict(os.environ, dict(environ, CONCURRENCY_INITIAL_LIMIT="0")):
+                with self.assertRaises(ConfigurationError):
+                    configure_concurrency_limit()
+
+
+class TestAdmissionController(unittest.TestCase):
+    """Test cases for queue-depth admission control."""
+
+    def controller(self, handler, **kwargs):
+        controller = AdmissionController(handler, **kwargs)
+        self.addCleanup(controller.close)
+        return controller
+
+    def test_full_queue_rejects_without_calling_handler(self):
+        """Test excess work is rejected at submit with OverloadedError."""
+        release = threading.Event()
+        calls = []
+
+        def handler(name):
+            calls.append(name)
+            release.wait(5)
+            return name
+
+        controller = self.controller(handler, workers=1, max_queue=2)
+        first = controller.submit("a")
+        while controller.in_flight == 0:
+            time.sleep(0.001)
+        queued = [controller.submit("b"), controller.submit("c")]
+        with self.assertRaises(OverloadedError):
+            controller.submit("d")
+        release.set()
+        self.assertEqual([first.result()] + [f.result() for f in queued], list("abc"))
+        self.assertEqual(calls, list("abc"))
+        metrics = controller.metrics()
+        self.assertEqual((metrics["admitted"], metrics["shed_queue_full"]), (3, 1))
+        self.assertEqual(metrics["queue_depth"], 0)
+
+    def test_shed_requests_skip_greeting_work(self):
+        """Test delay-shed greetings never reach validation or the limiter."""
+        limiter = RateLimiter()
+        service = GreetingService(get_default_config(), limiter=limiter)
+        now = [0.0]
+        controller = self.controller(
+            service.greet, workers=1, policy="max-wait", clock=lambda: now[0]
+        )
+        # Hold the queue lock so the request is not picked up before it ages
+        with controller._ready:
+            future = controller.submit("Alice", caller="10.0.0.1")
+            now[0] = 1.0
+        with self.assertRaises(OverloadedError):
+            future.result(5)
+        self.assertEqual(controller.metrics()["shed_delay"], 1)
+        self.assertNotIn(compact_key("10.0.0.1"), limiter.requests)
+
+    def test_cancelled_request_shed_keeps_worker_alive(self):
+        """Test shedding a cancelled request does not kill the worker."""
+        now = [0.0]
+        controller = self.controller(
+            lambda name: name, workers=1, policy="max-wait", clock=lambda: now[0]
+        )
+        with controller._ready:
+            cancelled = controller.submit("a")
+            self.assertTrue(cancelled.cancel())
+            now[0] = 1.0
+        deadline = time.monotonic() + 5
+        while controller.metrics()["shed_delay"] == 0:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.001)
+        now[0] = 0.0
+        self.assertEqual(controller.submit("b").result(5), "b")
+
+    def test_codel_tightens_only_under_standing_queue(self):
+        """Test CoDel allows bursts but sheds once delay stays above target."""
+        controller = self.controller(
+            lambda: None, workers=1, target_ms=5, interval_ms=100, clock=lambda: 0.0
+        )
+        with controller._ready:
+            self.assertFalse(controller._should_shed(0.05, 0.01))
+            self.assertFalse(controller._should_shed(0.02, 0.05))
+            # Smallest delay in the first interval was 20ms > 5ms target
+            self.assertTrue(controller._should_shed(0.02, 0.11))
+            self.assertTrue(controller.overloaded)
+            self.assertFalse(controller._should_shed(0.001, 0.15))
+            controller._should_shed(0.001, 0.22)
+            self.assertFalse(controller.overloaded)
+            self.assertFalse(controller._should_shed(0.05, 0.25))
+
+    def test_bounded_p99_under_double_load(self):
+        """Test served latency stays bounded at twice the capacity."""
+        controller = self.controller(
+            lambda: time.sleep(0.005), workers=1, max_queue=1000, policy="codel"
+        )
+        latencies = []
+        futures = []
+        for _ in range(200):
+            submitted = time.perf_counter()
+            future = controller.submit()
+            future.add_done_callback(
+                lambda done, submitted=submitted: done.exception()
+                or latencies.append(time.perf_counter() - submitted)
+            )
+            futures.append(future)
+            time.sleep(0.0025)
+        for future in futures:
+            future.exception(5)
+        latencies.sort()
+        metrics = controller.metrics()
+        self.assertGreater(metrics["shed_delay"], 0)
+        # An unbounded queue would reach about 500ms by the last request
+        self.assertLess(latencies[int(len(latencies) * 0.99)], 0.25)
+
+    def test_rejects_invalid_settings(self):
+        """Test invalid sizes and policies are rejected."""
+        for kwargs in ({"workers": 0}, {"max_queue": 0}, {"policy": "lifo"}):
+            with self.subTest(**kwargs):
+                with self.assertRaises(ValueError):
+                    AdmissionController(lambda: None, **kwargs)
+
+
+class TestDenylist(unittest.TestCase):
+    """Test cases for the Bloom-filter denylist."""
+
+    def setUp(self):
+        """Set up a temporary directory and a small denylist."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.entries = [f"203.0.113.{index}" for index in range(200)]
+        self.entries.append("sk_live_" + "x" * 80)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmpdir.cleanup()
+
+    def path(self, name):
+        """Return a path inside the temporary directory."""
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_no_false_negatives(self):
+        """Test every listed identifier is reported as denied."""
+        denylist = Denylist.build(self.entries)
+        for entry in self.entries:
+            self.assertIn(entry, denylist)
+        self.assertEqual(len(denylist), len(self.entries))
+
+    def test_false_positive_rate_near_target(self):
+        """Test unlisted identifiers rarely hit the filter."""
+        denylist = Denylist.build(self.entries, error_rate=0.01)
+        hits = sum(f"198.51.100.{index}/{index}" in denylist for index in range(5000))
+        self.assertLess(hits, 150)
+
+    def test_exact_confirmation_removes_false_positives(self):
+        """Test exact mode rejects identifiers that only collide in the filter."""
+        loose = Denylist.build(self.entries, error_rate=0.5)
+        exact = Denylist.build(self.entries, error_rate=0.5, exact=True)
+        probes = [f"probe-{index}" for index in range(2000)]
+        self.assertGreater(sum(probe in loose for probe in probes), 0)
+        self.assertEqual(sum(probe in exact for probe in probes), 0)
+        for entry in self.entries:
+            self.assertIn(entry, exact)
+
+    def test_save_and_load_round_trip(self):
+        """Test a saved filter maps back with identical answers."""
+        for exact in (False, True):
+            with self.subTest(exact=exact):
+                denylist = Denylist.build(self.entries, exact=exact)
+                denylist.save(self.path("deny.bloom"))
+                loaded = Denylist.load(self.path("deny.bloom"))
+                self.assertEqual(loaded.nbytes, denylist.nbytes)
+                for probe in self.entries + ["198.51.100.1", "nobody"]:
+                    self.assertEqual(probe in loaded, probe in denylist)
+
+    def test_load_rejects_invalid_files(self):
+        """Test garbage and truncated filter files raise ValueError."""
+        Denylist.build(self.entries).save(self.path("deny.bloom"))
+        with open(self.path("deny.bloom"), "rb") as handle:
+            data = handle.read()
+        for content in (b"", b"garbage" * 10, data[:-8]):
+            with self.subTest(size=len(content)):
+                with open(self.path("bad.bloom"), "wb") as handle:
+                    handle.write(content)
+                with self.assertRaises(ValueError):
+                    Denylist.load(self.path("bad.bloom"))
+
+    def test_read_entries_skips_comments(self):
+        """Test blank lines and comments are ignored in source files."""
+        with open(self.path("deny.txt"), "w", encoding="utf-8") as handle:
+            handle.write("# banned\n10.0.0.1\n\n  10.0.0.2  \n")
+        self.assertEqual(
+            read_denylist_entries(self.path("deny.txt")), ["10.0.0.1", "10.0.0.2"]
+        )
+
+    def test_background_rebuild_swaps_filter(self):
+        """Test a rebuild installs the new filter and saves it."""
+        with open(self.path("deny.txt"), "w", encoding="utf-8") as handle:
+            handle.write("10.0.0.1\n")
+        guard = DenylistGuard()
+        guard.check("10.0.0.1")
+        guard.rebuild(self.path("deny.txt"), save_path=self.path("deny.bloom")).join()
+        with self.assertRaises(DeniedError):
+            guard.check("10.0.0.1")
+        guard.check("10.0.0.2")
+        self.assertIn("10.0.0.1", Denylist.load(self.path("deny.bloom")))
+
+    def test_failed_rebuild_keeps_current_filter(self):
+        """Test a rebuild from a missing file leaves the old filter active."""
+        guard = DenylistGuard(Denylist.build(["10.0.0.1"]))
+        with self.assertLogs("src.main", level="WARNING"):
+            guard.rebuild(self.path("missing.txt")).join()
+        with self.assertRaises(DeniedError):
+            guard.check("10.0.0.1")
+
+    def test_greet_rejects_denied_caller_before_limiter(self):
+        """Test denied callers never reach rate limiter state."""
+        limiter = RateLimiter()
+        guard = DenylistGuard(Denylist.build(["10.0.0.1"]))
+        service = GreetingService(get_default_config(), limiter=limiter, denylist=guard)
+        with self.assertRaises(DeniedError):
+            service.greet("Alice", caller="10.0.0.1")
+        self.assertEqual(limiter.requests, {})
+        self.assertTrue(service.greet("Alice", caller="10.0.0.2"))
+
+    def test_configure_from_env(self):
+        """Test DENYLIST_FILE accepts saved filters and plain lists."""
+        Denylist.build(["10.0.0.1"]).save(self.path("deny.bloom"))
+        with open(self.path("deny.txt"), "w", encoding="utf-8") as handle:
+            handle.write("10.0.0.2\n")
+
+        guard = DenylistGuard()
+        with patch.dict(os.environ, {"DENYLIST_FILE": self.path("deny.bloom")}):
+            self.assertTrue(configure_denylist(guard))
+        self.assertIn("10.0.0.1", guard.denylist)
+
+        with patch.dict(os.environ, {"DENYLIST_FILE": self.path("deny.txt")}):
+            with patch.object(DenylistGuard, "rebuild") as rebuild:
+                configure_denylist(guard)
+        rebuild.assert_called_once_with(self.path("deny.txt"), 0.001, False)
+
+        with patch.dict(os.environ, {"DENYLIST_FILE": self.path("missing")}):
+            with self.assertRaises(ConfigurationError):
+                configure_denylist(guard)
+        with patch.dict(os.environ, {}, clear=True):
+            self.assertFalse(configure_denylist(guard))
+
+
+class TestLocalizedGreetings(unittest.TestCase):
+    """Test cases for precompiled localized greeting templates."""
+
+    def setUp(self):
+        """Set up a greeting service using the repository locales."""
+        self.config = AppConfig(
+            app_name="Test App",
+            app_version="1.0.0",
+            environment="development",
+            debug=False,
+            log_level="INFO",
+        )
+        self.service = GreetingService(
+            self.config, limiter=RateLimiter(max_requests=1000)
+        )
+
+    def test_compile_template(self):
+        """Test templates compile to printf-style format strings."""
+        fmt = compile_template("Hi {{ name }}, 100% {{appName}}", appName="App")
+        self.assertEqual(fmt, "Hi %s, 100%% App")
+        self.assertEqual(fmt % "Bob", "Hi Bob, 100% App")
+        self.assertEqual(
+            compile_template("{{appName}}: {{name}}", appName="50%") % "Ann",
+            "50%: Ann",
+        )
+
+    def test_compile_template_errors(self):
+        """Test unknown placeholders and missing names are rejected."""
+        with self.assertRaises(ConfigurationError):
+            compile_template("Hello {{name}} from {{city}}", appName="App")
+        with self.assertRaises(ConfigurationError):
+            compile_template("Welcome to {{appName}}", appName="App")
+
+    def test_english_matches_previous_format(self):
+        """Test the default greeting is unchanged."""
+        self.assertEqual(
+            self.service.greet("Alice"), "Hello, Alice! Welcome to Test App"
+        )
+        self.assertEqual(
+            self.service.greet("Alice", locale="en"),
+            "Hello, Alice! Welcome to Test App",
+        )
+
+    def test_localized_greetings(self):
+        """Test greetings in the shipped locales."""
+        self.assertEqual(
+            self.service.greet("Alice", locale="es"),
+            "¡Hola, Alice! Bienvenido a Test App",
+        )
+        self.assertEqual(
+            self.service.greet("Alice", locale="ja"),
+            "こんにちは、Aliceさん！Test Appへようこそ",
+        )
+
+    def test_locale_fallback(self):
+        """Test region variants resolve and unknown locales use English."""
+        self.assertTrue(self.service.greet("Ana", locale="es-MX").startswith("¡Hola"))
+        self.assertTrue(self.service.greet("Ana", locale="pt").startswith("Hello"))
+
+    def test_app_name_change_rebinds_templates(self):
+        """Test a renamed app is reflected in later greetings."""
+        self.service.greet("Alice")
+        self.config.app_name = "Renamed"
+        self.assertEqual(
+            self.service.greet("Alice"), "Hello, Alice! Welcome to Renamed"
+        )
+
+    def test_catalog_loaded_once(self):
+        """Test the repository catalog is shared and has every locale."""
+        catalog = load_greeting_catalog()
+        self.assertIs(catalog, load_greeting_catalog())
+        self.assertEqual(
+            sorted(catalog.locales), sorted(["en", "es", "fr", "de", "zh", "ja"])
+        )
+
+    def test_catalog_without_locale_files(self):
+        """Test a missing locales directory falls back to built-in English."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            catalog = load_greeting_catalog(main.Path(tmpdir))
+        self.assertEqual(catalog.locales, ("en",))
+        self.assertEqual(
+            catalog.table("App")[catalog.resolve("fr")] % "Zoe",
+            "Hello, Zoe! Welcome to App",
+        )
+
+    def test_catalog_requires_fallback(self):
+        """Test a catalog must contain its fallback locale."""
+        with self.assertRaises(ConfigurationError):
+            GreetingCatalog({"fr": "Bonjour {{name}}"})
+
+
 class TestAppInfoService(unittest.TestCase):
     """Test cases for AppInfoService."""
 
@@ -364,12 +1707,1202 @@ class TestAppInfoService(unittest.TestCase):
         self.assertIn("python_version", info)
         self.assertIn("platform", info)
 
+    def test_get_app_info_is_cached_and_read_only(self):
+        """Test the same immutable mapping is returned on every call."""
+        info = self.service.get_app_info()
+        self.assertIs(info, self.service.get_app_info())
+        with self.assertRaises(TypeError):
+            info["name"] = "Changed"
+
+    def test_get_app_info_json(self):
+        """Test the cached JSON matches the info mapping."""
+        body = self.service.get_app_info_json()
+        self.assertIs(body, self.service.get_app_info_json())
+        self.assertEqual(json.loads(body), dict(self.service.get_app_info()))
+
+    def test_snapshot_rebuilt_when_config_changes(self):
+        """Test a config change produces new info, JSON and ETag."""
+        before = self.service.snapshot()
+        self.config.app_name = "Renamed App"
+        after = self.service.snapshot()
+        self.assertIsNot(before, after)
+        self.assertNotEqual(before.etag, after.etag)
+        self.assertEqual(self.service.get_app_info()["name"], "Renamed App")
+
+    def test_get_app_info_response_etag(self):
+        """Test conditional responses using the ETag."""
+        status, body, etag = self.service.get_app_info_response()
+        self.assertEqual(status, 200)
+        self.assertIs(body, self.service.get_app_info_json())
+        self.assertEqual(
+            self.service.get_app_info_response(if_none_match=etag), (304, b"", etag)
+        )
+        self.assertEqual(
+            self.service.get_app_info_response(if_none_match='"stale"')[0], 200
+        )
+
+
+class TestTenantRegistry(unittest.TestCase):
+    """Test cases for the multi-tenant service registry."""
+
+    def setUp(self):
+        """Set up a config provider that records its calls."""
+        self.calls = []
+
+        def provider(tenant_id):
+            self.calls.append(tenant_id)
+            return AppConfig(
+                app_name=f"Brand {tenant_id}",
+                app_version="1.0.0",
+                environment="production",
+                debug=False,
+                log_level="INFO",
+            )
+
+        self.provider = provider
+
+    def test_services_built_lazily_once(self):
+        """Test services are built on first use and then reused."""
+        registry = TenantRegistry(self.provider)
+        self.assertEqual(len(registry), 0)
+        first = registry.get("acme")
+        self.assertIs(first, registry.get("acme"))
+        self.assertEqual(self.calls, ["acme"])
+        self.assertEqual(first.app_info_service.get_app_info()["name"], "Brand acme")
+        self.assertIs(first.greeting_service.config, first.config)
+
+    def test_lru_eviction(self):
+        """Test the least recently used tenant is evicted first."""
+        registry = TenantRegistry(self.provider, max_tenants=2)
+        registry.get("a")
+        registry.get("b")
+        registry.get("a")
+        registry.get("c")
+        self.assertIn("a", registry)
+        self.assertNotIn("b", registry)
+        self.assertEqual(registry.stats()["evictions"], 1)
+        self.assertEqual(len(registry), 2)
+
+    def test_invalid_tenant_config(self):
+        """Test an invalid tenant configuration is rejected and not cached."""
+
+        def provider(tenant_id):
+            config = self.provider(tenant_id)
+            config.log_level = "LOUD"
+            return config
+
+        registry = TenantRegistry(provider)
+        with self.assertRaises(ConfigurationError):
+            registry.get("broken")
+        self.assertNotIn("broken", registry)
+
+    def test_explicit_evict(self):
+        """Test evicting a tenant forces a rebuild."""
+        registry = TenantRegistry(self.provider)
+        registry.get("acme")
+        self.assertTrue(registry.evict("acme"))
+        self.assertFalse(registry.evict("acme"))
+        registry.get("acme")
+        self.assertEqual(self.calls, ["acme", "acme"])
+
+    def test_invalid_capacity(self):
+        """Test a registry must hold at least one tenant."""
+        with self.assertRaises(ValueError):
+            TenantRegistry(self.provider, max_tenants=0)
+
+
+class TestTraceReplay(unittest.TestCase):
+    """Test cases for the trace replay tool."""
+
+    def setUp(self):
+        self.config = get_default_config()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def write_trace(self, records):
+        """Write records to an NDJSON trace file and return its path."""
+        path = os.path.join(self.temp_dir.name, "trace.ndjson")
+        with open(path, "w", encoding="utf-8") as handle:
+            for record in records:
+                handle.write(json.dumps(record) + "\n")
+        return path
+
+    def test_histogram_percentiles_within_precision(self):
+        """Test percentiles land within the histogram's relative precision."""
+        histogram = LatencyHistogram()
+        for value in range(1, 100001):
+            histogram.record(value * 1000)
+        for percent, expected in ((50, 50_000_000), (99, 99_000_000)):
+            with self.subTest(percent=percent):
+                actual = histogram.percentile(percent)
+                self.assertGreaterEqual(actual, expected)
+                self.assertLess(actual, expected * 1.01)
+        self.assertEqual(histogram.percentile(100), 100_000_000)
+        self.assertEqual(histogram.percentile(0) // 10, 100)
+
+    def test_histogram_small_values_exact(self):
+        """Test values below the precision threshold are recorded exactly."""
+        histogram = LatencyHistogram()
+        for value in (0, 3, 7, 200):
+            histogram.record(value)
+        self.assertEqual(
+            [histogram.percentile(p) for p in (25, 50, 75, 100)], [0, 3, 7, 200]
+        )
+
+    def test_histogram_merge(self):
+        """Test merged histograms combine counts, totals and maxima."""
+        first, second = LatencyHistogram(), LatencyHistogram()
+        first.record(10)
+        second.record(5000)
+        second.record(20)
+        first.merge(second)
+        self.assertEqual((first.count, first.total, first.max), (3, 5030, 5000))
+        self.assertEqual(first.percentile(50), 20)
+        with self.assertRaises(ValueError):
+            first.merge(LatencyHistogram(significant_bits=4))
+
+    def test_read_trace_rejects_malformed_record(self):
+        """Test a malformed line is reported with its line number."""
+        path = self.write_trace([{"ts": 1, "caller": "a", "name": "Alice"}])
+        with open(path, "a", encoding="utf-8") as handle:
+            handle.write("\n{not json}\n")
+        with self.assertRaisesRegex(ValueError, "line 3"):
+            list(read_trace(path))
+
+    def test_replay_counts_rejections_and_errors(self):
+        """Test rejections and validation errors are tallied separately."""
+        records = [
+            {"ts": index, "caller": "hot", "name": "Alice"} for index in range(5)
+        ]
+        records += [{"ts": 5, "caller": "cold", "name": ""}]
+        report = replay_trace(
+            self.write_trace(records), self.config, workers=2, max_requests=3
+        )
+        self.assertEqual(report.requests, 6)
+        self.assertEqual(report.rejections, 2)
+        self.assertEqual(report.errors, {"ValueError: Name cannot be empty": 1})
+        self.assertEqual(report.latency.count, 6)
+        self.assertEqual(report.to_dict()["requests"], 6)
+
+    def test_replay_uses_recorded_time_when_unpaced(self):
+        """Test limiter windows expire on trace time, not wall-clock time."""
+        records = [
+            {"ts": index * 60, "caller": "steady", "name": "Alice"}
+            for index in range(10)
+        ]
+        report = replay_trace(
+            self.write_trace(records), self.config, window_ms=60000, max_requests=1
+        )
+        self.assertEqual(report.rejections, 0)
+
+    def test_replay_in_processes(self):
+        """Test process workers return their tallies to the parent."""
+        records = [
+            {"ts": 0, "caller": f"caller-{index % 4}", "name": "Alice"}
+            for index in range(40)
+        ]
+        report = replay_trace(
+            self.write_trace(records),
+            self.config,
+            workers=2,
+            mode="process",
+            max_requests=5,
+        )
+        self.assertEqual((report.requests, report.rejections), (40, 20))
+
+    def test_paced_replay_follows_recorded_gaps(self):
+        """Test paced replays take the recorded duration divided by speed."""
+        records = [{"ts": 0, "name": "Alice"}, {"ts": 1, "name": "Bob"}]
+        report = replay_trace(self.write_trace(records), self.config, speed=10)
+        self.assertGreaterEqual(report.elapsed, 0.1)
+
+    def test_invalid_arguments(self):
+        """Test unknown modes and worker counts are rejected."""
+        path = self.write_trace([])
+        for kwargs in ({"mode": "fiber"}, {"workers": 0}, {"speed": -1}):
+            with self.subTest(kwargs=kwargs):
+                with self.assertRaises(ValueError):
+                    replay_trace(path, self.config, **kwargs)
+
+    def test_replay_subcommand_parsed(self):
+        """Test the argparse CLI accepts the replay subcommand."""
+        argv = ["main.py", "replay", "trace.ndjson", "-w", "4", "--mode", "process"]
+        with patch.object(sys, "argv", argv):
+            args = main.parse_arguments()
+        self.assertEqual(args.command, "replay")
+        self.assertEqual(
+            (args.trace, args.workers, args.mode), ("trace.ndjson", 4, "process")
+        )
+        self.assertIs(main.CLI_COMMANDS[args.command], main.run_replay)
+
+
+class TestMemoryBudgets(unittest.TestCase):
+    """Allocation budgets for the hot paths, measured with tracemalloc."""
+
+    # A retained timestamp costs an int object plus its list slot
+    ADMITTED_BYTES_PER_OP = 48
+    # Rejected calls must not retain anything beyond noise
+    REJECTED_BYTES_PER_OP = 1
+    OPERATIONS = 5000
+
+    def setUp(self):
+        self.config = get_default_config()
+
+    def profile(self, workload, max_requests, warmup=0):
+        """Profile a workload over 100 callers after an optional warmup."""
+        operation = build_memory_workload(
+            workload, self.config, identifiers=100, max_requests=max_requests
+        )
+        for index in range(warmup):
+            operation(index)
+        return profile_memory(operation, self.OPERATIONS)
+
+    def test_is_allowed_admitted_budget(self):
+        """Test each admitted request retains only its timestamp."""
+        profile = self.profile("is_allowed", max_requests=10**9)
+        self.assertLessEqual(profile.bytes_per_op, self.ADMITTED_BYTES_PER_OP)
+        self.assertIn("main.py", profile.top[0][0])
+
+    def test_is_allowed_rejected_budget(self):
+        """Test rejected requests retain nothing once callers hit the limit."""
+        profile = self.profile("is_allowed", max_requests=5, warmup=500)
+        self.assertLessEqual(profile.bytes_per_op, self.REJECTED_BYTES_PER_OP)
+
+    def test_greet_admitted_budget(self):
+        """Test greet retains no more per call than the limiter does."""
+        profile = self.profile("greet", max_requests=10**9)
+        self.assertLessEqual(profile.bytes_per_op, self.ADMITTED_BYTES_PER_OP)
+
+    def test_greet_rejected_budget(self):
+        """Test rejected greets leave no strings or exceptions behind."""
+        profile = self.profile("greet", max_requests=5, warmup=500)
+        self.assertLessEqual(profile.bytes_per_op, self.REJECTED_BYTES_PER_OP)
+
+    def test_profile_reports_allocation_sites(self):
+        """Test a workload's own allocations are attributed to it."""
+        retained = []
+        profile = profile_memory(lambda index: retained.append(bytes(100)), 1000)
+        self.assertGreaterEqual(profile.retained, 100 * 1000)
+        self.assertGreaterEqual(profile.peak, 100 * 1000)
+        location, size, count = profile.top[0]
+        self.assertIn("test_main.py", location)
+        self.assertGreaterEqual(count, 1000)
+
+    def test_unknown_workload(self):
+        """Test unknown workloads are rejected."""
+        with self.assertRaises(ValueError):
+            build_memory_workload("sleep", self.config)
+
+
+class TestTracing(unittest.TestCase):
+    """Test cases for in-process tracing spans."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = os.path.join(self.temp_dir.name, "spans.ndjson")
+        self.tracer = Tracer(NdjsonSpanExporter(self.path, "test-app"))
+        patcher = patch.object(main, "tracer", self.tracer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def exported(self):
+        """Flush the exporter and return the exported span records."""
+        self.tracer.exporter.flush()
+        with open(self.path, encoding="utf-8") as handle:
+            return [json.loads(line) for line in handle]
+
+    def test_nested_spans_share_trace(self):
+        """Test child spans record their parent and trace."""
+        with self.tracer.span("parent", kind="test") as parent:
+            with self.tracer.span("child") as child:
+                child.set_attribute("size", 3)
+        records = {record["name"]: record for record in self.exported()}
+        self.assertEqual(records["child"]["parentSpanId"], parent.span_id)
+        self.assertEqual(records["child"]["traceId"], records["parent"]["traceId"])
+        self.assertEqual(records["parent"]["parentSpanId"], "")
+        self.assertEqual(records["parent"]["attributes"], {"kind": "test"})
+        self.assertEqual(records["child"]["attributes"], {"size": 3})
+        self.assertEqual(records["parent"]["resource"], {"service.name": "test-app"})
+        self.assertLessEqual(
+            records["parent"]["startTimeUnixNano"], records["parent"]["endTimeUnixNano"]
+        )
+
+    def test_exception_marks_span_as_error(self):
+        """Test a span that raises is exported with an error status."""
+        with self.assertRaises(ValueError):
+            with self.tracer.span("failing"):
+                raise ValueError("boom")
+        (record,) = self.exported()
+        self.assertEqual(
+            record["status"],
+            {"code": "STATUS_CODE_ERROR", "message": "ValueError: boom"},
+        )
+
+    def test_head_sampling_drops_whole_trace(self):
+        """Test children of an unsampled root are not recorded either."""
+        self.tracer.sample_rate = 0.0
+        with self.tracer.span("root") as root:
+            with self.tracer.span("child") as child:
+                pass
+        self.assertFalse(root.recording)
+        self.assertIs(child, NOOP_SPAN)
+        self.assertEqual(self.exported(), [])
+
+    def test_context_follows_asyncio_tasks(self):
+        """Test concurrent tasks nest spans under their own root."""
+
+        async def handle(name):
+            with self.tracer.span(name) as root:
+                await asyncio.sleep(0)
+                with self.tracer.span(f"{name}.child"):
+                    await asyncio.sleep(0)
+            return root.span_id
+
+        async def run():
+            return await asyncio.gather(handle("a"), handle("b"))
+
+        roots = dict(zip("ab", asyncio.run(run())))
+        for record in self.exported():
+            if record["name"].endswith(".child"):
+                self.assertEqual(record["parentSpanId"], roots[record["name"][0]])
+
+    def test_context_propagates_to_threads(self):
+        """Test propagate_context nests a thread's spans under the caller's."""
+
+        def work():
+            with self.tracer.span("worker"):
+                pass
+
+        with self.tracer.span("request") as request:
+            thread = threading.Thread(target=main.propagate_context(work))
+            thread.start()
+            thread.join()
+        records = {record["name"]: record for record in self.exported()}
+        self.assertEqual(records["worker"]["parentSpanId"], request.span_id)
+
+    def test_greet_records_stage_spans(self):
+        """Test a traced greet reports a span per stage under one root."""
+        service = GreetingService(
+            get_default_config(), limiter=RateLimiter(), denylist=DenylistGuard()
+        )
+        self.assertEqual(
+            service.greet("Alice", caller="10.0.0.1"),
+            service._greet("Alice", None, "10.0.0.2"),
+        )
+        records = self.exported()
+        names = [record["name"] for record in records]
+        self.assertEqual(
+            names,
+            [
+                "greet.check_caller",
+                "greet.render",
+                "greet.log",
+                "greet",
+            ],
+        )
+        root = records[-1]["spanId"]
+        self.assertTrue(all(record["parentSpanId"] == root for record in records[:-1]))
+
+    def test_traced_greet_applies_caller_checks(self):
+        """Test the traced path rejects callers exactly like the plain one."""
+        service = GreetingService(
+            get_default_config(),
+            limiter=RateLimiter(max_requests=1),
+            denylist=DenylistGuard(Denylist.build(["10.6.6.6"])),
+        )
+        with self.assertRaises(DeniedError):
+            service.greet("Alice", caller="10.6.6.6")
+        service.greet("Alice", caller="10.0.0.1")
+        with self.assertRaises(RateLimitedError):
+            service.greet("Alice", caller="10.0.0.1")
+        failed = [r for r in self.exported() if r["name"] == "greet.check_caller"]
+        self.assertEqual(
+            [record["status"]["code"] for record in failed],
+            ["STATUS_CODE_ERROR", "STATUS_CODE_OK", "STATUS_CODE_ERROR"],
+        )
+
+    def test_exporter_writes_each_batch_once_with_append(self):
+        """Test a batch is one O_APPEND write, so processes never split lines."""
+        exporter = NdjsonSpanExporter(self.path, batch_size=64)
+        self.addCleanup(exporter.close)
+        self.assertTrue(fcntl.fcntl(exporter._fd, fcntl.F_GETFL) & os.O_APPEND)
+        tracer = Tracer(exporter)
+        with patch("main.os.write", wraps=os.write) as write:
+            for _ in range(128):
+                with tracer.span("work", padding="x" * 1024):
+                    pass
+        # Each batch is about 80 KiB, far beyond any stdio buffer
+        self.assertEqual(write.call_count, 2)
+        with open(self.path, encoding="utf-8") as handle:
+            self.assertEqual(len([json.loads(line) for line in handle]), 128)
+
+    def test_disabled_tracer_is_noop(self):
+        """Test the disabled tracer hands out the shared no-op span."""
+        self.assertIs(main.NOOP_TRACER.span("anything", key="value"), NOOP_SPAN)
+        self.assertFalse(main.NOOP_TRACER.enabled)
+
+    def test_configure_tracing(self):
+        """Test TRACE_FILE enables tracing and bad sample rates are rejected."""
+        with patch.dict(os.environ, {"TRACE_FILE": self.path}):
+            with patch("main.atexit.register"):
+                self.assertTrue(main.configure_tracing())
+            self.assertIsInstance(main.tracer, Tracer)
+            main.tracer.shutdown()
+            with patch.dict(os.environ, {"TRACE_SAMPLE_RATE": "2"}):
+                with self.assertRaises(ConfigurationError):
+                    main.configure_tracing()
+        with patch.dict(os.environ, {"TRACE_FILE": ""}):
+            self.assertFalse(main.configure_tracing())
+
+
+class TestCache(unittest.TestCase):
+    """Test cases for the two-tier response cache."""
+
+    def setUp(self):
+        self.server = FakeRedisServer()
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.remote = RedisClient("127.0.0.1", self.server.port)
+        self.addCleanup(self.remote.close)
+        self.cache = TwoTierCache(LRUCache(), self.remote, prefix="test:")
+
+    def test_lru_evicts_least_recently_used_and_expires(self):
+        """Test the memory tier's size bound and TTL."""
+        now = [0.0]
+        memory = LRUCache(max_entries=2, ttl=10, clock=lambda: now[0])
+        memory.set("a", 1)
+        memory.set("b", 2)
+        memory.get("a")
+        memory.set("c", 3)
+        self.assertIs(memory.get("b"), CACHE_MISS)
+        self.assertEqual((memory.get("a"), memory.get("c")), (1, 3))
+        self.assertEqual(memory.evictions, 1)
+        now[0] = 10.0
+        self.assertIs(memory.get("a"), CACHE_MISS)
+        with self.assertRaises(ValueError):
+            LRUCache(max_entries=0)
+
+    def test_redis_tier_shared_and_pipelined(self):
+        """Test batch writes share one round trip and fill other processes."""
+        self.cache.set_many({f"k{index}": [index] for index in range(50)})
+        self.assertEqual(self.server.round_trips, 1)
+        self.assertEqual(self.server.data[b"test:k7"][0], b"[7]")
+
+        other = TwoTierCache(LRUCache(), self.remote, prefix="test:")
+        found = other.get_many([f"k{index}" for index in range(50)] + ["absent"])
+        self.assertEqual(len(found), 50)
+        self.assertEqual(found["k7"], [7])
+        self.assertEqual(self.server.round_trips, 2)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(other.get("k7"), [7])
+        stats = other.stats()
+        self.assertEqual(
+            (stats["remote_hits"], stats["memory_hits"], stats["misses"]), (50, 1, 1)
+        )
+        self.assertEqual(stats["store"], "memory+redis")
+
+        self.assertTrue(other.delete("k7"))
+        self.assertNotIn(b"test:k7", self.server.data)
+
+    def test_concurrent_misses_load_once(self):
+        """Test a stampede on one expired key runs the loader once."""
+        calls = []
+        release = threading.Event()
+        results = []
+
+        def loader():
+            calls.append(1)
+            release.wait(5)
+            return "value"
+
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(self.cache.get_or_load("hot", loader))
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        while len(self.cache._loading) == 0:
+            time.sleep(0.001)
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["value"] * 8)
+        self.assertEqual(len(calls), 1)
+        stats = self.cache.stats()
+        self.assertEqual(stats["loads"], 1)
+        self.assertEqual(stats["loads"] + stats["coalesced"] + stats["hits"], 8)
+
+    def test_unreachable_redis_degrades_to_memory(self):
+        """Test Redis failures are counted and served from memory."""
+        self.server.__exit__(None, None, None)
+        cache = TwoTierCache(LRUCache(), RedisClient("127.0.0.1", self.server.port))
+        with self.assertLogs("cache", logging.WARNING):
+            cache.set("key", "value")
+            self.assertEqual(cache.get("key"), "value")
+            self.assertIs(cache.get("other"), CACHE_MISS)
+        self.assertEqual(cache.stats()["errors"], 2)
+
+    def test_redis_error_reply_raises(self):
+        """Test error replies surface as CacheError."""
+        with self.assertRaises(CacheError):
+            self.remote.execute("NOSUCHCOMMAND")
+        self.assertTrue(self.remote.ping())
+
+    def test_undecodable_redis_value_is_a_miss_and_deleted(self):
+        """Test corrupt or foreign Redis values are dropped, not raised."""
+        self.server.data[b"test:bad"] = (b"{not json", None)
+        self.server.data[b"test:binary"] = (b"\xff\xfe", None)
+        self.cache.set("good", 1)
+        other = TwoTierCache(LRUCache(), self.remote, prefix="test:")
+        with self.assertLogs("cache", logging.WARNING):
+            self.assertIs(other.get("bad"), CACHE_MISS)
+            self.assertEqual(other.get_many(["binary", "good"]), {"good": 1})
+        self.assertNotIn(b"test:bad", self.server.data)
+        self.assertNotIn(b"test:binary", self.server.data)
+        stats = other.stats()
+        self.assertEqual(
+            (stats["remote_hits"], stats["misses"], stats["errors"]), (1, 2, 2)
+        )
+
+    def test_waiter_loads_itself_when_leader_never_finishes(self):
+        """Test coalesced waiters give up after load_timeout."""
+        cache = TwoTierCache(load_timeout=0.05)
+        started = threading.Event()
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def stuck():
+            started.set()
+            release.wait(5)
+            return "late"
+
+        leader = threading.Thread(target=cache.get_or_load, args=("key", stuck))
+        leader.start()
+        self.addCleanup(leader.join)
+        self.assertTrue(started.wait(5))
+        self.assertEqual(cache.get_or_load("key", lambda: "fresh"), "fresh")
+
+    def test_counters_exact_under_threads(self):
+        """Test concurrent hits and misses are all counted."""
+        cache = TwoTierCache()
+        cache.set("hit", 1)
+
+        def work():
+            for _ in range(2000):
+                cache.get("hit")
+                cache.get("miss")
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        stats = cache.stats()
+        self.assertEqual((stats["memory_hits"], stats["misses"]), (16000, 16000))
+
+    def test_greet_caches_rendering_but_still_rate_limits(self):
+        """Test cached greetings are still charged to the caller."""
+        service = GreetingService(
+            get_default_config(), limiter=RateLimiter(max_requests=2)
+        )
+        with patch.object(main, "response_cache", self.cache):
+            first = service.greet("  Alice  ", caller="10.0.0.1")
+            self.assertEqual(service.greet("  Alice  ", caller="10.0.0.1"), first)
+            with self.assertRaises(ValueError):
+                service.greet("  Alice  ", caller="10.0.0.1")
+            with self.assertRaises(ValueError):
+                service.greet("", caller="10.0.0.2")
+        self.assertEqual(first, service._greet("Alice", None, "10.0.0.3"))
+        stats = self.cache.stats()
+        self.assertEqual((stats["loads"], stats["memory_hits"]), (1, 1))
+
+    def test_greet_rejects_non_string_names_when_cached(self):
+        """Test the cache key does not turn bad input into a TypeError."""
+        service = GreetingService(get_default_config(), limiter=RateLimiter())
+        with patch.object(main, "response_cache", self.cache):
+            for name in (123, None, ["Alice"]):
+                with self.subTest(name=name):
+                    with self.assertRaisesRegex(ValueError, "must be a string"):
+                        service.greet(name)
+            with self.assertRaisesRegex(ValueError, "Locale must be a string"):
+                service.greet("Alice", locale=5)
+
+    def test_app_info_not_cached(self):
+        """Test host-specific app info never reaches the shared Redis tier."""
+        service = AppInfoService(get_default_config())
+        with patch.object(main, "response_cache", self.cache):
+            info = service.get_app_info()
+            self.assertIs(service.get_app_info(), info)
+        self.assertEqual(self.server.data, {})
+        self.assertEqual(self.cache.stats()["total_requests"], 0)
+
+    def test_configure_cache_from_environment(self):
+        """Test CACHE_ENABLED and REDIS_HOST select the tiers."""
+        environ = {
+            "CACHE_ENABLED": "true",
+            "CACHE_PREFIX": "proj",
+            "REDIS_HOST": "127.0.0.1",
+            "REDIS_PORT": str(self.server.port),
+        }
+        with patch.object(main, "response_cache", None):
+            with patch.dict(os.environ, {"CACHE_ENABLED": "false"}):
+                self.assertFalse(configure_cache())
+                self.assertIsNone(main.response_cache)
+            with patch.dict(os.environ, environ):
+                self.assertTrue(configure_cache())
+                self.assertEqual(main.response_cache.stats()["store"], "memory+redis")
+                self.assertEqual(main.response_cache.prefix, "proj:")
+                main.response_cache.close()
+            with patch.dict(os.environ, dict(environ, CACHE_TTL="soon")):
+                with self.assertRaises(ConfigurationError):
+                    configure_cache()
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for coalescing identical concurrent calls."""
+
+    def test_concurrent_threads_share_one_call(self):
+        """Test waiting threads receive the leader's result."""
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def compute(value):
+            calls.append(value)
+            release.wait(5)
+            return value * 2
+
+        threads = [
+            threading.Thread(target=lambda: results.append(flight.do("k", compute, 21)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        while flight.shared < 7:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [42] * 8)
+        self.assertEqual(calls, [21])
+        self.assertEqual(flight.stats(), {"executions": 1, "shared": 7})
+        self.assertEqual(flight.do("k", compute, 1), 2)
+
+    def test_exception_is_shared_and_not_retained(self):
+        """Test waiters see the leader's exception and later calls retry."""
+        flight = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def run():
+            return await asyncio.gather(
+                *(flight.do_async("k", failing) for _ in range(5)),
+                return_exceptions=True,
+            )
+
+        errors = asyncio.run(run())
+        self.assertTrue(all(isinstance(error, ValueError) for error in errors))
+        self.assertEqual(flight.stats(), {"executions": 1, "shared": 4})
+        self.assertEqual(flight._tasks, {})
+
+    def test_cancelled_waiter_does_not_cancel_flight(self):
+        """Test cancelling one waiter leaves the shared call running."""
+        flight = SingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def run():
+            leader = asyncio.ensure_future(flight.do_async("k", slow))
+            await asyncio.sleep(0)
+            waiter = asyncio.ensure_future(flight.do_async("k", slow))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            return await leader, waiter
+
+        result, waiter = asyncio.run(run())
+        self.assertEqual(result, "done")
+        self.assertTrue(waiter.cancelled())
+
+    def test_greet_async_charges_every_caller(self):
+        """Test coalesced greetings are still rate limited per call."""
+        flight = SingleFlight()
+        service = GreetingService(
+            get_default_config(),
+            limiter=RateLimiter(max_requests=5),
+            singleflight=flight,
+        )
+
+        async def run():
+            return await asyncio.gather(
+                *(service.greet_async("Alice", caller="10.0.0.1") for _ in range(8)),
+                return_exceptions=True,
+            )
+
+        with self.assertLogs("GreetingService", logging.INFO) as logs:
+            results = asyncio.run(run())
+        greetings = [result for result in results if isinstance(result, str)]
+        self.assertEqual(len(greetings), 5)
+        self.assertEqual(set(greetings), {service._generate("Alice", None)})
+        self.assertEqual(flight.stats(), {"executions": 1, "shared": 4})
+        self.assertEqual(len(logs.records), 1)
+
+    def test_greet_threads_share_generation(self):
+        """Test the thread path coalesces while the leader is logging."""
+        flight = SingleFlight()
+        service = GreetingService(
+            get_default_config(), limiter=RateLimiter(), singleflight=flight
+        )
+        entered = threading.Event()
+        release = threading.Event()
+
+        class BlockingHandler(logging.Handler):
+            def emit(self, record):
+                entered.set()
+                release.wait(5)
+
+        handler = BlockingHandler()
+        service.logger.addHandler(handler)
+        self.addCleanup(service.logger.removeHandler, handler)
+        service.logger.setLevel(logging.INFO)
+        self.addCleanup(service.logger.setLevel, logging.NOTSET)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(service.greet("Bob")))
+            for _ in range(4)
+        ]
+        threads[0].start()
+        entered.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while flight.shared < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(flight.executions, 1)
+
+    def test_greet_rejects_non_string_names(self):
+        """Test bad names raise ValueError on every singleflight path."""
+        flight = SingleFlight()
+        service = GreetingService(
+            get_default_config(), limiter=RateLimiter(), singleflight=flight
+        )
+        for name in (123, None):
+            with self.subTest(name=name):
+                with self.assertRaisesRegex(ValueError, "Name must be a string"):
+                    service.greet(name)
+                with self.assertRaisesRegex(ValueError, "Name must be a string"):
+                    asyncio.run(service.greet_async(name))
+                with patch.object(main, "tracer", Tracer(MagicMock())):
+                    with self.assertRaisesRegex(ValueError, "Name must be a string"):
+                        service.greet(name)
+        self.assertEqual(flight.executions, 0)
+
+    def test_configure_from_environment(self):
+        """Test SINGLEFLIGHT=true installs the flight greet shares through."""
+        with patch.object(main, "greeting_flight", None):
+            with patch.dict(os.environ, {"SINGLEFLIGHT": "false"}):
+                self.assertFalse(configure_singleflight())
+            service = GreetingService(get_default_config(), limiter=RateLimiter())
+            self.assertIsNone(service.active_singleflight)
+            with patch.dict(os.environ, {"SINGLEFLIGHT": "true"}):
+                self.assertTrue(configure_singleflight())
+            self.assertIs(service.active_singleflight, main.greeting_flight)
+            service.greet("Alice")
+            self.assertEqual(main.greeting_flight.executions, 1)
+
+
+class TestDaemon(unittest.TestCase):
+    """Test cases for the Unix socket daemon and its thin client."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, "daemon.sock")
+        config = get_default_config()
+        self.service = GreetingService(config, limiter=RateLimiter(max_requests=2))
+        self.server = self.start(self.path, self.service)
+
+    def start(self, path, service):
+        admission = AdmissionController(service.greet, workers=2)
+        self.addCleanup(admission.close)
+        server = GreetingDaemon(
+            path, service, AppInfoService(service.config), admission
+        )
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_client_reuses_connection(self):
+        """Test several requests share one connection and rate limits apply."""
+        with greet_client.DaemonClient(self.path) as client:
+            self.assertEqual(client.request({"op": "ping"}), "pong")
+            greeting = client.greet("Alice", caller="10.0.0.1")
+            self.assertEqual(greeting, self.service._generate("Alice", None))
+            self.assertEqual(
+                client.greet("Bob", "ja", "10.0.0.1"),
+                self.service._generate("Bob", "ja"),
+            )
+            with self.assertRaisesRegex(ValueError, "Rate limit"):
+                client.greet("Carol", caller="10.0.0.1")
+            self.assertEqual(client.request({"op": "info"})["name"], "Project Template")
+            self.assertEqual(client.request({"op": "metrics"})["completed"], 3)
+
+    def test_offenders_report(self):
+        """Test the daemon reports the heaviest callers of its limiter."""
+        self.service.limiter.tracker = HeavyHitterTracker()
+        with greet_client.DaemonClient(self.path) as client:
+            for caller in ["10.0.0.1"] * 3 + ["10.0.0.2"]:
+                try:
+                    client.greet("Alice", caller=caller)
+                except ValueError:
+                    pass
+            report = client.request({"op": "offenders", "count": 1})
+            self.assertEqual(
+                report,
+                {"requests": 4, "offenders": [{"caller": "10.0.0.1", "requests": 3}]},
+            )
+            with self.assertRaisesRegex(ValueError, "positive integer"):
+                client.request({"op": "offenders", "count": 0})
+
+    @patch.object(main, "RATE_LIMIT_MESSAGE", "Slow down")
+    def test_rate_limited_kind_survives_rewording(self):
+        """Test rate limit replies are classified by type, not message text."""
+        message = {"op": "greet", "name": "Alice", "caller": "10.0.0.1"}
+        for _ in range(2):
+            self.assertTrue(self.server.handle_message(message)["ok"])
+        reply = self.server.handle_message(message)
+        self.assertEqual(
+            (reply["error"], reply["message"]), ("rate_limited", "Slow down")
+        )
+
+    def test_concurrency_limit_reported_as_overload(self):
+        """Test the adaptive limiter answers overloaded and shows in metrics."""
+        concurrency = AdaptiveConcurrencyLimiter(initial_limit=1)
+        service = GreetingService(
+            get_default_config(), limiter=RateLimiter(), concurrency=concurrency
+        )
+        path = self.path + ".limited"
+        server = self.start(path, service)
+        concurrency.try_acquire()
+        reply = server.handle_message({"op": "greet", "name": "Alice"})
+        self.assertEqual(reply["error"], "overloaded")
+        with greet_client.DaemonClient(path) as client:
+            metrics = client.request({"op": "metrics"})
+        self.assertEqual(metrics["concurrency"]["rejected"], 1)
+        self.assertNotIn(
+            "concurrency", self.server.handle_message({"op": "metrics"})["result"]
+        )
+
+    def test_error_kinds(self):
+        """Test refusals are reported with a distinct error kind."""
+        cases = [
+            ({"op": "greet", "name": ""}, "invalid"),
+            ({"op": "greet", "name": 5}, "bad_request"),
+            ({"op": "shutdown"}, "bad_request"),
+            ([1, 2], "bad_request"),
+        ]
+        for message, kind in cases:
+            with self.subTest(message=message):
+                self.assertEqual(self.server.handle_message(message)["error"], kind)
+
+    def test_malformed_frame_closes_connection(self):
+        """Test an oversized frame gets an error reply and a closed socket."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(sock.close)
+        sock.connect(self.path)
+        sock.sendall(DAEMON_FRAME.pack(DAEMON_MAX_FRAME + 1))
+        reply = read_frame(sock.makefile("rb"))
+        self.assertEqual(reply["error"], "bad_request")
+        self.assertEqual(sock.recv(1), b"")
+
+    def test_socket_path_claimed_safely(self):
+        """Test a live daemon's path is refused and a stale one replaced."""
+        with self.assertRaisesRegex(OSError, "already listening"):
+            GreetingDaemon(self.path, self.service, None, None)
+        stale = self.path + ".stale"
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(stale)
+        sock.close()
+        self.start(stale, self.service)
+        with greet_client.DaemonClient(stale) as client:
+            self.assertEqual(client.request({"op": "ping"}), "pong")
+        self.assertEqual(os.stat(stale).st_mode & 0o777, 0o600)
+
+    def test_socket_is_private_from_bind(self):
+        """Test the socket never exists with the default permissions."""
+        modes = []
+        bind = socketserver.UnixStreamServer.server_bind
+
+        def checked_bind(server):
+            bind(server)
+            modes.append(os.stat(server.server_address).st_mode & 0o777)
+
+        with patch.object(socketserver.UnixStreamServer, "server_bind", checked_bind):
+            self.start(self.path + ".private", self.service)
+        self.assertEqual(modes, [0o600])
+
+    def test_client_reports_truncated_reply(self):
+        """Test a reply cut short raises ConnectionError, not a JSON error."""
+        path = self.path + ".truncated"
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(listener.close)
+        listener.bind(path)
+        listener.listen(1)
+
+        def reply_partially():
+            conn, _ = listener.accept()
+            with conn:
+                read_frame(conn.makefile("rb"))
+                conn.sendall(DAEMON_FRAME.pack(100) + b'{"ok":')
+
+        thread = threading.Thread(target=reply_partially)
+        thread.start()
+        self.addCleanup(thread.join)
+        with greet_client.DaemonClient(path) as client:
+            with self.assertRaisesRegex(ConnectionError, "mid-reply"):
+                client.request({"op": "ping"})
+
+    def test_client_falls_back_in_process(self):
+        """Test the client greets in-process when no daemon is listening."""
+        missing = self.path + ".missing"
+        with patch.dict(os.environ, {"APP_NAME": "Fallback App"}):
+            greeting = greet_client.greet("Dana", socket_path=missing)
+        self.assertEqual(greeting, "Hello, Dana! Welcome to Fallback App")
+
+
+class TestHTTPServer(unittest.TestCase):
+    """Test cases for the HTTP endpoints and the pre-fork supervisor."""
+
+    def setUp(self):
+        self.service = GreetingService(
+            get_default_config(), limiter=RateLimiter(max_requests=2)
+        )
+
+    def get(self, port, path, headers=None):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        try:
+            connection.request("GET", path, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, response.read(), response
+        finally:
+            connection.close()
+
+    def start_supervisor(self, log_file=None, **kwargs):
+        """Fork a process running a PreforkServer; return it and its pid."""
+        server = PreforkServer(
+            "127.0.0.1",
+            0,
+            2,
+            self.service,
+            AppInfoService(get_default_config()),
+            before_fork=prepare_worker_fork,
+            worker_init=init_worker,
+            worker_exit=exit_worker,
+            **kwargs,
+        )
+        server.bind()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                if log_file:
+                    handler = BufferedRotatingFileHandler(
+                        log_file, max_bytes=1 << 20, buffer_size=1 << 20
+                    )
+                    handler.flush_interval = 60
+                    logging.getLogger().handlers[:] = [handler]
+                    logging.getLogger().setLevel(logging.INFO)
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        server._socket.close()
+        self.addCleanup(self.stop_supervisor, pid)
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                if self.get(server.port, "/healthz")[0] == 200:
+                    return server, pid
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def stop_supervisor(self, pid):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        _, status = os.waitpid(pid, 0)
+        return os.waitstatus_to_exitcode(status)
+
+    def workers(self, pid):
+        with open(f"/proc/{pid}/task/{pid}/children") as handle:
+            return set(map(int, handle.read().split()))
+
+    def test_endpoints(self):
+        """Test greeting, refusal statuses and conditional app info."""
+        sock = socket.create_server(("127.0.0.1", 0))
+        admission = AdmissionController(self.service.greet, workers=1)
+        self.addCleanup(admission.close)
+        server = GreetingHTTPServer(
+            sock, AppInfoService(self.service.config), admission, self.service.limiter
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        port = sock.getsockname()[1]
+
+        status, body, _ = self.get(port, "/greet?name=Alice&locale=ja")
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            json.loads(body)["result"], self.service._generate("Alice", "ja")
+        )
+        self.assertEqual(self.get(port, "/greet?name=%3C%3E")[0], 400)
+        self.get(port, "/greet")
+        status, body, _ = self.get(port, "/greet")
+        self.assertEqual((status, json.loads(body)["error"]), (429, "rate_limited"))
+        self.assertEqual(self.get(port, "/missing")[0], 404)
+
+        status, body, response = self.get(port, "/info")
+        self.assertEqual(json.loads(body)["name"], "Project Template")
+        etag = response.getheader("ETag")
+        self.assertEqual(self.get(port, "/info", {"If-None-Match": etag})[0], 304)
+        self.assertEqual(
+            json.loads(self.get(port, "/metrics")[1])["result"]["completed"], 4
+        )
+        # Offender tracking is opt-in for the limiter this server was given
+        self.assertEqual(self.get(port, "/offenders")[0], 400)
+        self.service.limiter.tracker = HeavyHitterTracker()
+        self.get(port, "/greet")
+        status, body, _ = self.get(port, "/offenders?count=5")
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            json.loads(body)["result"]["offenders"],
+            [{"caller": "127.0.0.1", "requests": 1}],
+        )
+        self.assertEqual(self.get(port, "/offenders?count=x")[0], 400)
+
+    @unittest.skipUnless(
+        hasattr(os, "fork") and os.path.exists("/proc/self/task"),
+        "needs fork and /proc",
+    )
+    def test_crashed_worker_is_replaced_and_shutdown_drains(self):
+        """Test the supervisor restarts a killed worker and exits cleanly."""
+        server, pid = self.start_supervisor()
+        self.assertTrue(server.reuse_port)
+        workers = self.workers(pid)
+        self.assertEqual(len(workers), 2)
+        os.kill(min(workers), signal.SIGKILL)
+        deadline = time.monotonic() + 10
+        while len(self.workers(pid) - workers) < 1:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+        self.assertEqual(len(self.workers(pid)), 2)
+        self.assertEqual(self.get(server.port, "/healthz")[0], 200)
+        self.assertEqual(self.stop_supervisor(pid), 0)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_shared_socket_fallback(self):
+        """Test workers can share one accept socket instead of SO_REUSEPORT."""
+        server, pid = self.start_supervisor(reuse_port=False)
+        self.assertFalse(server.reuse_port)
+        status, body, _ = self.get(server.port, "/greet?name=Bob")
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            json.loads(body)["result"], self.service._generate("Bob", None)
+        )
+        self.assertEqual(self.stop_supervisor(pid), 0)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_workers_apply_concurrency_limit(self):
+        """Test workers apply the service's limiter and report its metrics."""
+        self.service.concurrency = AdaptiveConcurrencyLimiter(initial_limit=4)
+        server, pid = self.start_supervisor()
+        self.assertEqual(self.get(server.port, "/greet?name=Bob")[0], 200)
+        metrics = json.loads(self.get(server.port, "/metrics")[1])["result"]
+        self.assertEqual(metrics["concurrency"]["limit"], 4)
+        self.assertEqual(self.stop_supervisor(pid), 0)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_workers_flush_own_log_files_on_exit(self):
+        """Test each worker logs to its own file and flushes it on exit."""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        log_file = os.path.join(tmpdir.name, "app.log")
+        server, pid = self.start_supervisor(log_file=log_file)
+        self.assertEqual(self.get(server.port, "/greet?name=Bob")[0], 200)
+        self.assertEqual(self.stop_supervisor(pid), 0)
+
+        logs = {}
+        for slot in range(2):
+            with open(os.path.join(tmpdir.name, f"app.worker{slot}.log")) as handle:
+                logs[slot] = handle.read()
+        self.assertEqual(sum("Bob" in log for log in logs.values()), 1)
+        with open(log_file) as handle:
+            self.assertNotIn("Bob", handle.read())
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_workers_use_configured_admission_settings(self):
+        """Test each worker's admission controller honors the server's settings."""
+        server, pid = self.start_supervisor(threads=3, max_queue=7, policy="max-wait")
+        metrics = json.loads(self.get(server.port, "/metrics")[1])["result"]
+        self.assertEqual(
+            (metrics["workers"], metrics["max_queue"], metrics["policy"]),
+            (3, 7, "max-wait"),
+        )
+        self.assertEqual(self.stop_supervisor(pid), 0)
+
+        info = AppInfoService(get_default_config())
+        for kwargs in ({"threads": 0}, {"max_queue": 0}, {"policy": "fifo"}):
+            with self.subTest(kwargs=kwargs):
+                with self.assertRaises(ValueError):
+                    PreforkServer("127.0.0.1", 0, 1, self.service, info, **kwargs)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_signalling_reaped_worker_is_ignored(self):
+        """Test shutdown tolerates a worker that exited meanwhile."""
+        server = PreforkServer(
+            "127.0.0.1", 0, 1, self.service, AppInfoService(get_default_config())
+        )
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0)
+        os.waitpid(pid, 0)
+        server._children[pid] = 0
+        previous = signal.getsignal(signal.SIGALRM)
+        try:
+            server._stop(signal.SIGTERM, None)
+            server._kill_stragglers(signal.SIGALRM, None)
+        finally:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, previous)
+
 
 class TestLoggingFunctions(unittest.TestCase):
     """Test cases for logging functions."""
 
     def setUp(self):
         """Set up test fixtures."""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        isolate_root_logging(self, tmpdir.name)
         self.config = AppConfig(
             app_name="Test App",
             app_version="1.0.0",
@@ -413,9 +2946,383 @@ class TestLoggingFunctions(unittest.TestCase):
         self.assertGreater(mock_logger.info.call_count, 0)
 
 
+class TestAsyncLogging(unittest.TestCase):
+    """Test cases for queue-based asynchronous logging."""
+
+    def setUp(self):
+        """Set up a temporary log file."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.tmpdir.name, "app.log")
+        self.config = AppConfig(
+            app_name="Test App",
+            app_version="1.0.0",
+            environment="development",
+            debug=False,
+            log_level="INFO",
+        )
+
+        isolate_root_logging(self, self.tmpdir.name)
+
+    def tearDown(self):
+        """Stop the listener and remove the log directory."""
+        shutdown_logging()
+        self.tmpdir.cleanup()
+
+    @patch.dict(
+        os.environ,
+        {"LOG_ASYNC": "true", "LOG_QUEUE_SIZE": "64", "LOG_QUEUE_POLICY": "drop"},
+    )
+    def test_load_logging_options_from_env(self):
+        """Test reading logging options from the environment."""
+        options = load_logging_options()
+        self.assertTrue(options.async_mode)
+        self.assertEqual(options.queue_size, 64)
+        self.assertEqual(options.overflow_policy, "drop")
+
+    def test_load_logging_options_invalid(self):
+        """Test invalid logging options raise ConfigurationError."""
+        for env in ({"LOG_QUEUE_POLICY": "spill"}, {"LOG_QUEUE_SIZE": "0"}):
+            with self.subTest(env=env), patch.dict(os.environ, env):
+                with self.assertRaises(ConfigurationError):
+                    load_logging_options()
+
+    def test_drop_policy_counts_dropped_records(self):
+        """Test a full queue drops records under the drop policy."""
+        handler = BoundedQueueHandler(queue.Queue(maxsize=2), "drop")
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "m", (), None)
+        for _ in range(5):
+            handler.handle(record)
+        self.assertEqual(handler.queue.qsize(), 2)
+        self.assertEqual(handler.dropped, 3)
+
+    def test_records_are_enqueued_unformatted(self):
+        """Test the caller thread does not format records."""
+        handler = BoundedQueueHandler(queue.Queue(), "block")
+        handler.setFormatter(MagicMock())
+        record = logging.LogRecord(
+            "test", logging.INFO, __file__, 1, "Hi %s", ("Bob",), None
+        )
+        handler.handle(record)
+        handler.formatter.format.assert_not_called()
+        self.assertIs(handler.queue.get_nowait(), record)
+
+    @patch("main.logging.basicConfig")
+    def test_async_setup_flushes_on_shutdown(self, mock_basic_config):
+        """Test queued records reach the log file when logging shuts down."""
+        options = LoggingOptions(log_file=self.log_file, async_mode=True)
+        with patch("sys.stdout"):
+            setup_logging(self.config, options)
+        queue_handler = mock_basic_config.call_args.kwargs["handlers"][0]
+        self.assertIsInstance(queue_handler, BoundedQueueHandler)
+
+        logger = logging.getLogger("async-test")
+        for index in range(100):
+            record = logger.makeRecord(
+                "async-test", logging.INFO, __file__, 1, "record %d", (index,), None
+            )
+            queue_handler.handle(record)
+        shutdown_logging()
+
+        with open(self.log_file, encoding="utf-8") as handle:
+            lines = handle.read().splitlines()
+        self.assertEqual(len(lines), 100)
+        self.assertTrue(lines[-1].endswith("async-test - INFO - record 99"))
+
+    @patch.dict(
+        os.environ, {"LOG_ASYNC": "true", "NODE_ENV": "production", "DEBUG": "false"}
+    )
+    def test_startup_sequence_installs_queue_handler(self):
+        """Test records reach the log file after load_configuration has logged."""
+        # Logging before setup_logging installs a default root handler
+        logging.warning("before setup")
+        setup_logging(load_configuration())
+        self.assertIsInstance(logging.getLogger().handlers[0], BoundedQueueHandler)
+        logging.getLogger("async-test").info("after setup")
+        shutdown_logging()
+
+        with open(self.log_file, encoding="utf-8") as handle:
+            self.assertIn("async-test - INFO - after setup", handle.read())
+
+
+class TestStructuredLogging(unittest.TestCase):
+    """Test cases for JSON formatting and log sampling."""
+
+    def make_record(self, msg="Generated greeting for: %s", level=logging.INFO):
+        """Create a log record for the greeting service."""
+        return logging.LogRecord(
+            "GreetingService", level, __file__, 1, msg, ("Alice",), None
+        )
+
+    def test_json_formatter_output(self):
+        """Test records format as JSON with the static fields appended."""
+        formatter = JsonFormatter({"app": "Test App", "env": "development"})
+        record = self.make_record('Quote " and \n newline %s')
+        payload = json.loads(formatter.format(record))
+        self.assertEqual(payload["msg"], 'Quote " and \n newline Alice')
+        self.assertEqual(payload["level"], "INFO")
+        self.assertEqual(payload["logger"], "GreetingService")
+        self.assertEqual(payload["app"], "Test App")
+        self.assertEqual(payload["env"], "development")
+        self.assertAlmostEqual(payload["ts"], record.created, places=2)
+
+    def test_json_formatter_exception(self):
+        """Test exception tracebacks are included as a JSON string."""
+        formatter = JsonFormatter()
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            record = logging.LogRecord(
+                "test", logging.ERROR, __file__, 1, "failed", (), sys.exc_info()
+            )
+        payload = json.loads(formatter.format(record))
+        self.assertIn("RuntimeError: boom", payload["exc"])
+
+    def test_sampling_keeps_one_in_n(self):
+        """Test only one in N records of a template pass."""
+        sampler = SamplingFilter(sample_rate=10)
+        passed = sum(sampler.filter(self.make_record()) for _ in range(100))
+        self.assertEqual(passed, 10)
+        self.assertEqual(sampler.suppressed, 90)
+
+    def test_sampling_is_per_template(self):
+        """Test each message template is sampled independently."""
+        sampler = SamplingFilter(sample_rate=10)
+        self.assertTrue(sampler.filter(self.make_record("first %s")))
+        self.assertTrue(sampler.filter(self.make_record("second %s")))
+
+    def test_sampling_always_passes_errors(self):
+        """Test warnings and errors bypass sampling and rate caps."""
+        sampler = SamplingFilter(sample_rate=1000, rate_cap=1)
+        for _ in range(10):
+            self.assertTrue(sampler.filter(self.make_record(level=logging.ERROR)))
+
+    def test_rate_cap(self):
+        """Test at most rate_cap records per second pass."""
+        sampler = SamplingFilter(rate_cap=5)
+        with patch("main.time.monotonic", return_value=100.0):
+            passed = sum(sampler.filter(self.make_record()) for _ in range(20))
+        self.assertEqual(passed, 5)
+        with patch("main.time.monotonic", return_value=101.0):
+            self.assertTrue(sampler.filter(self.make_record()))
+
+    def test_sampling_exact_under_threads(self):
+        """Test concurrent loggers still pass exactly one in N records."""
+        sampler = SamplingFilter(sample_rate=10)
+        passed = []
+
+        def log_many():
+            passed.append(sum(sampler.filter(self.make_record()) for _ in range(1000)))
+
+        threads = [threading.Thread(target=log_many) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(passed), 800)
+        self.assertEqual(sampler.suppressed, 7200)
+
+    @patch.dict(
+        os.environ,
+        {
+            "LOG_FORMAT": "json",
+            "LOG_SAMPLE_RATE": "10",
+            "NODE_ENV": "production",
+            "DEBUG": "false",
+        },
+    )
+    def test_startup_sequence_applies_format_and_sampling(self):
+        """Test JSON and sampling take effect after load_configuration logs."""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        isolate_root_logging(self, tmpdir.name)
+        logging.warning("before setup")
+        with patch("sys.stdout"):
+            setup_logging(load_configuration())
+            logger = logging.getLogger("sampled")
+            for index in range(100):
+                logger.info("record %d", index)
+        logging.getLogger().handlers[1].flush()
+
+        with open(os.path.join(tmpdir.name, "app.log"), encoding="utf-8") as handle:
+            records = [json.loads(line) for line in handle]
+        sampled = [record for record in records if record["logger"] == "sampled"]
+        self.assertEqual(len(sampled), 10)
+        self.assertEqual(sampled[1]["msg"], "record 10")
+
+    def test_decision_shared_between_handlers(self):
+        """Test handlers sharing a sampler see the same decision per record."""
+        sampler = SamplingFilter(sample_rate=2)
+        record = self.make_record()
+        self.assertEqual(sampler.filter(record), sampler.filter(record))
+        self.assertEqual(sampler.suppressed, 0)
+
+    @patch.dict(
+        os.environ,
+        {"LOG_FORMAT": "json", "LOG_SAMPLE_RATE": "100", "LOG_RATE_CAP": "50"},
+    )
+    def test_load_logging_options_structured(self):
+        """Test reading format and sampling options from the environment."""
+        options = load_logging_options()
+        self.assertEqual(options.log_format, "json")
+        self.assertEqual(options.sample_rate, 100)
+        self.assertEqual(options.rate_cap, 50)
+        with patch.dict(os.environ, {"LOG_FORMAT": "xml"}):
+            with self.assertRaises(ConfigurationError):
+                load_logging_options()
+
+
+class TestBufferedRotatingFileHandler(unittest.TestCase):
+    """Test cases for buffered, rotating file logging."""
+
+    def setUp(self):
+        """Set up a temporary log directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.tmpdir.name, "app.log")
+        self.handlers = []
+
+    def tearDown(self):
+        """Close handlers and remove the log directory."""
+        for handler in self.handlers:
+            handler.close()
+        self.tmpdir.cleanup()
+
+    def make_handler(self, **kwargs):
+        """Create a handler that is closed after the test."""
+        handler = BufferedRotatingFileHandler(self.log_file, **kwargs)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self.handlers.append(handler)
+        return handler
+
+    def log(self, handler, message, level=logging.INFO):
+        """Send one record through a handler."""
+        handler.handle(logging.LogRecord("test", level, __file__, 1, message, (), None))
+
+    def read_log(self, path=None):
+        """Read a log file."""
+        with open(path or self.log_file, encoding="utf-8") as handle:
+            return handle.read()
+
+    def test_records_buffered_until_threshold(self):
+        """Test records stay in memory until the buffer fills."""
+        handler = self.make_handler(buffer_size=100, flush_interval=60)
+        self.log(handler, "a" * 10)
+        self.assertEqual(self.read_log(), "")
+        for _ in range(9):
+            self.log(handler, "a" * 10)
+        self.assertEqual(len(self.read_log().splitlines()), 10)
+
+    def test_error_record_flushes_buffer(self):
+        """Test an error-level record forces a flush."""
+        handler = self.make_handler(buffer_size=1 << 20, flush_interval=60)
+        self.log(handler, "info")
+        self.log(handler, "error", logging.ERROR)
+        self.assertEqual(self.read_log(), "info\nerror\n")
+
+    def test_background_flush_interval(self):
+        """Test an idle buffer is flushed by the background thread."""
+        handler = self.make_handler(buffer_size=1 << 20, flush_interval=0.05)
+        self.log(handler, "idle")
+        deadline = time.monotonic() + 5
+        while not self.read_log() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.read_log(), "idle\n")
+
+    def test_close_flushes_buffer(self):
+        """Test closing the handler writes pending records."""
+        handler = self.make_handler(buffer_size=1 << 20, flush_interval=60)
+        self.log(handler, "pending")
+        handler.close()
+        self.assertEqual(self.read_log(), "pending\n")
+
+    def test_size_rotation_keeps_backup_count(self):
+        """Test size-based rotation keeps at most backup_count files."""
+        handler = self.make_handler(max_bytes=50, backup_count=2, buffer_size=0)
+        for index in range(20):
+            self.log(handler, f"record {index:02d} " + "x" * 20)
+        handler.close()
+        names = sorted(os.listdir(self.tmpdir.name))
+        self.assertEqual(names, ["app.log", "app.log.1", "app.log.2"])
+        self.assertIn("record 19", self.read_log())
+        self.assertIn("record 18", self.read_log(self.log_file + ".1"))
+
+    def test_time_rotation(self):
+        """Test the file rotates once the interval has elapsed."""
+        handler = self.make_handler(rotate_interval=60, buffer_size=0)
+        self.log(handler, "before")
+        with patch("main.time.time", return_value=time.time() + 61):
+            self.log(handler, "after")
+        self.assertEqual(self.read_log(), "after\n")
+        self.assertEqual(self.read_log(self.log_file + ".1"), "before\n")
+
+    def test_rotated_files_compressed(self):
+        """Test rotated files are gzip-compressed in the background."""
+        handler = self.make_handler(
+            max_bytes=10, backup_count=3, buffer_size=0, compress=True
+        )
+        self.log(handler, "first record")
+        self.log(handler, "second record")
+        handler.close()
+        self.assertFalse(os.path.exists(self.log_file + ".1"))
+        with gzip.open(self.log_file + ".1.gz", "rt", encoding="utf-8") as handle:
+            self.assertEqual(handle.read(), "first record\n")
+
+    @patch.dict(
+        os.environ,
+        {
+            "LOG_MAX_SIZE": "1k",
+            "LOG_MAX_FILES": "2",
+            "LOG_BUFFER_SIZE": "256",
+            "NODE_ENV": "production",
+            "DEBUG": "false",
+        },
+    )
+    def test_startup_sequence_rotates_log_file(self):
+        """Test the configured handler rotates after load_configuration logs."""
+        isolate_root_logging(self, self.tmpdir.name)
+        logging.warning("before setup")
+        with patch("sys.stdout"):
+            setup_logging(load_configuration())
+            for index in range(100):
+                logging.getLogger("rotated").info("record %03d", index)
+        handler = logging.getLogger().handlers[1]
+        self.assertIsInstance(handler, BufferedRotatingFileHandler)
+        handler.flush()
+
+        names = sorted(os.listdir(self.tmpdir.name))
+        self.assertEqual(names, ["app.log", "app.log.1", "app.log.2"])
+        self.assertIn("record 099", self.read_log())
+
+    def test_parse_size(self):
+        """Test parsing human-readable sizes."""
+        self.assertEqual(parse_size("512"), 512)
+        self.assertEqual(parse_size("64k"), 64 * 1024)
+        self.assertEqual(parse_size("10M"), 10 * 1024**2)
+        self.assertEqual(parse_size("1g"), 1024**3)
+        with self.assertRaises(ValueError):
+            parse_size("ten")
+
+    @patch.dict(
+        os.environ,
+        {"LOG_MAX_SIZE": "10m", "LOG_BUFFER_SIZE": "64k", "LOG_COMPRESS": "true"},
+    )
+    def test_load_logging_options_rotation(self):
+        """Test reading rotation and buffering options from the environment."""
+        options = load_logging_options()
+        self.assertEqual(options.max_bytes, 10 * 1024**2)
+        self.assertEqual(options.buffer_size, 64 * 1024)
+        self.assertTrue(options.compress)
+        self.assertTrue(options.managed_file)
+
+
 class TestIntegration(unittest.TestCase):
     """Integration tests for the main application."""
 
+    def setUp(self):
+        """Keep the real logging setup away from the working directory."""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        isolate_root_logging(self, tmpdir.name)
+
     @patch.dict(
         os.environ,
         {